@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tiempo de importación de la CLI (python -X importtime)
+
+Ejecuta los comandos ligeros de cli.py en un proyecto temporal, cada uno en un
+proceso nuevo con -X importtime, y suma el tiempo acumulado de los módulos de
+primer nivel. Falla (código 1) si algún comando supera el presupuesto o si
+importa un módulo pesado que no necesita (openai, dotenv, aiohttp...).
+
+Uso:
+    python bench_imports.py [--budget-ms 250] [--rounds 5]
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Comandos que nunca deben cargar el agente ni el navegador
+COMMANDS = {
+    "status": ["status"],
+    "create-task": ["create-task", "Tarea de benchmark", "--id", "T-BENCH"],
+    "reset": ["reset", "--yes"],
+}
+
+FORBIDDEN = ("openai", "dotenv", "aiohttp", "asyncio", "multiprocessing", "PIL")
+
+TASK = """---
+id: T-001
+title: "Tarea de ejemplo"
+status: pending
+priority: high
+dependencies: []
+---
+
+## Descripción
+Tarea para el benchmark de importación.
+"""
+
+
+def parse_importtime(stderr: str):
+    """Devuelve (ms totales de los imports de primer nivel, módulos importados)"""
+    total_us, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # cabecera
+        modules.add(name.strip())
+        if not name.startswith("  "):  # sin sangría: import de primer nivel
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def measure(project: str, args, rounds: int):
+    """Mejor tiempo de importación de `rounds` ejecuciones; devuelve (ms, módulos)"""
+    env = dict(os.environ, EDITOR="true", PYTHONIOENCODING="utf-8")
+    best, modules = float("inf"), set()
+    for _ in range(rounds):
+        # create-task no sobrescribe una tarea existente
+        bench_task = os.path.join(project, ".ai-tasks", "tasks", "T-BENCH.md")
+        if os.path.exists(bench_task):
+            os.remove(bench_task)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", os.path.join(ROOT, "cli.py"), *args],
+            cwd=project, env=env, capture_output=True, text=True, encoding="utf-8"
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"cli.py {' '.join(args)} falló:\n{result.stdout}\n{result.stderr}")
+        elapsed, modules = parse_importtime(result.stderr)
+        best = min(best, elapsed)
+    return best, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de importación de la CLI")
+    parser.add_argument("--budget-ms", type=float, default=250, help="Máximo de ms de importación por comando")
+    parser.add_argument("--rounds", type=int, default=5, help="Repeticiones por comando (se toma la mejor)")
+    args = parser.parse_args()
+
+    project = tempfile.mkdtemp(prefix="import-bench-")
+    try:
+        tasks_dir = os.path.join(project, ".ai-tasks", "tasks")
+        os.makedirs(tasks_dir)
+        with open(os.path.join(tasks_dir, "T-001.md"), "w", encoding="utf-8") as f:
+            f.write(TASK)
+
+        failures = []
+        for name, command in COMMANDS.items():
+            elapsed, modules = measure(project, command, args.rounds)
+            heavy = sorted(m for m in modules if m.split(".")[0] in FORBIDDEN)
+            ok = elapsed <= args.budget_ms and not heavy
+            print(f"  {'✅' if ok else '❌'} {name:<12} {elapsed:>7.1f} ms  ({len(modules)} módulos)")
+            if elapsed > args.budget_ms:
+                failures.append(f"{name}: {elapsed:.1f} ms > {args.budget_ms:.0f} ms")
+            if heavy:
+                failures.append(f"{name}: importa {', '.join(heavy[:5])}")
+
+        if failures:
+            print("\n❌ Presupuesto de importación superado:")
+            for failure in failures:
+                print(f"  • {failure}")
+            sys.exit(1)
+        print(f"\n🚀 Todos los comandos por debajo de {args.budget_ms:.0f} ms")
+    finally:
+        shutil.rmtree(project, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
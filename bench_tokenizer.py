@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tokenizers SMMA sobre las cintas de .ai-tests/pressure
+
+Compara la estimación heurística con el backend BPE (vocabulario local .tiktoken):
+error relativo del conteo y mensajes/segundo, con y sin cache por contenido.
+
+Uso:
+    python bench_tokenizer.py --vocab cl100k_base.tiktoken [--tapes .ai-tests/pressure] [--rounds 20]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+# Añadir ruta para imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from task_runner.memory_manager import MemoryManager
+from task_runner.tokenizer import HeuristicTokenizer, BPETokenizer, CachedTokenizer
+
+
+def load_messages(tapes_dir: str):
+    """Lee los mensajes ADD_MESSAGE de todas las cintas"""
+    messages = []
+    for path in sorted(glob.glob(os.path.join(tapes_dir, "*.jsonl"))):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("action") == "ADD_MESSAGE":
+                    messages.append(record["message"])
+    return messages
+
+
+def measure(name: str, tokenizer, messages, rounds: int):
+    """Cuenta los tokens de todos los mensajes `rounds` veces; devuelve (total, msgs/s)"""
+    mm = MemoryManager.__new__(MemoryManager)
+    mm.tokenizer = tokenizer
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        total = sum(mm._calculate_message_tokens(m) for m in messages)
+    elapsed = time.perf_counter() - start
+
+    rate = len(messages) * rounds / elapsed if elapsed else float("inf")
+    print(f"  {name:<22} {total:>10} tokens  {rate:>12,.0f} msgs/s")
+    return total, rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tokenizers SMMA")
+    parser.add_argument("--vocab", help="Vocabulario .tiktoken para el backend BPE")
+    parser.add_argument("--tapes", default=".ai-tests/pressure", help="Directorio con cintas JSONL")
+    parser.add_argument("--rounds", type=int, default=20, help="Repeticiones por backend")
+    args = parser.parse_args()
+
+    messages = load_messages(args.tapes)
+    if not messages:
+        print(f"❌ No hay mensajes en {args.tapes}")
+        return 1
+
+    print(f"📊 {len(messages)} mensajes de {args.tapes}, {args.rounds} rondas\n")
+    heuristic_total, _ = measure("heuristic", HeuristicTokenizer(), messages, args.rounds)
+
+    if not args.vocab:
+        print("\n⚠️  Sin --vocab: se omite el backend BPE")
+        return 0
+
+    bpe = BPETokenizer(args.vocab)
+    label = "bpe (tiktoken)" if bpe.native else "bpe (python)"
+    bpe_total, _ = measure(label, bpe, messages, args.rounds)
+    measure(label + " + cache", CachedTokenizer(bpe), messages, args.rounds)
+
+    error = (heuristic_total - bpe_total) / bpe_total * 100 if bpe_total else 0.0
+    print(f"\n📏 Error de la heurística frente a BPE: {error:+.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parseo de tareas: PyYAML en Python puro frente a libyaml (C)
+
+Genera un corpus sintético de archivos de tarea (frontmatter + bloque E2E en
+YAML) y mide TaskParser.parse_all_tasks con cada backend de yaml_io, en un
+solo proceso y sin caché de parseo, para aislar el coste del YAML.
+
+Uso:
+    python bench_yaml.py [--files 10000] [--rounds 1] [--dir /tmp/corpus]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+# Añadir ruta para imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from task_runner import yaml_io
+from task_runner.task_parser import TaskParser, task_to_dict
+
+TASK_TEMPLATE = """---
+id: T-{n:05d}
+title: "Tarea sintética {n}"
+status: pending
+priority: {priority}
+dependencies: [{deps}]
+estimated_time: 2h
+---
+
+## Descripción
+Implementar el componente {n} con su estado, estilos y tests.
+
+## Criterios de Aceptación
+- [ ] Renderiza sin errores
+- [ ] Responde a la interacción del usuario
+- [ ] Pasa las métricas de rendimiento
+
+## Tests Unitarios
+```bash
+npm test src/components/Component{n}.test.tsx
+```
+
+## Tests E2E (CDP)
+```yaml
+steps:
+  - action: navigate
+    url: http://localhost:3000/component/{n}
+    wait_until: networkidle
+  - action: screenshot
+    filename: component-{n}.png
+    width: 1280
+    height: 720
+  - action: eval
+    code: document.querySelectorAll('.item').length
+    expect: {n}
+  - action: click
+    selector: "#submit-{n}"
+
+console_checks:
+  - no_errors: true
+  - allowed_warnings: ["React.StrictMode", "DevTools"]
+
+performance_thresholds:
+  lcp: 2500
+  cls: 0.1
+  fcp: 1800
+  ttfb: 800
+```
+
+## Definition of Done
+- [ ] Código revisado
+- [ ] Tests en verde
+"""
+
+
+def build_corpus(directory: str, count: int):
+    os.makedirs(directory, exist_ok=True)
+    for n in range(count):
+        deps = ", ".join(f"T-{d:05d}" for d in range(max(0, n - 2), n))
+        content = TASK_TEMPLATE.format(n=n, priority=("high", "medium", "low")[n % 3], deps=deps)
+        with open(os.path.join(directory, f"T-{n:05d}.md"), "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def measure(directory: str, rounds: int):
+    """Mejor tiempo de `rounds` parseos completos; devuelve (segundos, tareas)"""
+    best, tasks = float("inf"), []
+    for _ in range(rounds):
+        parser = TaskParser(directory, parallel_threshold=sys.maxsize)
+        start = time.perf_counter()
+        tasks = parser.parse_all_tasks()
+        best = min(best, time.perf_counter() - start)
+    return best, tasks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends YAML del parser de tareas")
+    parser.add_argument("--files", type=int, default=10000, help="Archivos de tarea sintéticos")
+    parser.add_argument("--rounds", type=int, default=1, help="Repeticiones por backend (se toma la mejor)")
+    parser.add_argument("--dir", help="Directorio del corpus (por defecto uno temporal que se borra)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="yaml-bench-")
+    try:
+        print(f"📝 Generando {args.files} tareas en {directory}...")
+        build_corpus(directory, args.files)
+
+        results = {}
+        backends = [False, True] if yaml_io.HAS_LIBYAML else [False]
+        for enabled in backends:
+            yaml_io.use_libyaml(enabled)
+            elapsed, tasks = measure(directory, args.rounds)
+            results[yaml_io.backend()] = (elapsed, tasks)
+            print(f"  {yaml_io.backend():<8} {elapsed:>8.2f} s  {len(tasks) / elapsed:>10,.0f} tareas/s")
+
+        if "libyaml" not in results:
+            print("⚠️  PyYAML sin libyaml: solo se ha medido el backend en Python puro")
+            return
+
+        (py_time, py_tasks), (c_time, c_tasks) = results["python"], results["libyaml"]
+        same = [task_to_dict(t) for t in py_tasks] == [task_to_dict(t) for t in c_tasks]
+        print(f"🚀 libyaml es {py_time / c_time:.1f}x más rápido (resultados idénticos: {'sí' if same else 'NO'})")
+    finally:
+        yaml_io.use_libyaml(True)
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
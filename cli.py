@@ -6,12 +6,13 @@ Sistema autónomo de orquestación de tareas para desarrollo de software con age
 """
 
 import click
-import yaml
 from pathlib import Path
 from typing import Optional
 
-from task_runner.task_engine import TaskEngine
-from task_runner.task_parser import TaskParser
+# TaskEngine se importa dentro de los comandos que lo usan: status y create-task
+# no deben cargar el agente ni sus dependencias
+from task_runner.state_store import StateStore, state_db_path
+from task_runner.status_reader import StatusReader
 from task_runner.utils import load_config, setup_logging, ensure_directories
 
 
@@ -121,9 +122,11 @@ Verificar que el orquestador está correctamente configurado.
 @cli.command()
 @click.option('--task', '-t', help='Ejecutar tarea específica por ID')
 @click.option('--parallel', '-p', is_flag=True, help='Ejecutar tareas en paralelo')
+@click.option('--async', 'use_async', is_flag=True, help='Ejecutar tareas concurrentemente con asyncio (un solo hilo)')
 @click.option('--dry-run', is_flag=True, help='Mostrar qué se ejecutaría sin ejecutar')
+@click.option('--watch', '-w', is_flag=True, help='Seguir en marcha ejecutando las tareas nuevas o editadas (Ctrl+C para salir)')
 @click.pass_context
-def run(ctx, task, parallel, dry_run):
+def run(ctx, task, parallel, use_async, dry_run, watch):
     """Ejecuta tareas pendientes"""
     config = ctx.obj['config']
     
@@ -132,20 +135,27 @@ def run(ctx, task, parallel, dry_run):
     
     # Asegurar directorios antes de correr
     from task_runner.utils import ensure_directories
+    from task_runner.task_engine import TaskEngine
     ensure_directories(config)
     
     engine = TaskEngine(config)
     
     if task:
+        if watch:
+            click.echo("⚠️  --watch se ignora al ejecutar una sola tarea")
         click.echo(f"🎯 Ejecutando tarea: {task}")
         engine.run(task_id=task)
     else:
-        if parallel:
+        if use_async:
+            click.echo("⚡ Ejecutando en modo asyncio\n")
+        elif parallel:
             click.echo("⚡ Ejecutando en modo paralelo\n")
         else:
             click.echo("▶️  Ejecutando en modo secuencial\n")
+        if watch:
+            click.echo("👀 Modo watch: las tareas nuevas o editadas se ejecutan sin reiniciar (Ctrl+C para salir)\n")
         
-        engine.run(parallel=parallel)
+        engine.run(parallel=parallel, use_async=use_async, watch=watch)
 
 
 @cli.command()
@@ -153,9 +163,14 @@ def run(ctx, task, parallel, dry_run):
 def status(ctx):
     """Muestra el estado actual de todas las tareas"""
     config = ctx.obj['config']
-    engine = TaskEngine(config)
+    tasks_dir = Path(config.get('directories', {}).get('tasks', './tasks'))
     
-    status_data = engine.get_status()
+    # Solo lectura: índice de frontmatter + estado guardado, sin construir el TaskEngine
+    state = StateStore(state_db_path(config))
+    try:
+        status_data = StatusReader(tasks_dir, state).get_status()
+    finally:
+        state.close()
     summary = status_data['summary']
     
     click.echo("\n📊 Estado del Proyecto\n")
@@ -201,6 +216,7 @@ def status(ctx):
 def report(ctx, format, open_report):
     """Genera y muestra reportes de ejecución"""
     from task_runner.report_generator import ReportGenerator
+    from task_runner.task_engine import TaskEngine
     
     config = ctx.obj['config']
     engine = TaskEngine(config)
@@ -321,10 +337,26 @@ performance_thresholds:
         pass
 
 
+@cli.command()
+@click.pass_context
+def sync(ctx):
+    """Escribe en el frontmatter de los .md el estado guardado de las tareas"""
+    from task_runner.task_engine import TaskEngine
+    
+    config = ctx.obj['config']
+    engine = TaskEngine(config)
+    engine.load_tasks()
+    
+    synced = engine.sync_frontmatter()
+    click.echo(f"📝 {synced} tarea(s) sincronizada(s)" if synced else "✅ Frontmatter ya sincronizado")
+
+
 @cli.command()
 @click.pass_context
 def retry(ctx):
     """Re-ejecuta tareas fallidas"""
+    from task_runner.task_engine import TaskEngine
+    
     config = ctx.obj['config']
     engine = TaskEngine(config)
     engine.load_tasks()
@@ -343,7 +375,7 @@ def retry(ctx):
         task.status = "pending"
         task.error_message = None
         task.retry_count = 0
-        engine.parser.update_task_status(task, "pending")
+        engine.set_task_status(task, "pending")
     
     click.echo("\n▶️  Ejecutando...")
     engine.run()
@@ -354,6 +386,8 @@ def retry(ctx):
 @click.pass_context
 def reset(ctx):
     """Resetea el estado de todas las tareas (vuelven a pending)"""
+    from task_runner.task_engine import TaskEngine
+    
     config = ctx.obj['config']
     engine = TaskEngine(config)
     engine.load_tasks()
@@ -368,9 +402,13 @@ def reset(ctx):
             task.retry_count = 0
             task.started_at = None
             task.completed_at = None
-            engine.parser.update_task_status(task, "pending")
+            engine.set_task_status(task, "pending")
             click.echo(f"  ♻️  {task.id}: {old_status} → pending")
     
+    # Escribir los pending en los .md y vaciar el estado guardado
+    engine.sync_frontmatter()
+    engine.state.forget()
+    
     # Limpiar archivo de estado
     status_file = Path(config.get('files', {}).get('status', './task-status.json'))
     if status_file.exists():
@@ -0,0 +1,168 @@
+"""
+Browser Pool - Pestañas aisladas de una misma instancia de Chrome para
+ejecutar los tests E2E de varias tareas a la vez
+"""
+
+import logging
+import threading
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from .cdp_client import CDPClient, BackgroundLoop, browser_ws_url
+from .cdp_wrapper import CDPWrapper
+
+
+class PooledPage:
+    """Target (pestaña) creado por el pool, con su contexto de navegador"""
+
+    def __init__(self, target_id: str, context_id: Optional[str], wrapper: CDPWrapper):
+        self.target_id = target_id
+        self.context_id = context_id
+        self.wrapper = wrapper
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Presta pestañas a los tests E2E con concurrencia acotada.
+
+    Cada pestaña se crea bajo demanda en su propio BrowserContext (cookies,
+    storage y caché separados) a través de la conexión de navegador
+    (Target.createBrowserContext / Target.createTarget). Como mucho hay
+    `max_pages` préstamos a la vez; el resto espera a que se libere un hueco.
+    Al devolverla la pestaña se destruye con su contexto o, con
+    `reuse_pages`, se limpia y se reutiliza hasta `page_max_uses` veces.
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.host = config.get("host", "127.0.0.1")
+        self.port = config.get("port", 9222)
+        self.max_pages = max(1, config.get("max_pages", 4))
+        self.isolated_contexts = config.get("isolated_contexts", True)
+        self.reuse_pages = config.get("reuse_pages", False)
+        self.page_max_uses = config.get("page_max_uses", 20)
+        self.lease_timeout = config.get("lease_timeout", 300)
+        self.command_timeout = config.get("command_timeout", 30)
+        self.logger = logging.getLogger("BrowserPool")
+
+        self._slots = threading.BoundedSemaphore(self.max_pages)
+        self._lock = threading.Lock()
+        self._idle: List[PooledPage] = []
+        self._leased: Dict[str, PooledPage] = {}
+        self._loop: Optional[BackgroundLoop] = None
+        self._browser: Optional[CDPClient] = None
+
+    def is_available(self) -> bool:
+        """Verifica si Chrome está ejecutándose con remote debugging"""
+        try:
+            response = urllib.request.urlopen(
+                f"http://{self.host}:{self.port}/json/version",
+                timeout=2
+            )
+            return response.getcode() == 200
+        except Exception as e:
+            self.logger.error(f"❌ Chrome CDP no disponible: {e}")
+            return False
+
+    def _browser_call(self, method: str, params: Optional[Dict] = None) -> Dict:
+        """Envía un comando a la conexión de navegador (se abre la primera vez)"""
+        with self._lock:
+            if self._browser is None:
+                self._loop = BackgroundLoop(name="cdp-pool")
+                self._browser = CDPClient(browser_ws_url(self.host, self.port),
+                                          command_timeout=self.command_timeout)
+        return self._loop.run(self._browser.send(method, params), timeout=self.command_timeout + 5)
+
+    def _create_page(self) -> PooledPage:
+        context_id = None
+        if self.isolated_contexts:
+            context_id = self._browser_call("Target.createBrowserContext", {"disposeOnDetach": False})["browserContextId"]
+
+        params = {"url": "about:blank"}
+        if context_id:
+            params["browserContextId"] = context_id
+        try:
+            target_id = self._browser_call("Target.createTarget", params)["targetId"]
+        except Exception:
+            if context_id:
+                self._browser_call("Target.disposeBrowserContext", {"browserContextId": context_id})
+            raise
+
+        wrapper = CDPWrapper(self.config, page_id=target_id, loop=self._loop)
+        self.logger.info(f"🆕 Pestaña {target_id} creada (contexto {context_id or 'por defecto'})")
+        return PooledPage(target_id, context_id, wrapper)
+
+    def _dispose_page(self, page: PooledPage):
+        page.wrapper.close()
+        try:
+            self._browser_call("Target.closeTarget", {"targetId": page.target_id})
+            if page.context_id:
+                self._browser_call("Target.disposeBrowserContext", {"browserContextId": page.context_id})
+        except Exception as e:
+            self.logger.warning(f"⚠️  Error cerrando pestaña {page.target_id}: {e}")
+
+    def _reset_page(self, page: PooledPage):
+        """Deja la pestaña en blanco y sin cookies para el siguiente préstamo"""
+        page.wrapper.navigate("about:blank", wait_until="none")
+        page.wrapper._send("Network.clearBrowserCookies")
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Presta un CDPWrapper ligado a una pestaña exclusiva mientras dure el bloque"""
+        if not self._slots.acquire(timeout=timeout or self.lease_timeout):
+            raise TimeoutError(f"No hay pestañas libres tras {timeout or self.lease_timeout}s (max_pages={self.max_pages})")
+
+        page = None
+        try:
+            with self._lock:
+                page = self._idle.pop() if self._idle else None
+            if page is None:
+                page = self._create_page()
+            with self._lock:
+                self._leased[page.target_id] = page
+
+            yield page.wrapper
+        finally:
+            if page is not None:
+                self._release(page)
+            self._slots.release()
+
+    def _release(self, page: PooledPage):
+        with self._lock:
+            self._leased.pop(page.target_id, None)
+        page.uses += 1
+
+        if self.reuse_pages and page.uses < self.page_max_uses:
+            try:
+                self._reset_page(page)
+                with self._lock:
+                    self._idle.append(page)
+                return
+            except Exception as e:
+                self.logger.warning(f"⚠️  No se pudo reciclar la pestaña {page.target_id}: {e}")
+
+        self._dispose_page(page)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"leased": len(self._leased), "idle": len(self._idle), "max_pages": self.max_pages}
+
+    def close(self):
+        """Cierra las pestañas libres, la conexión de navegador y su loop"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for page in idle:
+            self._dispose_page(page)
+
+        with self._lock:
+            if self._browser is not None:
+                try:
+                    self._loop.run(self._browser.close(), timeout=5)
+                except Exception as e:
+                    self.logger.warning(f"⚠️  Error cerrando conexión de navegador: {e}")
+                self._loop.stop()
+            self._browser = None
+            self._loop = None
@@ -0,0 +1,290 @@
+"""
+CDP Client - Cliente nativo del Chrome DevTools Protocol sobre WebSocket
+
+Mantiene una única conexión por página y multiplexa los comandos por `id`:
+cada envío registra un Future que resuelve el lector en segundo plano al
+llegar la respuesta. Los mensajes sin `id` son eventos y se reparten a los
+listeners registrados con `on()`.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import aiohttp
+except ImportError:
+    logging.warning("El paquete 'aiohttp' no está instalado. Instálalo con 'pip install aiohttp'")
+    aiohttp = None
+
+
+class CDPError(RuntimeError):
+    """Error devuelto por Chrome a un comando CDP"""
+
+    def __init__(self, method: str, error: Dict[str, Any]):
+        self.method = method
+        self.code = error.get("code")
+        super().__init__(f"{method}: {error.get('message', error)}")
+
+
+def list_targets(host: str, port: int, timeout: float = 2) -> List[Dict[str, Any]]:
+    """Devuelve las pestañas expuestas por /json/list"""
+    with urllib.request.urlopen(f"http://{host}:{port}/json/list", timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def browser_ws_url(host: str, port: int, timeout: float = 2) -> str:
+    """URL WebSocket del endpoint de navegador (Target.*, contextos) según /json/version"""
+    with urllib.request.urlopen(f"http://{host}:{port}/json/version", timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))["webSocketDebuggerUrl"]
+
+
+class CDPClient:
+    """Conexión WebSocket persistente con un target (página) de Chrome"""
+
+    def __init__(self, ws_url: str, command_timeout: float = 30):
+        self.ws_url = ws_url
+        self.command_timeout = command_timeout
+        self.logger = logging.getLogger("CDPClient")
+
+        self._session = None
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._methods: Dict[int, str] = {}
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], Any]]] = {}
+        self._connect_lock: Optional[asyncio.Lock] = None
+        # Dominios habilitados en la conexión actual (se reinicia al reconectar)
+        self._enabled = set()
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    async def connect(self):
+        """Abre la conexión si no lo está ya (idempotente)"""
+        if aiohttp is None:
+            raise RuntimeError("aiohttp no está instalado")
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+
+        async with self._connect_lock:
+            if self.connected:
+                return
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession()
+            self._ws = await self._session.ws_connect(self.ws_url, max_msg_size=0)
+            self._enabled.clear()
+            self._reader = asyncio.ensure_future(self._read_loop())
+            self.logger.debug(f"🔌 Conectado a {self.ws_url}")
+
+    async def _read_loop(self):
+        """Reparte respuestas a sus Futures y eventos a sus listeners"""
+        ws = self._ws
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                try:
+                    data = json.loads(msg.data)
+                except ValueError:
+                    self.logger.warning("Mensaje CDP no es JSON, ignorado")
+                    continue
+
+                if "id" in data:
+                    future = self._pending.pop(data["id"], None)
+                    method = self._methods.pop(data["id"], "?")
+                    if future is None or future.done():
+                        continue
+                    if "error" in data:
+                        future.set_exception(CDPError(method, data["error"]))
+                    else:
+                        future.set_result(data.get("result", {}))
+                elif "method" in data:
+                    self._dispatch(data["method"], data.get("params", {}))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"❌ Error leyendo de CDP: {e}")
+        finally:
+            # Conexión cerrada: ningún comando pendiente recibirá respuesta
+            error = ConnectionError("Conexión CDP cerrada")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            self._methods.clear()
+
+    def _dispatch(self, method: str, params: Dict[str, Any]):
+        for callback in list(self._listeners.get(method, [])):
+            try:
+                result = callback(params)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                self.logger.error(f"❌ Error en listener de {method}: {e}")
+
+    def on(self, method: str, callback: Callable[[Dict[str, Any]], Any]):
+        """Registra un listener para un evento CDP (p.ej. 'Page.loadEventFired')"""
+        self._listeners.setdefault(method, []).append(callback)
+
+    def off(self, method: str, callback: Callable[[Dict[str, Any]], Any]):
+        """Elimina un listener registrado con on()"""
+        listeners = self._listeners.get(method, [])
+        if callback in listeners:
+            listeners.remove(callback)
+
+    def expect(self, method: str, predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> asyncio.Future:
+        """
+        Future que se resuelve con los params del próximo evento `method`.
+        Debe crearse ANTES del comando que lo provoca para no perder el evento.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        def listener(params):
+            if not future.done() and (predicate is None or predicate(params)):
+                future.set_result(params)
+
+        self.on(method, listener)
+        future.add_done_callback(lambda _: self.off(method, listener))
+        return future
+
+    async def enable(self, domain: str):
+        """Habilita un dominio CDP (Page, Network, Runtime...) una vez por conexión"""
+        if not self.connected:
+            await self.connect()
+        if domain not in self._enabled:
+            await self.send(f"{domain}.enable")
+            self._enabled.add(domain)
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Envía un comando y espera su respuesta (reconecta si hace falta)"""
+        if not self.connected:
+            await self.connect()
+
+        self._next_id += 1
+        command_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        self._methods[command_id] = method
+
+        try:
+            await self._ws.send_str(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+            return await asyncio.wait_for(future, timeout or self.command_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Timeout esperando respuesta CDP de {method}")
+        finally:
+            self._pending.pop(command_id, None)
+            self._methods.pop(command_id, None)
+
+    async def close(self):
+        """Cierra la conexión y la sesión HTTP"""
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._ws = None
+        self._session = None
+
+
+class NetworkIdleTracker:
+    """
+    Cuenta las peticiones de red en vuelo a partir de los eventos Network.*
+    para esperar a que la página quede inactiva (networkidle).
+    """
+
+    def __init__(self, client: CDPClient, idle_time: float = 0.5):
+        self.client = client
+        self.idle_time = idle_time
+        self._inflight = set()
+        self._last_activity = time.monotonic()
+        self._changed: Optional[asyncio.Event] = None
+        client.on("Network.requestWillBeSent", self._on_request)
+        client.on("Network.loadingFinished", self._on_done)
+        client.on("Network.loadingFailed", self._on_done)
+
+    def _touch(self):
+        self._last_activity = time.monotonic()
+        if self._changed is not None:
+            self._changed.set()
+
+    def _on_request(self, params):
+        self._inflight.add(params.get("requestId"))
+        self._touch()
+
+    def _on_done(self, params):
+        self._inflight.discard(params.get("requestId"))
+        self._touch()
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def reset(self):
+        """Olvida peticiones anteriores (p.ej. antes de una navegación)"""
+        self._inflight.clear()
+        self._touch()
+
+    async def wait(self, timeout: float):
+        """Espera `idle_time` segundos seguidos sin peticiones en vuelo"""
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        deadline = time.monotonic() + timeout
+
+        while True:
+            now = time.monotonic()
+            if not self._inflight and now - self._last_activity >= self.idle_time:
+                return
+            if now >= deadline:
+                raise TimeoutError(f"Red no inactiva tras {timeout}s ({self.inflight} peticiones en vuelo)")
+
+            # Dormir hasta que cumpla el periodo de inactividad o llegue otro evento
+            if self._inflight:
+                wait_for = deadline - now
+            else:
+                wait_for = min(deadline - now, self.idle_time - (now - self._last_activity))
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), max(wait_for, 0))
+            except asyncio.TimeoutError:
+                pass
+
+
+class BackgroundLoop:
+    """
+    Event loop en un hilo daemon para usar clientes asyncio desde código síncrono.
+    Permite que el CDPWrapper síncrono comparta una conexión persistente.
+    """
+
+    def __init__(self, name: str = "cdp-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Ejecuta una corrutina en el loop y espera su resultado"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+        if not self.loop.is_running() and not self.loop.is_closed():
+            self.loop.close()
@@ -1,55 +1,124 @@
 """
-CDP Wrapper - Integración con CDP Controller
+CDP Wrapper - Integración con Chrome DevTools Protocol
+
+Usa una sesión WebSocket persistente por página (ver cdp_client) en lugar de
+lanzar un proceso de cdp_controller.py por cada comando.
 """
 
-import subprocess
 import json
-import logging
 import time
+import base64
+import asyncio
+import logging
+import threading
 from typing import Dict, Optional, List
 from pathlib import Path
 import urllib.request
 
+from . import tracing
+from .cdp_client import CDPClient, BackgroundLoop, NetworkIdleTracker, list_targets
+from .page_events import PageEventCollector
+
+NAVIGATION_WAITS = ("load", "domcontentloaded", "networkidle", "none")
+
+# Eventos de ciclo de vida que marcan el fin de una navegación
+LIFECYCLE_EVENTS = {
+    "load": "Page.loadEventFired",
+    "domcontentloaded": "Page.domContentEventFired",
+    "networkidle": "Page.loadEventFired",
+}
+
+# Resuelve true en cuanto exista el selector (MutationObserver), false si vence el timeout
+WAIT_FOR_SELECTOR_JS = """
+new Promise((resolve) => {
+    const selector = %(selector)s;
+    const found = () => document.querySelector(selector) !== null;
+    if (found()) return resolve(true);
+    const observer = new MutationObserver(() => {
+        if (found()) { observer.disconnect(); clearTimeout(timer); resolve(true); }
+    });
+    observer.observe(document.documentElement || document, {childList: true, subtree: true, attributes: true});
+    const timer = setTimeout(() => { observer.disconnect(); resolve(false); }, %(timeout_ms)d);
+})
+"""
+
+# Evalúa la condición en cada cambio del DOM y cada `interval` ms
+WAIT_FOR_FUNCTION_JS = """
+new Promise((resolve) => {
+    const check = () => { try { return !!(%(expression)s); } catch (e) { return false; } };
+    if (check()) return resolve(true);
+    const done = (value) => { observer.disconnect(); clearInterval(poll); clearTimeout(timer); resolve(value); };
+    const observer = new MutationObserver(() => { if (check()) done(true); });
+    observer.observe(document.documentElement || document, {childList: true, subtree: true, attributes: true, characterData: true});
+    const poll = setInterval(() => { if (check()) done(true); }, %(interval_ms)d);
+    const timer = setTimeout(() => done(false), %(timeout_ms)d);
+})
+"""
+
+WAIT_FOR_LOAD_JS = """
+new Promise((resolve) => {
+    if (document.readyState === 'complete') return resolve(true);
+    window.addEventListener('load', () => resolve(true), {once: true});
+    setTimeout(() => resolve(document.readyState === 'complete'), %(timeout_ms)d);
+})
+"""
+
+
+# Web vitals desde las entradas buffered de la Performance API
+PERFORMANCE_METRICS_JS = """
+new Promise((resolve) => {
+    const metrics = {};
+    const nav = performance.getEntriesByType('navigation')[0];
+    if (nav) metrics.ttfb = nav.responseStart - nav.requestStart;
+    const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+    if (fcp) metrics.fcp = fcp.startTime;
+    let cls = 0;
+    try {
+        new PerformanceObserver((list) => {
+            for (const e of list.getEntries()) { if (!e.hadRecentInput) cls += e.value; }
+        }).observe({type: 'layout-shift', buffered: true});
+        new PerformanceObserver((list) => {
+            const entries = list.getEntries();
+            if (entries.length) metrics.lcp = entries[entries.length - 1].startTime;
+        }).observe({type: 'largest-contentful-paint', buffered: true});
+    } catch (e) {}
+    setTimeout(() => { metrics.cls = cls; resolve(metrics); }, 0);
+})
+"""
+
 
 class CDPWrapper:
-    """Wrapper para CDP Controller"""
-    
-    def __init__(self, config: Dict):
+    """
+    Wrapper síncrono sobre una sesión CDP persistente.
+
+    Sin `page_id` usa la primera pestaña disponible. El BrowserPool crea
+    wrappers ligados a su propio target y comparte con ellos un único loop.
+    """
+
+    def __init__(self, config: Dict, page_id: Optional[str] = None, ws_url: Optional[str] = None,
+                 loop: Optional[BackgroundLoop] = None):
         self.config = config
         self.host = config.get("host", "127.0.0.1")
         self.port = config.get("port", 9222)
-        self.controller_path = config.get("controller_path")
+        self.command_timeout = config.get("command_timeout", 30)
+        # Señal que da por terminada una navegación: load | domcontentloaded | networkidle | none
+        self.navigation_wait = config.get("navigation_wait", "load")
+        self.navigation_timeout = config.get("navigation_timeout", 30)
+        self.network_idle_time = config.get("network_idle_time", 0.5)
+        # Tamaño del buffer circular de mensajes de consola
+        self.console_buffer = config.get("console_buffer", 1000)
         self.logger = logging.getLogger("CDPWrapper")
-        self.page_id: Optional[str] = None
-        
-        # Auto-detectar controller_path si no está configurado
-        if not self.controller_path:
-            self._autodetect_controller()
-    
-    def _autodetect_controller(self):
-        """Intenta encontrar cdp_controller.py automáticamente"""
-        # Buscar en directorios comunes
-        search_paths = [
-            Path("cdp_controller.py"),
-            Path("../cdp_controller.py"),
-            Path("../cdp_controller/src/cdp_controller.py"),
-            Path("../../cdp_controller.py"),
-            Path.home() / "cdp_controller.py",
-        ]
-        
-        # Buscar en variable de entorno
-        import os
-        if os.getenv("CDP_CONTROLLER_PATH"):
-            search_paths.insert(0, Path(os.getenv("CDP_CONTROLLER_PATH")))
-        
-        for path in search_paths:
-            if path.exists():
-                self.controller_path = str(path.absolute())
-                self.logger.info(f"✅ CDP Controller encontrado: {self.controller_path}")
-                return
-        
-        self.logger.warning("⚠️  CDP Controller no encontrado. Especifica la ruta en config.yaml")
-    
+        self.page_id: Optional[str] = page_id
+
+        self._ws_url: Optional[str] = ws_url
+        self._client: Optional[CDPClient] = None
+        self._network: Optional[NetworkIdleTracker] = None
+        self._collector: Optional[PageEventCollector] = None
+        self._loop: Optional[BackgroundLoop] = loop
+        # Solo se detiene al cerrar el loop que crea el propio wrapper
+        self._owns_loop = loop is None
+        self._lock = threading.Lock()
+
     def is_available(self) -> bool:
         """Verifica si Chrome está ejecutándose con remote debugging"""
         try:
@@ -61,180 +130,256 @@ class CDPWrapper:
         except Exception as e:
             self.logger.error(f"❌ Chrome CDP no disponible: {e}")
             return False
-    
-    def _run_cdp_command(self, *args) -> Dict:
-        """Ejecuta un comando del CDP Controller"""
-        if not self.controller_path:
-            raise RuntimeError("CDP Controller path no configurado")
-        
-        cmd = ["python", self.controller_path] + list(args)
-        
-        self.logger.debug(f"CDP Command: {' '.join(cmd)}")
-        
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                encoding="utf-8"
-            )
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "stderr": result.stderr,
-                "exit_code": result.returncode
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Timeout ejecutando comando CDP"
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
-    
+
     def _get_page_id(self) -> str:
         """Obtiene el ID de la primera pestaña disponible"""
         if self.page_id:
+            if not self._ws_url:
+                self._ws_url = f"ws://{self.host}:{self.port}/devtools/page/{self.page_id}"
             return self.page_id
-        
-        result = self._run_cdp_command("list")
-        
-        if not result["success"]:
-            raise RuntimeError(f"No se pudo obtener lista de pestañas: {result.get('error')}")
-        
-        # Parsear output para obtener primer ID
-        lines = result["output"].strip().split('\n')
-        if not lines:
+
+        try:
+            targets = list_targets(self.host, self.port)
+        except Exception as e:
+            raise RuntimeError(f"No se pudo obtener lista de pestañas: {e}")
+
+        pages = [t for t in targets if t.get("type") == "page" and t.get("webSocketDebuggerUrl")]
+        if not pages:
             raise RuntimeError("No hay pestañas disponibles")
-        
-        # Formato: "1. [ID] Título - URL"
-        first_line = lines[0]
-        match = first_line.split('[')
-        if len(match) < 2:
-            raise RuntimeError(f"Formato inesperado: {first_line}")
-        
-        self.page_id = match[1].split(']')[0]
+
+        self.page_id = pages[0]["id"]
+        self._ws_url = pages[0]["webSocketDebuggerUrl"]
         self.logger.info(f"📄 Usando página ID: {self.page_id}")
-        
+
         return self.page_id
-    
-    def navigate(self, url: str):
-        """Navega a una URL"""
+
+    def _get_client(self) -> CDPClient:
+        """Crea (una sola vez) el cliente de la página y su event loop"""
+        with self._lock:
+            if self._client is None:
+                self._get_page_id()
+                if self._loop is None:
+                    self._loop = BackgroundLoop()
+                self._client = CDPClient(self._ws_url, command_timeout=self.command_timeout)
+                self._network = NetworkIdleTracker(self._client, idle_time=self.network_idle_time)
+            return self._client
+
+    def _send(self, method: str, params: Optional[Dict] = None, timeout: Optional[float] = None) -> Dict:
+        """Envía un comando por la sesión persistente y espera la respuesta"""
+        client = self._get_client()
+        self.logger.debug(f"CDP Command: {method}")
+        timeout = timeout or self.command_timeout
+        with tracing.span(method, cat="cdp"):
+            return self._loop.run(client.send(method, params, timeout=timeout), timeout=timeout + 5)
+
+    def _run(self, coro_factory, timeout: float):
+        """Ejecuta en el loop de la sesión una corrutina construida con el cliente"""
+        client = self._get_client()
+        return self._loop.run(coro_factory(client), timeout=timeout + 5)
+
+    def close(self):
+        """Cierra la sesión CDP y detiene su event loop"""
+        with self._lock:
+            if self._client is not None:
+                try:
+                    self._loop.run(self._client.close(), timeout=5)
+                except Exception as e:
+                    self.logger.warning(f"⚠️  Error cerrando sesión CDP: {e}")
+            if self._loop is not None and self._owns_loop:
+                self._loop.stop()
+                self._loop = None
+            if self._collector is not None:
+                self._collector.stop()
+            self._client = None
+            self._network = None
+            self._collector = None
+
+    def navigate(self, url: str, wait_until: Optional[str] = None, selector: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        """
+        Navega a una URL y espera a que termine según `wait_until`
+        (load, domcontentloaded, networkidle o none) y, opcionalmente,
+        a que aparezca `selector`. `timeout` en segundos.
+        """
+        wait_until = wait_until or self.navigation_wait
+        if wait_until not in NAVIGATION_WAITS:
+            raise ValueError(f"wait_until desconocido '{wait_until}'. Usa uno de {NAVIGATION_WAITS}")
+        timeout = timeout or self.navigation_timeout
+
         self.logger.info(f"🌐 Navegando a: {url}")
-        page_id = self._get_page_id()
-        
-        result = self._run_cdp_command("navigate", page_id, url)
-        
-        if not result["success"]:
-            raise RuntimeError(f"Error navegando: {result.get('error')}")
-        
-        # Esperar a que cargue
-        time.sleep(2)
-        self.logger.info("✅ Navegación completada")
-    
+        start = time.monotonic()
+        self._run(lambda client: self._navigate(client, url, wait_until, timeout), timeout)
+
+        if selector:
+            self.wait_for_selector(selector, timeout=max(timeout - (time.monotonic() - start), 0.1))
+        self.logger.info(f"✅ Navegación completada ({wait_until}, {time.monotonic() - start:.2f}s)")
+
+    async def _navigate(self, client: CDPClient, url: str, wait_until: str, timeout: float):
+        deadline = time.monotonic() + timeout
+        lifecycle = None
+
+        if wait_until != "none":
+            await client.enable("Page")
+            if wait_until == "networkidle":
+                await client.enable("Network")
+                self._network.reset()
+            # Registrar la espera antes de navegar para no perder el evento
+            lifecycle = client.expect(LIFECYCLE_EVENTS[wait_until])
+
+        try:
+            result = await client.send("Page.navigate", {"url": url})
+            if result.get("errorText"):
+                raise RuntimeError(f"Error navegando: {result['errorText']}")
+
+            if lifecycle is None:
+                return
+            if not result.get("loaderId"):
+                # Navegación dentro del mismo documento (p.ej. #hash): no hay evento de carga
+                return
+
+            try:
+                await asyncio.wait_for(lifecycle, max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Timeout ({timeout}s) esperando '{wait_until}' en {url}")
+
+            if wait_until == "networkidle":
+                await self._network.wait(max(deadline - time.monotonic(), 0))
+        finally:
+            if lifecycle is not None and not lifecycle.done():
+                lifecycle.cancel()
+
+    def _evaluate_wait(self, script: str, timeout: float, description: str):
+        """Evalúa un script de espera (promesa que resuelve true/false) y falla si vence"""
+        result = self._send("Runtime.evaluate", {
+            "expression": script,
+            "returnByValue": True,
+            "awaitPromise": True
+        }, timeout=timeout + self.command_timeout)
+
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            message = details.get("exception", {}).get("description") or details.get("text")
+            raise RuntimeError(f"Error esperando {description}: {message}")
+        if not result.get("result", {}).get("value"):
+            raise TimeoutError(f"Timeout ({timeout}s) esperando {description}")
+
+    def wait_for_selector(self, selector: str, timeout: Optional[float] = None):
+        """Espera a que exista un elemento que cumpla `selector`"""
+        timeout = timeout or self.navigation_timeout
+        self.logger.info(f"⏳ Esperando selector: {selector}")
+        script = WAIT_FOR_SELECTOR_JS % {"selector": json.dumps(selector), "timeout_ms": int(timeout * 1000)}
+        self._evaluate_wait(script, timeout, f"selector {selector}")
+
+    def wait_for_function(self, expression: str, timeout: Optional[float] = None, interval: float = 0.1):
+        """Espera a que una expresión JavaScript sea truthy"""
+        timeout = timeout or self.navigation_timeout
+        self.logger.info(f"⏳ Esperando condición: {expression[:50]}")
+        script = WAIT_FOR_FUNCTION_JS % {
+            "expression": expression,
+            "interval_ms": int(interval * 1000),
+            "timeout_ms": int(timeout * 1000)
+        }
+        self._evaluate_wait(script, timeout, f"condición {expression[:50]}")
+
+    def wait_for_load(self, timeout: Optional[float] = None):
+        """Espera a que el documento actual termine de cargar (readyState complete)"""
+        timeout = timeout or self.navigation_timeout
+        self.logger.info("⏳ Esperando evento load")
+        self._evaluate_wait(WAIT_FOR_LOAD_JS % {"timeout_ms": int(timeout * 1000)}, timeout, "evento load")
+
+    def wait_for_network_idle(self, timeout: Optional[float] = None):
+        """Espera a que no haya peticiones de red en vuelo durante network_idle_time"""
+        timeout = timeout or self.navigation_timeout
+        self.logger.info("⏳ Esperando red inactiva")
+
+        async def wait(client):
+            await client.enable("Network")
+            await self._network.wait(timeout)
+
+        self._run(wait, timeout)
+
     def screenshot(self, output_path: str, width: Optional[int] = None, height: Optional[int] = None):
         """Captura un screenshot"""
         self.logger.info(f"📸 Capturando screenshot: {output_path}")
-        page_id = self._get_page_id()
-        
+
         # Crear directorio si no existe
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        args = ["screenshot", page_id, output_path]
-        
+
         if width and height:
-            args.extend([str(width), str(height)])
             self.logger.info(f"   Viewport: {width}x{height}")
-        
-        result = self._run_cdp_command(*args)
-        
-        if not result["success"]:
-            raise RuntimeError(f"Error capturando screenshot: {result.get('error')}")
-        
+            self._send("Emulation.setDeviceMetricsOverride", {
+                "width": int(width), "height": int(height),
+                "deviceScaleFactor": 1, "mobile": False
+            })
+
+        try:
+            result = self._send("Page.captureScreenshot", {"format": "png"})
+        finally:
+            if width and height:
+                self._send("Emulation.clearDeviceMetricsOverride")
+
+        with open(output_path, "wb") as f:
+            f.write(base64.b64decode(result["data"]))
+
         self.logger.info(f"✅ Screenshot guardado: {output_path}")
-    
+
     def evaluate(self, code: str) -> any:
         """Ejecuta JavaScript en la página"""
         self.logger.info(f"⚡ Ejecutando JavaScript: {code[:50]}...")
-        page_id = self._get_page_id()
-        
-        result = self._run_cdp_command("eval", page_id, code)
-        
-        if not result["success"]:
-            raise RuntimeError(f"Error evaluando JS: {result.get('error')}")
-        
-        # Intentar extraer el resultado
-        # El output puede ser complejo, intentamos parsearlo
-        output = result["output"]
-        
-        # Buscar en el output el valor de retorno
-        try:
-            # Buscar línea con "result":
-            for line in output.split('\n'):
-                if '"value"' in line:
-                    # Extraer valor
-                    json_str = output[output.find('{'):output.rfind('}')+1]
-                    data = json.loads(json_str)
-                    return data.get("result", {}).get("value")
-        except:
-            pass
-        
-        return output
-    
+
+        result = self._send("Runtime.evaluate", {
+            "expression": code,
+            "returnByValue": True,
+            "awaitPromise": True
+        })
+
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            message = details.get("exception", {}).get("description") or details.get("text")
+            raise RuntimeError(f"Error evaluando JS: {message}")
+
+        return result.get("result", {}).get("value")
+
     def click(self, selector: str):
         """Hace click en un elemento"""
-        code = f'document.querySelector("{selector}").click()'
+        code = f'document.querySelector({json.dumps(selector)}).click()'
         self.evaluate(code)
-    
+
+    def start_capture(self):
+        """Empieza a recoger consola y métricas por eventos (llamar antes de los steps)"""
+        client = self._get_client()
+        if self._collector is None:
+            self._collector = PageEventCollector(client, main_frame_id=self.page_id,
+                                                 max_entries=self.console_buffer)
+        else:
+            # Pestaña reutilizada del pool: nada del préstamo anterior (ni su reset a about:blank)
+            self._collector.reset()
+        self._run(lambda _: self._collector.start(), self.command_timeout)
+        self.logger.info("🎧 Captura de consola y rendimiento activada")
+
     def get_console_logs(self) -> List[Dict]:
-        """Obtiene logs de la consola"""
-        # Nota: Esto requiere implementación en cdp_controller.py
-        # Por ahora devolvemos lista vacía
-        self.logger.warning("⚠️  get_console_logs no implementado completamente")
-        return []
-    
+        """Obtiene los mensajes de consola capturados desde start_capture()"""
+        if self._collector is None:
+            self.logger.warning("⚠️  Captura no iniciada: llama a start_capture() antes de los steps")
+            return []
+        if self._collector.dropped:
+            self.logger.warning(f"⚠️  {self._collector.dropped} mensajes de consola descartados (buffer de {self.console_buffer})")
+        return self._collector.get_console_logs()
+
     def get_performance_metrics(self) -> Dict:
-        """Obtiene métricas de performance"""
+        """Obtiene web vitals (lcp, cls, fcp, ttfb) de los eventos capturados,
+        completando con la Performance API de la página los que falten"""
         self.logger.info("📊 Obteniendo métricas de performance")
-        page_id = self._get_page_id()
-        
-        # Usar comando performance del CDP Controller
-        result = self._run_cdp_command("performance", page_id)
-        
-        if not result["success"]:
-            self.logger.warning("⚠️  No se pudieron obtener métricas de performance")
-            return {}
-        
-        # Parsear output (esto es simplificado, necesitaría parsear mejor)
-        metrics = {}
-        output = result["output"]
-        
-        # Buscar líneas con métricas
-        for line in output.split('\n'):
-            if 'LCP' in line and ':' in line:
-                try:
-                    value = float(line.split(':')[1].strip().replace('ms', ''))
-                    metrics['lcp'] = value
-                except:
-                    pass
-            elif 'CLS' in line and ':' in line:
-                try:
-                    value = float(line.split(':')[1].strip())
-                    metrics['cls'] = value
-                except:
-                    pass
-            elif 'FCP' in line and ':' in line:
-                try:
-                    value = float(line.split(':')[1].strip().replace('ms', ''))
-                    metrics['fcp'] = value
-                except:
-                    pass
-        
+        metrics = self._collector.get_metrics() if self._collector is not None else {}
+
+        if not all(name in metrics for name in ("lcp", "cls", "fcp", "ttfb")):
+            try:
+                snapshot = self.evaluate(PERFORMANCE_METRICS_JS) or {}
+            except Exception as e:
+                self.logger.warning(f"⚠️  No se pudieron obtener métricas de performance: {e}")
+                snapshot = {}
+            for name, value in snapshot.items():
+                if name not in metrics and isinstance(value, (int, float)):
+                    metrics[name] = float(value)
+
         return metrics
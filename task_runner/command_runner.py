@@ -0,0 +1,157 @@
+"""
+Command Runner - Ejecución concurrente de los comandos de tests unitarios
+
+Cada comando se lanza en su propio proceso con la salida (stdout y stderr
+intercalados) volcada directamente a un fichero de log, así la memoria no
+crece con la salida. Al terminar solo se lee la cola del log para el
+registro de ejecución y el prompt de reintento del agente.
+"""
+
+import os
+import time
+import signal
+import logging
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+
+def read_tail(path: Path, max_lines: int = 50, max_bytes: int = 8192) -> str:
+    """Últimas líneas de un fichero, leyendo como mucho max_bytes desde el final"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        data = f.read()
+
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    truncated = size > max_bytes or len(lines) > max_lines
+    if size > max_bytes and lines:
+        # La primera línea probablemente está cortada a la mitad
+        lines = lines[1:]
+    lines = lines[-max_lines:]
+    if truncated:
+        lines.insert(0, f"... (salida truncada, log completo en {path})")
+    return "\n".join(lines)
+
+
+def kill_process_tree(proc: subprocess.Popen):
+    """Termina el proceso y sus hijos (los comandos van con shell=True)"""
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        proc.kill()
+
+
+class CommandRunner:
+    """
+    Ejecuta comandos independientes con concurrencia acotada.
+
+    Config (sección validation.unit_tests):
+      max_parallel: comandos a la vez
+      command_timeout: segundos máximos por comando
+      total_timeout: segundos máximos para todos; lo que no empiece a tiempo no se ejecuta
+      tail_lines / tail_bytes: cola de la salida que se conserva en el resultado
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.max_parallel = max(1, config.get("max_parallel", 4))
+        self.command_timeout = config.get("command_timeout", 600)
+        self.total_timeout = config.get("total_timeout", 1800)
+        self.tail_lines = config.get("tail_lines", 50)
+        self.tail_bytes = config.get("tail_bytes", 8192)
+        self.logger = logging.getLogger("CommandRunner")
+
+    def run(self, commands: List[str], log_dir: Path, cwd: Optional[str] = None) -> Dict:
+        """
+        Ejecuta los comandos y devuelve {"success", "tests": [...]} en el orden recibido.
+
+        La salida completa de cada comando queda en log_dir/<n>.log.
+        """
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        deadline = time.monotonic() + self.total_timeout
+
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(commands)) or 1,
+                                thread_name_prefix="unit-tests") as pool:
+            futures = [
+                pool.submit(self._run_one, command, log_dir / f"{index:02d}.log", cwd, deadline)
+                for index, command in enumerate(commands, start=1)
+            ]
+            results = [future.result() for future in futures]
+
+        return {
+            "success": all(r["success"] for r in results),
+            "tests": results
+        }
+
+    def _run_one(self, command: str, log_path: Path, cwd: Optional[str], deadline: float) -> Dict:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.logger.warning(f"⏱️  Sin tiempo para: {command}")
+            return {
+                "command": command,
+                "success": False,
+                "timed_out": True,
+                "returncode": None,
+                "duration": 0.0,
+                "output": "No ejecutado: se agotó total_timeout",
+                "log_file": None
+            }
+
+        timeout = min(self.command_timeout, remaining)
+        self.logger.info(f"    $ {command}")
+        start = time.monotonic()
+        timed_out = False
+
+        try:
+            with open(log_path, "wb") as log_file:
+                popen_kwargs = {"start_new_session": True} if os.name != "nt" else {
+                    "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP
+                }
+                proc = subprocess.Popen(
+                    command,
+                    shell=True,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                    cwd=cwd or os.getcwd(),
+                    **popen_kwargs
+                )
+                try:
+                    returncode = proc.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    timed_out = True
+                    kill_process_tree(proc)
+                    returncode = proc.wait()
+        except Exception as e:
+            return {
+                "command": command,
+                "success": False,
+                "timed_out": False,
+                "returncode": None,
+                "duration": round(time.monotonic() - start, 3),
+                "output": str(e),
+                "log_file": str(log_path)
+            }
+
+        duration = round(time.monotonic() - start, 3)
+        output = read_tail(log_path, self.tail_lines, self.tail_bytes)
+        if timed_out:
+            self.logger.warning(f"⏱️  Timeout ({timeout:.0f}s): {command}")
+            output = f"{output}\n[timeout tras {timeout:.0f}s]".lstrip("\n")
+
+        return {
+            "command": command,
+            "success": returncode == 0 and not timed_out,
+            "timed_out": timed_out,
+            "returncode": returncode,
+            "duration": duration,
+            "output": output,
+            "log_file": str(log_path)
+        }
@@ -0,0 +1,149 @@
+"""
+Image Pipeline - Prepara screenshots antes de enviarlos a validación visual
+
+Recorta a la región de interés, reduce a una dimensión máxima y re-codifica
+(JPEG/WebP) a una calidad objetivo. La codificación base64 se hace por
+bloques desde disco, sin cargar el fichero completo en memoria.
+Pillow es opcional: sin él las imágenes se envían tal cual.
+"""
+
+import os
+import base64
+import logging
+import tempfile
+from typing import Dict, Iterator, Optional
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+OUTPUT_FORMATS = ("original", "png", "jpeg", "webp")
+
+FORMAT_MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Bloques múltiplos de 3 bytes: cada uno se codifica en base64 sin relleno intermedio
+B64_CHUNK_SIZE = 3 * 64 * 1024
+
+
+def sniff_mime_type(path: str) -> str:
+    """Tipo MIME según la firma del fichero (no la extensión)"""
+    with open(path, "rb") as f:
+        header = f.read(12)
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return "image/png"
+
+
+def base64_size(raw_size: int) -> int:
+    """Longitud del base64 de `raw_size` bytes, sin codificar"""
+    return 4 * ((raw_size + 2) // 3)
+
+
+def iter_base64(path: str, chunk_size: int = B64_CHUNK_SIZE) -> Iterator[str]:
+    """Codifica un fichero a base64 por bloques"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield base64.b64encode(chunk).decode("ascii")
+
+
+class PreparedImage:
+    """Imagen lista para enviar: ruta (original o temporal), tipo MIME y tamaño"""
+
+    def __init__(self, source: str, path: str, mime_type: str, temporary: bool = False):
+        self.source = source
+        self.path = path
+        self.mime_type = mime_type
+        self.temporary = temporary
+        self.size = os.path.getsize(path)
+
+    @property
+    def encoded_size(self) -> int:
+        return base64_size(self.size)
+
+    def data_url(self) -> str:
+        """data: URL construida por bloques desde disco"""
+        return f"data:{self.mime_type};base64," + "".join(iter_base64(self.path))
+
+    def cleanup(self):
+        if self.temporary and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ImagePreprocessor:
+    """
+    Etapa de preprocesado configurable (sección validation.visual.preprocess):
+      max_dimension: lado mayor máximo en píxeles (null = sin límite)
+      format: original | png | jpeg | webp
+      quality: calidad para jpeg/webp (1-95)
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.max_dimension = config.get("max_dimension")
+        self.format = config.get("format", "original")
+        self.quality = config.get("quality", 85)
+        self.logger = logging.getLogger("ImagePreprocessor")
+
+        if self.format not in OUTPUT_FORMATS:
+            raise ValueError(f"Formato desconocido '{self.format}'. Usa uno de {OUTPUT_FORMATS}")
+
+        self._warned = False
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.max_dimension and self.format == "original"
+
+    def process(self, path: str, region: Optional[Dict] = None) -> PreparedImage:
+        """Devuelve la imagen preparada; recorta a `region` {x, y, width, height} si se indica"""
+        if self.is_noop and not region:
+            return PreparedImage(path, path, sniff_mime_type(path))
+
+        if Image is None:
+            if not self._warned:
+                self.logger.warning("⚠️  Pillow no está instalado: screenshots sin reducir ni recortar (pip install pillow)")
+                self._warned = True
+            return PreparedImage(path, path, sniff_mime_type(path))
+
+        with Image.open(path) as image:
+            source_format = (image.format or "png").lower()
+            if region:
+                left, top = int(region.get("x", 0)), int(region.get("y", 0))
+                box = (left, top, left + int(region["width"]), top + int(region["height"]))
+                image = image.crop(box)
+
+            if self.max_dimension and max(image.size) > self.max_dimension:
+                image = image.copy()
+                image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+
+            output_format = self.format
+            if output_format == "original":
+                output_format = source_format if source_format in FORMAT_MIME_TYPES else "png"
+
+            save_kwargs = {}
+            if output_format == "jpeg":
+                # JPEG no admite transparencia
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                save_kwargs = {"quality": self.quality, "optimize": True}
+            elif output_format == "webp":
+                save_kwargs = {"quality": self.quality, "method": 4}
+            else:
+                save_kwargs = {"optimize": True}
+
+            fd, out_path = tempfile.mkstemp(prefix="visual-", suffix=f".{output_format}")
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, format=output_format.upper(), **save_kwargs)
+
+        prepared = PreparedImage(path, out_path, FORMAT_MIME_TYPES[output_format], temporary=True)
+        self.logger.debug(f"🖼️  {os.path.basename(path)}: {os.path.getsize(path)} → {prepared.size} bytes")
+        return prepared
@@ -3,27 +3,168 @@ import json
 import logging
 import uuid
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+
+from .tape import TapeWriter, TapeIndex
+from .tokenizer import Tokenizer, HeuristicTokenizer
 
 logger = logging.getLogger(__name__)
 
+
+class _MessageNode:
+    __slots__ = ("wrapper", "prev", "next", "order")
+
+    def __init__(self, wrapper: Optional[Dict[str, Any]], order: int):
+        self.wrapper = wrapper
+        self.prev = self
+        self.next = self
+        self.order = order
+
+
+class ActiveMessages:
+    """
+    Memoria activa ordenada: lista doblemente enlazada + índice visible_id → nodo.
+
+    Borrar k mensajes es O(k) y localizar un rango es O(1). Cada nodo guarda una
+    clave de orden creciente a lo largo de la lista (el resumen de un rango hereda
+    la del primer mensaje), así comparar posiciones no requiere recorrerla.
+    Se comporta como una lista de solo lectura (len, iteración, índices, slices).
+    """
+
+    def __init__(self):
+        self._head = _MessageNode(None, -1)
+        self._index: Dict[int, _MessageNode] = {}
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        node = self._head.next
+        while node is not self._head:
+            yield node.wrapper
+            node = node.next
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(self)[key]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("ActiveMessages index out of range")
+        for i, wrapper in enumerate(self):
+            if i == key:
+                return wrapper
+
+    def __contains__(self, visible_id) -> bool:
+        return visible_id in self._index
+
+    def __repr__(self) -> str:
+        return f"ActiveMessages({list(self)!r})"
+
+    def _link_before(self, node: _MessageNode, successor: _MessageNode):
+        node.prev = successor.prev
+        node.next = successor
+        successor.prev.next = node
+        successor.prev = node
+        self._index[node.wrapper["visible_id"]] = node
+
+    def _unlink(self, node: _MessageNode):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        del self._index[node.wrapper["visible_id"]]
+
+    def append(self, wrapper: Dict[str, Any]):
+        """Añade un mensaje al final."""
+        node = _MessageNode(wrapper, self._next_order)
+        self._next_order += 1
+        self._link_before(node, self._head)
+
+    def get(self, visible_id: int) -> Optional[Dict[str, Any]]:
+        node = self._index.get(visible_id)
+        return node.wrapper if node else None
+
+    def remove_ids(self, visible_ids) -> List[Dict[str, Any]]:
+        """Quita los mensajes indicados (los inexistentes se ignoran). Devuelve los quitados en orden."""
+        nodes = [self._index[v] for v in set(visible_ids) if v in self._index]
+        nodes.sort(key=lambda n: n.order)
+        for node in nodes:
+            self._unlink(node)
+        return [node.wrapper for node in nodes]
+
+    def is_range(self, start_id: int, end_id: int) -> bool:
+        """True si ambos IDs están activos y start_id no va después de end_id."""
+        start = self._index.get(start_id)
+        end = self._index.get(end_id)
+        return start is not None and end is not None and start.order <= end.order
+
+    def replace_range(self, start_id: int, end_id: int, wrapper: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Sustituye los mensajes de start_id a end_id (inclusive) por `wrapper`.
+        Devuelve los quitados."""
+        if not self.is_range(start_id, end_id):
+            raise ValueError(f"Rango inválido: {start_id}-{end_id}")
+        start = self._index[start_id]
+        end = self._index[end_id]
+
+        replacement = _MessageNode(wrapper, start.order)
+        successor = end.next
+        removed = []
+        node = start
+        while True:
+            removed.append(node.wrapper)
+            following = node.next
+            self._unlink(node)
+            if node is end:
+                break
+            node = following
+        self._link_before(replacement, successor)
+        return removed
+
+
 class MemoryManager:
     """
     Gestor de contexto (Working Memory) y Registro Inmutable (The Tape).
     Implementa la Arquitectura SMMA (Self-Managed Mnemonic Architecture) fase 1.
     """
-    def __init__(self, task_id: str, logs_dir: str = ".ai-tasks/logs", max_tokens: int = 100000, target_pressure: float = 0.5):
+    def __init__(
+        self,
+        task_id: str,
+        logs_dir: str = ".ai-tasks/logs",
+        max_tokens: int = 100000,
+        target_pressure: float = 0.5,
+        tape_durability: str = "none",
+        tape_buffer_records: int = 1,
+        tape_flush_interval: float = 1.0,
+        tokenizer: Optional[Tokenizer] = None
+    ):
         self.task_id = task_id
         self.logs_dir = logs_dir
         self.max_tokens = max_tokens
         # Recomendamos 25% - 50% según la indicación del usuario
         self.target_pressure = target_pressure 
+        # Backend de conteo de tokens (heurístico por defecto, BPE si se configura)
+        self.tokenizer = tokenizer or HeuristicTokenizer()
         
         # La memoria activa con metadatos: [{ "internal_id": str, "tokens": int, "role": str, "raw_msg": Any, "visible_id": int }]
-        self.messages: List[Dict[str, Any]] = []
+        self.messages = ActiveMessages()
+        
+        # Contabilidad incremental: get_metrics en O(1) sin recorrer self.messages
+        self._total_tokens = 0
+        self._tokens_by_role: Dict[str, int] = {}
         
         # Archivo append-only "The Tape"
         self.tape_path = os.path.join(self.logs_dir, f"tape_{self.task_id}.jsonl")
+        # Índice sidecar visible_id/internal_id → offset para recall_original
+        self._tape_index = TapeIndex(self.tape_path)
+        # Handle persistente con group commit. Por defecto (1 registro, sin fsync)
+        # cada registro queda visible en disco al momento, como antes.
+        self._tape = TapeWriter(
+            self.tape_path,
+            durability=tape_durability,
+            max_records=tape_buffer_records,
+            flush_interval=tape_flush_interval,
+            index=self._tape_index
+        )
         self._ensure_logs_dir()
 
         # Contador autoincremental para IDs de mensajes expuestos al LLM
@@ -34,29 +175,52 @@ class MemoryManager:
         os.makedirs(self.logs_dir, exist_ok=True)
         # Si no existe the tape, escribimos cabecera
         if not os.path.exists(self.tape_path):
-            with open(self.tape_path, "w", encoding="utf-8") as f:
-                f.write(json.dumps({
-                    "action": "INIT", 
-                    "timestamp": time.time(), 
-                    "task_id": self.task_id
-                }) + "\n")
+            self._tape.append({
+                "action": "INIT", 
+                "timestamp": time.time(), 
+                "task_id": self.task_id
+            })
+            self._tape.flush()
         
     def _estimate_tokens(self, text: str) -> int:
-        """Estimación aproximada de tokens (1 token ≈ 4 caracteres ingles/código, 3 en español).
-        Usaremos 3.5 como promedio conservador."""
-        if not text:
-            return 0
-        return max(1, int(len(text) / 3.5))
+        """Tokens de un texto según el tokenizer configurado."""
+        return self.tokenizer.count(text)
         
     def _calculate_message_tokens(self, msg_dict: Dict[str, Any]) -> int:
-        """Calcula tokens aprox de un mensaje serializado a dict."""
-        content_str = str(msg_dict.get("content", ""))
+        """Calcula tokens de un mensaje serializado a dict."""
+        content = msg_dict.get("content")
+        if isinstance(content, list):
+            # Contenido multimodal: solo cuentan las partes de texto
+            content_str = "".join(
+                part.get("text", "") for part in content if isinstance(part, dict)
+            )
+        else:
+            content_str = "" if content is None else str(content)
         
-        if "tool_calls" in msg_dict and msg_dict["tool_calls"]:
-            content_str += str(msg_dict["tool_calls"])
+        # De los tool_calls solo cuentan nombre y argumentos, no el repr del objeto del SDK
+        for tool_call in msg_dict.get("tool_calls") or []:
+            function = tool_call.get("function", {}) if isinstance(tool_call, dict) else getattr(tool_call, "function", None)
+            if isinstance(function, dict):
+                content_str += function.get("name", "") + function.get("arguments", "")
+            elif function is not None:
+                content_str += (getattr(function, "name", "") or "") + (getattr(function, "arguments", "") or "")
             
         return self._estimate_tokens(content_str)
         
+    def _track_added(self, wrapper: Dict[str, Any]):
+        """Suma un mensaje a los totales de tokens."""
+        self._total_tokens += wrapper["tokens"]
+        role = wrapper["role"]
+        self._tokens_by_role[role] = self._tokens_by_role.get(role, 0) + wrapper["tokens"]
+
+    def _track_removed(self, wrapper: Dict[str, Any]):
+        """Resta un mensaje de los totales de tokens."""
+        self._total_tokens -= wrapper["tokens"]
+        role = wrapper["role"]
+        self._tokens_by_role[role] -= wrapper["tokens"]
+        if not self._tokens_by_role[role]:
+            del self._tokens_by_role[role]
+
     def _append_to_tape(self, msg_dict: Dict[str, Any], msg_internal_id: str, visible_id: int):
         """Escribe de forma inmutable a La Cinta (registro persistente)."""
         try:
@@ -67,11 +231,18 @@ class MemoryManager:
                 "action": "ADD_MESSAGE",
                 "message": msg_dict
             }
-            with open(self.tape_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(tape_record) + "\n")
+            self._tape.append(tape_record)
         except Exception as e:
             logger.error(f"Error escribiendo en The Tape: {e}")
 
+    def flush_tape(self):
+        """Fuerza el volcado de los registros en buffer de The Tape."""
+        self._tape.flush()
+
+    def close_tape(self):
+        """Vuelca The Tape y libera su handle (se reabre si se vuelve a escribir)."""
+        self._tape.close()
+
     def add_message(self, msg: Any) -> int:
         """Añade un mensaje a la memoria de trabajo y a La Cinta. Devuelve el ID visible para el LLM."""
         is_obj = hasattr(msg, "role")
@@ -107,6 +278,7 @@ class MemoryManager:
         }
         
         self.messages.append(wrapper)
+        self._track_added(wrapper)
         self._append_to_tape(msg_dict, msg_internal_id, visible_id)
         
         return visible_id
@@ -129,7 +301,7 @@ class MemoryManager:
         
     def get_metrics(self) -> Dict[str, Any]:
         """Calcula The Memory Pressure ($P_m$) y otros datos de la memoria."""
-        total_tokens = sum(m["tokens"] for m in self.messages)
+        total_tokens = self._total_tokens
         pressure = (total_tokens / self.max_tokens) * 100 if self.max_tokens > 0 else 0
         
         return {
@@ -138,44 +310,32 @@ class MemoryManager:
             "pressure_percent": round(pressure, 2),
             "target_pressure": round(self.target_pressure * 100, 2),
             "message_count": len(self.messages),
+            "tokens_by_role": dict(self._tokens_by_role),
             "is_critical": pressure > (self.target_pressure * 100 * 1.5) # Si excede 50% extra de su target ideal
         }
         
     def prune_messages(self, visible_ids_to_remove: List[int]) -> int:
         """Herramienta SMMA: Elimina mensajes del contexto activo."""
-        initial_len = len(self.messages)
-        
-        # Filtramos
-        removed_msgs = [m for m in self.messages if m["visible_id"] in visible_ids_to_remove]
-        self.messages = [m for m in self.messages if m["visible_id"] not in visible_ids_to_remove]
+        # O(k) en el número de IDs gracias al índice visible_id → nodo
+        removed_msgs = self.messages.remove_ids(visible_ids_to_remove)
         
         # Registrar mutación en The Tape
         for rm in removed_msgs:
+            self._track_removed(rm)
             tape_record = {"internal_id": rm["internal_id"], "visible_id": rm["visible_id"], "timestamp": time.time(), "action": "PRUNE"}
             try:
-                with open(self.tape_path, "a", encoding="utf-8") as f:
-                    f.write(json.dumps(tape_record) + "\n")
+                self._tape.append(tape_record)
             except Exception:
                 pass
                 
-        return initial_len - len(self.messages)
+        return len(removed_msgs)
 
     def summarize_range(self, start_id: int, end_id: int, summary_text: str) -> Dict[str, Any]:
         """Herramienta SMMA: Comprime una seccion de historia en un solo mensaje."""
-        # Encontramos los index en el array
-        start_idx = -1
-        end_idx = -1
-        
-        for i, m in enumerate(self.messages):
-            if m["visible_id"] == start_id: start_idx = i
-            if m["visible_id"] == end_id: end_idx = i
+        # Validación O(1) con el índice visible_id → nodo
+        if not self.messages.is_range(start_id, end_id):
+            return {"success": False, "error": f"Invalid IDs. start_id={start_id}, end_id={end_id}"}
             
-        if start_idx == -1 or end_idx == -1 or start_idx > end_idx:
-            return {"success": False, "error": f"Invalid IDs. start_idx={start_idx}, end_idx={end_idx}"}
-            
-        # Extraer los borrados
-        removed = self.messages[start_idx:end_idx+1]
-        
         # Crear mensaje reemplazo como diccionario (raw_msg será diccionario, 
         # lo cual es soportado por los clientes de OpenAI al menos para roles estándares)
         visible_id = self._next_id
@@ -193,16 +353,18 @@ class MemoryManager:
             "raw_msg": summary_raw_dict
         }
         
-        # Splicing array
-        self.messages[start_idx:end_idx+1] = [replacement]
+        # Sustituir el rango por el resumen (O(1) para localizarlo)
+        removed = self.messages.replace_range(start_id, end_id, replacement)
+        for rm in removed:
+            self._track_removed(rm)
+        self._track_added(replacement)
         
         # Log Tape
         self._append_to_tape(summary_raw_dict, internal_id, visible_id)
         for rm in removed:
             tape_record = {"internal_id": rm["internal_id"], "visible_id": rm["visible_id"], "timestamp": time.time(), "action": "SUMMARIZED_OUT"}
             try:
-                with open(self.tape_path, "a", encoding="utf-8") as f:
-                    f.write(json.dumps(tape_record) + "\n")
+                self._tape.append(tape_record)
             except: pass
             
         return {"success": True, "removed_count": len(removed), "new_summary_id": visible_id}
@@ -213,28 +375,22 @@ class MemoryManager:
         Útil cuando la IA ha resumido o borrado algo pero necesita verificar detalles exactos.
         """
         try:
+            # Lo que siga en buffer también debe poder recuperarse
+            self._tape.flush()
+            
             if not os.path.exists(self.tape_path):
                 return {"success": False, "error": "The Tape no existe"}
             
-            # Buscar en el archivo JSONL
-            with open(self.tape_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        record = json.loads(line)
-                        # Buscar por visible_id en mensajes añadidos
-                        if record.get("visible_id") == visible_id and record.get("action") == "ADD_MESSAGE":
-                            return {
-                                "success": True,
-                                "visible_id": visible_id,
-                                "internal_id": record.get("internal_id"),
-                                "timestamp": record.get("timestamp"),
-                                "message": record.get("message")
-                            }
-                    except json.JSONDecodeError:
-                        continue
+            # Un seek + un decode gracias al índice de offsets
+            record = self._tape_index.lookup(visible_id=visible_id)
+            if record:
+                return {
+                    "success": True,
+                    "visible_id": visible_id,
+                    "internal_id": record.get("internal_id"),
+                    "timestamp": record.get("timestamp"),
+                    "message": record.get("message")
+                }
             
             return {"success": False, "error": f"No se encontró mensaje con visible_id={visible_id} en The Tape"}
             
@@ -0,0 +1,203 @@
+"""
+Page Events - Captura en streaming de consola y métricas de rendimiento
+
+El colector se suscribe a los eventos CDP de una página mientras se ejecutan
+los steps E2E:
+  - Runtime.consoleAPICalled, Runtime.exceptionThrown y Log.entryAdded → consola
+  - PerformanceTimeline (LCP, layout shifts), Page.lifecycleEvent (FCP) y
+    Network.* del documento principal (TTFB) → web vitals
+  - Performance.metrics → métricas de runtime de Chrome
+Los mensajes de consola se guardan en un buffer circular acotado.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .cdp_client import CDPClient
+
+# Tipos de consoleAPICalled normalizados a niveles
+CONSOLE_LEVELS = {
+    "error": "error",
+    "assert": "error",
+    "warning": "warning",
+    "warn": "warning",
+    "info": "info",
+    "debug": "debug",
+    "verbose": "debug",
+}
+
+TIMELINE_EVENT_TYPES = ["largest-contentful-paint", "layout-shift"]
+
+
+def _remote_object_text(arg: Dict[str, Any]) -> str:
+    """Texto legible de un RemoteObject de Runtime"""
+    if "value" in arg:
+        return str(arg["value"])
+    return arg.get("description") or arg.get("unserializableValue") or arg.get("type", "")
+
+
+class PageEventCollector:
+    """Acumula consola y web vitals de una página a partir de eventos CDP"""
+
+    def __init__(self, client: CDPClient, main_frame_id: Optional[str] = None, max_entries: int = 1000):
+        self.client = client
+        self.main_frame_id = main_frame_id
+        self.max_entries = max_entries
+
+        self._console: deque = deque(maxlen=max_entries)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+        self._navigation: Optional[Dict[str, Any]] = None
+        self._vitals: Dict[str, float] = {}
+        self._cls = 0.0
+        self.runtime_metrics: Dict[str, float] = {}
+
+        self._handlers = {
+            "Runtime.consoleAPICalled": self._on_console,
+            "Runtime.exceptionThrown": self._on_exception,
+            "Log.entryAdded": self._on_log_entry,
+            "Network.requestWillBeSent": self._on_request,
+            "Network.responseReceived": self._on_response,
+            "Page.lifecycleEvent": self._on_lifecycle,
+            "PerformanceTimeline.timelineEventAdded": self._on_timeline,
+            "Performance.metrics": self._on_runtime_metrics,
+        }
+        self._started = False
+
+    async def start(self):
+        """Registra los listeners y habilita los dominios necesarios"""
+        if not self._started:
+            for method, handler in self._handlers.items():
+                self.client.on(method, handler)
+            self._started = True
+
+        for domain in ("Runtime", "Log", "Page", "Network", "Performance"):
+            await self.client.enable(domain)
+        await self.client.send("Page.setLifecycleEventsEnabled", {"enabled": True})
+        try:
+            await self.client.send("PerformanceTimeline.enable", {"eventTypes": TIMELINE_EVENT_TYPES})
+        except Exception:
+            # Chrome antiguo sin PerformanceTimeline: LCP/CLS se leerán por JavaScript
+            pass
+
+    def stop(self):
+        """Deja de escuchar eventos (los datos acumulados se conservan)"""
+        if self._started:
+            for method, handler in self._handlers.items():
+                self.client.off(method, handler)
+            self._started = False
+
+    def reset(self):
+        """Descarta consola, contador de descartes y métricas acumulados (pestaña reutilizada)"""
+        with self._lock:
+            self._console.clear()
+            self.dropped = 0
+        self._navigation = None
+        self._vitals = {}
+        self._cls = 0.0
+        self.runtime_metrics = {}
+
+    def _is_main_frame(self, frame_id: Optional[str]) -> bool:
+        return self.main_frame_id is None or frame_id is None or frame_id == self.main_frame_id
+
+    # --- Consola ---
+
+    def _add_entry(self, entry: Dict[str, Any]):
+        with self._lock:
+            if len(self._console) == self.max_entries:
+                self.dropped += 1
+            self._console.append(entry)
+
+    def _on_console(self, params: Dict[str, Any]):
+        self._add_entry({
+            "level": CONSOLE_LEVELS.get(params.get("type"), "log"),
+            "text": " ".join(_remote_object_text(arg) for arg in params.get("args", [])),
+            "source": "console",
+            "timestamp": params.get("timestamp"),
+        })
+
+    def _on_exception(self, params: Dict[str, Any]):
+        details = params.get("exceptionDetails", {})
+        text = details.get("exception", {}).get("description") or details.get("text", "")
+        self._add_entry({
+            "level": "error",
+            "text": text,
+            "source": "exception",
+            "url": details.get("url"),
+            "timestamp": params.get("timestamp"),
+        })
+
+    def _on_log_entry(self, params: Dict[str, Any]):
+        entry = params.get("entry", {})
+        self._add_entry({
+            "level": CONSOLE_LEVELS.get(entry.get("level"), "log"),
+            "text": entry.get("text", ""),
+            "source": entry.get("source", "log"),
+            "url": entry.get("url"),
+            "timestamp": entry.get("timestamp"),
+        })
+
+    def get_console_logs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._console)
+
+    # --- Web vitals ---
+
+    def _on_request(self, params: Dict[str, Any]):
+        # La petición de navegación del documento principal tiene requestId == loaderId
+        if (params.get("type") == "Document" and params.get("requestId") == params.get("loaderId")
+                and self._is_main_frame(params.get("frameId"))):
+            self._navigation = {
+                "request_id": params["requestId"],
+                "timestamp": params.get("timestamp"),
+                "wall_time": params.get("wallTime"),
+            }
+            self._vitals = {}
+            self._cls = 0.0
+
+    def _on_response(self, params: Dict[str, Any]):
+        navigation = self._navigation
+        if not navigation or params.get("requestId") != navigation["request_id"]:
+            return
+        timing = params.get("response", {}).get("timing")
+        if not timing or navigation["timestamp"] is None:
+            return
+        headers = timing.get("receiveHeadersStart", timing.get("receiveHeadersEnd"))
+        if headers is None or headers < 0:
+            return
+        self._vitals["ttfb"] = round((timing["requestTime"] - navigation["timestamp"]) * 1000 + headers, 2)
+
+    def _on_lifecycle(self, params: Dict[str, Any]):
+        navigation = self._navigation
+        if (params.get("name") == "firstContentfulPaint" and navigation
+                and navigation["timestamp"] is not None and self._is_main_frame(params.get("frameId"))):
+            self._vitals["fcp"] = round((params["timestamp"] - navigation["timestamp"]) * 1000, 2)
+
+    def _on_timeline(self, params: Dict[str, Any]):
+        event = params.get("event", {})
+        if not self._is_main_frame(event.get("frameId")):
+            return
+
+        if event.get("type") == "layout-shift":
+            details = event.get("layoutShiftDetails", {})
+            if not details.get("hadRecentInput"):
+                self._cls += details.get("value", 0)
+                self._vitals["cls"] = round(self._cls, 4)
+
+        elif event.get("type") == "largest-contentful-paint":
+            navigation = self._navigation
+            details = event.get("lcpDetails", {})
+            paint_time = details.get("renderTime") or details.get("loadTime")
+            if paint_time and navigation and navigation["wall_time"]:
+                # El último candidato LCP es el definitivo
+                self._vitals["lcp"] = round((paint_time - navigation["wall_time"]) * 1000, 2)
+
+    def _on_runtime_metrics(self, params: Dict[str, Any]):
+        for metric in params.get("metrics", []):
+            self.runtime_metrics[metric["name"]] = metric["value"]
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Web vitals observados desde la última navegación (lcp, cls, fcp, ttfb en ms salvo cls)"""
+        return dict(self._vitals)
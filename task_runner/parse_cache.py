@@ -0,0 +1,99 @@
+"""
+Parse Cache - Caché en disco de ficheros ya parseados
+
+Guarda, por ruta, el resultado serializable (JSON) del parseo junto con el
+mtime (ns) y el tamaño del fichero. Mientras ambos coincidan con el stat
+actual se reutiliza la entrada y el fichero no se vuelve a leer.
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+PARSE_CACHE_VERSION = 1
+
+# Ficheros modificados hace menos de esto no se cachean: con sistemas de
+# ficheros de resolución gruesa (FAT: 2s) una edición posterior podría
+# conservar el mismo mtime y tamaño
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class ParseCache:
+    """Resultados de parseo por (ruta, mtime, tamaño), persistidos en un JSON"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.logger = logging.getLogger("ParseCache")
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️  Caché de parseo ilegible, se descarta: {e}")
+            return
+        if data.get("version") == PARSE_CACHE_VERSION:
+            self._entries = data.get("entries", {})
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return str(Path(file_path).absolute())
+
+    def get(self, file_path: Path, stat: os.stat_result) -> Optional[Any]:
+        """Resultado cacheado si el fichero no ha cambiado, o None"""
+        entry = self._entries.get(self._key(file_path))
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.hits += 1
+            return entry["data"]
+        self.misses += 1
+        return None
+
+    def put(self, file_path: Path, stat: os.stat_result, data: Any):
+        """Guarda el resultado de parsear el fichero con el stat leído antes de parsearlo"""
+        key = self._key(file_path)
+        if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            self._dirty |= self._entries.pop(key, None) is not None
+            return
+        try:
+            # Solo se cachean resultados que sobreviven a JSON tal cual
+            json.dumps(data)
+        except (TypeError, ValueError):
+            return
+        self._entries[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "data": data}
+        self._dirty = True
+
+    def prune(self, seen: Iterable[Path]):
+        """Elimina las entradas de ficheros que ya no existen en el directorio"""
+        keep = {self._key(p) for p in seen}
+        stale = [key for key in self._entries if key not in keep]
+        for key in stale:
+            del self._entries[key]
+        self._dirty |= bool(stale)
+
+    def save(self):
+        """Escribe la caché de forma atómica si ha cambiado"""
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(
+                json.dumps({"version": PARSE_CACHE_VERSION, "entries": self._entries}, ensure_ascii=False),
+                encoding="utf-8"
+            )
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            self.logger.warning(f"⚠️  No se pudo guardar la caché de parseo: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
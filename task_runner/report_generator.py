@@ -5,7 +5,7 @@ Report Generator - Genera reportes de ejecución
 import json
 import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 
 
@@ -21,17 +21,21 @@ class ReportGenerator:
         self,
         tasks: List,
         execution_log: List[Dict],
-        format: str = "all"
+        format: str = "all",
+        metrics: Optional[Dict] = None
     ) -> Dict:
         """
         Genera reportes en múltiples formatos
+
+        Args:
+            metrics: métricas de la ejecución (p. ej. {"visual_cache": {...}, "trace": {...}})
         """
         self.logger.info("Generando reportes...")
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         generated = {}
         
-        report_data = self._prepare_data(tasks, execution_log)
+        report_data = self._prepare_data(tasks, execution_log, metrics)
         
         if format in ["json", "all"]:
             json_path = self._generate_json(report_data, timestamp)
@@ -49,7 +53,7 @@ class ReportGenerator:
         
         return generated
     
-    def _prepare_data(self, tasks: List, execution_log: List[Dict]) -> Dict:
+    def _prepare_data(self, tasks: List, execution_log: List[Dict], metrics: Optional[Dict] = None) -> Dict:
         total = len(tasks)
         completed = len([t for t in tasks if t.status == "completed"])
         failed = len([t for t in tasks if t.status == "failed"])
@@ -89,6 +93,7 @@ class ReportGenerator:
                 }
                 for t in tasks
             ],
+            "metrics": metrics or {},
             "execution_log": execution_log
         }
     
@@ -188,6 +193,7 @@ class ReportGenerator:
             <h3>Success Rate</h3>
             <div class="value">{data['summary']['success_rate']:.1f}%</div>
         </div>
+        {self._visual_cache_card(data['metrics'].get('visual_cache'))}
     </div>
     
     <table>
@@ -218,6 +224,9 @@ class ReportGenerator:
         html_content += """
         </tbody>
     </table>
+"""
+        html_content += self._stage_timings_html(data['metrics'].get('trace'))
+        html_content += """
 </body>
 </html>
 """
@@ -225,6 +234,49 @@ class ReportGenerator:
         path.write_text(html_content, encoding="utf-8")
         return path
     
+    @staticmethod
+    def _visual_cache_card(cache: Optional[Dict]) -> str:
+        if not cache:
+            return ""
+        return f"""<div class="stat-card">
+            <h3>Visual Cache Hit Rate</h3>
+            <div class="value">{cache['hit_rate'] * 100:.1f}%</div>
+            <small>{cache['hits']} hits / {cache['misses']} misses</small>
+        </div>"""
+    
+    @staticmethod
+    def _stage_timings_html(trace: Optional[Dict]) -> str:
+        if not trace or not trace.get("stages"):
+            return ""
+        rows = "".join(f"""
+            <tr>
+                <td>{stage['cat']}</td>
+                <td>{stage['name']}</td>
+                <td>{stage['count']}</td>
+                <td>{stage['total_ms']:.1f}</td>
+                <td>{stage['mean_ms']:.1f}</td>
+                <td>{stage['max_ms']:.1f}</td>
+            </tr>""" for stage in trace["stages"])
+        trace_file = f"<p>Trace: <code>{trace['file']}</code></p>" if trace.get("file") else ""
+        return f"""
+    <h2>Stage Timings</h2>
+    {trace_file}
+    <table>
+        <thead>
+            <tr>
+                <th>Category</th>
+                <th>Name</th>
+                <th>Count</th>
+                <th>Total (ms)</th>
+                <th>Mean (ms)</th>
+                <th>Max (ms)</th>
+            </tr>
+        </thead>
+        <tbody>{rows}
+        </tbody>
+    </table>
+"""
+    
     def _generate_markdown(self, data: Dict, timestamp: str) -> Path:
         path = self.reports_dir / f"report_{timestamp}.md"
         
@@ -241,10 +293,38 @@ class ReportGenerator:
             f"- Pending: {data['summary']['pending']}",
             f"- Success Rate: {data['summary']['success_rate']:.1f}%",
             "",
-            "## Tasks",
-            "",
         ]
         
+        cache = data['metrics'].get('visual_cache')
+        if cache:
+            lines.extend([
+                "## Visual Validation Cache",
+                "",
+                f"- Hit Rate: {cache['hit_rate'] * 100:.1f}%",
+                f"- Hits: {cache['hits']} ({cache['perceptual_hits']} perceptual)",
+                f"- Misses: {cache['misses']}",
+                f"- Entries: {cache['entries']}",
+                "",
+            ])
+        
+        trace = data['metrics'].get('trace')
+        if trace and trace.get("stages"):
+            lines.extend(["## Stage Timings", ""])
+            if trace.get("file"):
+                lines.extend([f"Trace: `{trace['file']}`", ""])
+            lines.extend([
+                "| Category | Name | Count | Total (ms) | Mean (ms) | Max (ms) |",
+                "|---|---|---|---|---|---|",
+            ])
+            for stage in trace["stages"]:
+                lines.append(
+                    f"| {stage['cat']} | {stage['name']} | {stage['count']} | "
+                    f"{stage['total_ms']:.1f} | {stage['mean_ms']:.1f} | {stage['max_ms']:.1f} |"
+                )
+            lines.append("")
+        
+        lines.extend(["## Tasks", ""])
+        
         for task in data['tasks']:
             lines.extend([
                 f"### {task['id']}: {task['title']}",
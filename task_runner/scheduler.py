@@ -0,0 +1,201 @@
+"""
+Scheduler - Grafo de dependencias indexado para planificar tareas
+"""
+
+import logging
+from typing import List, Dict, Optional
+
+from .task_parser import Task
+
+
+class DependencyGraph:
+    """
+    DAG de tareas con índice id→Task, contadores de grado de entrada y cola de listas.
+
+    Cada tarea lleva la cuenta de sus dependencias aún no completadas. Cuando una
+    tarea termina se decrementa el contador de sus dependientes (O(grado)), y las
+    que llegan a cero pasan a la cola de listas. Las dependencias inexistentes o
+    los ciclos nunca llegan a cero, por lo que esas tareas quedan bloqueadas.
+    """
+
+    def __init__(self, tasks: List[Task]):
+        self.logger = logging.getLogger("Scheduler")
+        self.tasks_by_id: Dict[str, Task] = {}
+        # dependents incluye ids aún inexistentes: si la tarea aparece después
+        # (modo watch), sus dependientes ya están enlazados
+        self.dependents: Dict[str, List[str]] = {}
+        self.requires: Dict[str, List[str]] = {}
+        self.in_degree: Dict[str, int] = {}
+        # Dict como conjunto ordenado: inserción/borrado O(1) conservando el orden
+        self._ready: Dict[str, None] = {}
+        self._released: set = set()
+
+        for task in tasks:
+            if task.id in self.tasks_by_id:
+                self.logger.warning(f"⚠️  ID de tarea duplicado: {task.id} (se usa la primera definición)")
+                continue
+            self.tasks_by_id[task.id] = task
+            self.dependents.setdefault(task.id, [])
+            if task.status == "completed":
+                # Sus dependientes ya la cuentan como satisfecha
+                self._released.add(task.id)
+
+        for task in self.tasks_by_id.values():
+            self._link(task)
+
+    def _link(self, task: Task):
+        """Enlaza una tarea con sus dependencias y la encola si ya está lista"""
+        self.requires[task.id] = list(dict.fromkeys(task.dependencies))
+        for dep in self.requires[task.id]:
+            self.dependents.setdefault(dep, []).append(task.id)
+        self.in_degree[task.id] = sum(1 for dep in self.requires[task.id] if dep not in self._released)
+
+        if self.in_degree[task.id] == 0 and task.status == "pending":
+            self._ready[task.id] = None
+
+    def _unlink(self, task_id: str):
+        """Deshace _link (la tarea sale de la cola y de los dependientes de sus dependencias)"""
+        self._ready.pop(task_id, None)
+        for dep in self.requires.pop(task_id, []):
+            self.dependents[dep].remove(task_id)
+        self.in_degree.pop(task_id, None)
+
+    def _set_released(self, task_id: str, released: bool):
+        """Marca una tarea como satisfecha (o deja de estarlo) para sus dependientes"""
+        if released == (task_id in self._released):
+            return
+        if released:
+            self._released.add(task_id)
+        else:
+            self._released.discard(task_id)
+        for dependent_id in self.dependents.get(task_id, []):
+            self.in_degree[dependent_id] += -1 if released else 1
+            if released and self.in_degree[dependent_id] == 0 and self.tasks_by_id[dependent_id].status == "pending":
+                self._ready[dependent_id] = None
+            elif not released:
+                self._ready.pop(dependent_id, None)
+
+    def upsert(self, task: Task):
+        """
+        Añade una tarea nueva o re-enlaza una existente tras cambiar su definición.
+
+        Pensado para el modo watch: la tarea (ya en su estado final) sustituye a
+        la anterior con el mismo id; se recalculan sus dependencias y, si cambió
+        su status a o desde completed, también sus dependientes.
+        """
+        if task.id in self.tasks_by_id:
+            self._unlink(task.id)
+        self.tasks_by_id[task.id] = task
+        self.dependents.setdefault(task.id, [])
+        self._link(task)
+        self._set_released(task.id, task.status == "completed")
+
+    def remove(self, task_id: str):
+        """Quita una tarea del grafo; sus dependientes quedan bloqueados como con una dependencia inexistente"""
+        if task_id not in self.tasks_by_id:
+            return
+        self._unlink(task_id)
+        self._set_released(task_id, False)
+        del self.tasks_by_id[task_id]
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """Obtiene una tarea por ID en O(1)"""
+        return self.tasks_by_id.get(task_id)
+
+    def get_ready(self) -> List[Task]:
+        """Devuelve las tareas listas para ejecutar, en orden de llegada a la cola"""
+        return [
+            self.tasks_by_id[task_id] for task_id in self._ready
+            if self.tasks_by_id[task_id].status == "pending"
+        ]
+
+    def has_ready(self) -> bool:
+        """Indica si queda alguna tarea en la cola de listas"""
+        return bool(self._ready)
+
+    def pop_ready(self) -> Optional[Task]:
+        """Extrae la siguiente tarea lista de la cola (None si no hay)"""
+        while self._ready:
+            task_id = next(iter(self._ready))
+            del self._ready[task_id]
+            task = self.tasks_by_id[task_id]
+            # Las tareas que cambiaron de estado fuera del scheduler se descartan
+            if task.status == "pending":
+                return task
+        return None
+
+    def requeue(self, task: Task):
+        """Devuelve a la cola una tarea que vuelve a estar pendiente"""
+        if task.id in self.tasks_by_id and self.in_degree[task.id] == 0 and task.status == "pending":
+            self._ready[task.id] = None
+
+    def mark_finished(self, task: Task) -> List[Task]:
+        """
+        Registra el final de una tarea y actualiza a sus dependientes.
+
+        Si la tarea se completó, decrementa el grado de entrada de cada dependiente
+        y encola los que quedan sin dependencias pendientes. Si falló, sus
+        dependientes quedan bloqueados. Devuelve las tareas recién desbloqueadas.
+        """
+        self._ready.pop(task.id, None)
+        if task.status != "completed" or task.id in self._released:
+            return []
+        queued = set(self._ready)
+        self._set_released(task.id, True)
+        return [self.tasks_by_id[task_id] for task_id in self._ready if task_id not in queued]
+
+    def missing_dependencies(self) -> Dict[str, List[str]]:
+        """Devuelve {task_id: [deps inexistentes]} para las tareas con dependencias rotas"""
+        missing = {}
+        for task in self.tasks_by_id.values():
+            unknown = [dep for dep in dict.fromkeys(task.dependencies) if dep not in self.tasks_by_id]
+            if unknown:
+                missing[task.id] = unknown
+        return missing
+
+    def find_cycles(self) -> List[List[str]]:
+        """Detecta ciclos de dependencias con un DFS iterativo (blanco/gris/negro)"""
+        WHITE, GRAY, BLACK = 0, 1, 2
+        color = {task_id: WHITE for task_id in self.tasks_by_id}
+        cycles = []
+
+        for root in self.tasks_by_id:
+            if color[root] != WHITE:
+                continue
+
+            path = [root]
+            stack = [iter(self.tasks_by_id[root].dependencies)]
+            color[root] = GRAY
+
+            while stack:
+                dep = next(stack[-1], None)
+                if dep is None:
+                    color[path.pop()] = BLACK
+                    stack.pop()
+                    continue
+                if dep not in color:
+                    continue
+                if color[dep] == GRAY:
+                    cycles.append(path[path.index(dep):] + [dep])
+                elif color[dep] == WHITE:
+                    color[dep] = GRAY
+                    path.append(dep)
+                    stack.append(iter(self.tasks_by_id[dep].dependencies))
+
+        return cycles
+
+    def validate(self) -> Dict[str, object]:
+        """Valida el grafo y registra avisos sobre dependencias rotas o ciclos"""
+        missing = self.missing_dependencies()
+        cycles = self.find_cycles()
+
+        for task_id, deps in missing.items():
+            self.logger.warning(f"⚠️  {task_id} depende de tareas inexistentes: {deps}")
+        for cycle in cycles:
+            self.logger.warning(f"⚠️  Ciclo de dependencias: {' → '.join(cycle)}")
+
+        return {
+            "valid": not missing and not cycles,
+            "missing": missing,
+            "cycles": cycles
+        }
@@ -0,0 +1,202 @@
+"""
+State Store - Estado de ejecución de las tareas en SQLite (modo WAL)
+
+Cada transición (in_progress, completed, failed...) es un UPSERT de una fila
+en una transacción, en lugar de reescribir el frontmatter del markdown y el
+task-status.json completo. El frontmatter se sincroniza después, en bloque
+(al terminar un run o con `sync`).
+
+Para no pisar ediciones manuales, cada fila recuerda el último status que se
+escribió en (o se leyó de) el frontmatter: si el archivo dice otra cosa, la
+edición del usuario gana sobre el estado guardado.
+"""
+
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_state (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT,
+    completed_at TEXT,
+    error_message TEXT,
+    synced_status TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_index (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    title TEXT,
+    status TEXT,
+    priority TEXT,
+    dependencies TEXT
+)
+"""
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _parse_iso(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def state_db_path(config: Dict) -> Path:
+    """Ruta de la base de datos: files.state_db o task-state.db junto al task-status.json"""
+    files = config.get("files", {})
+    return Path(files.get("state_db") or Path(files.get("status", "./task-status.json")).with_name("task-state.db"))
+
+
+class StateStore:
+    """Estado por tarea con actualizaciones transaccionales O(1)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.logger = logging.getLogger("StateStore")
+
+        # Una conexión compartida por los workers; SQLite serializa las escrituras
+        # entre procesos y el lock las serializa entre hilos
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self, create: bool = True) -> Optional[sqlite3.Connection]:
+        """Abre la base de datos la primera vez; sin create no la crea si no existe"""
+        if self._conn is None:
+            if not create and not self.path.exists():
+                return None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            conn = self._connect(create=False)
+            return conn.execute(sql, params).fetchall() if conn else []
+
+    def record(self, task, file_status: Optional[str] = None):
+        """
+        Guarda el estado actual de una tarea (una fila, una transacción).
+
+        file_status es el status que tenía el frontmatter al cargar la tarea;
+        solo se usa al crear la fila, como punto de partida de la sincronización.
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO task_state (id, status, retry_count, started_at, completed_at, error_message,
+                                        synced_status, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    status = excluded.status,
+                    retry_count = excluded.retry_count,
+                    started_at = excluded.started_at,
+                    completed_at = excluded.completed_at,
+                    error_message = excluded.error_message,
+                    updated_at = excluded.updated_at
+                """,
+                (task.id, task.status, task.retry_count, _iso(task.started_at), _iso(task.completed_at),
+                 task.error_message, file_status, datetime.now().isoformat())
+            )
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT * FROM task_state WHERE id = ?", (task_id,))
+        return dict(rows[0]) if rows else None
+
+    def all(self) -> Dict[str, Dict]:
+        return {row["id"]: dict(row) for row in self._query("SELECT * FROM task_state")}
+
+    @staticmethod
+    def is_manual_edit(file_status: Optional[str], row: Dict) -> bool:
+        """True si el frontmatter cambió desde la última sincronización con esta fila"""
+        return row["synced_status"] is not None and file_status != row["synced_status"]
+
+    def apply(self, tasks: Iterable) -> None:
+        """
+        Superpone el estado guardado sobre tareas recién parseadas.
+
+        Si el frontmatter ya no coincide con lo último sincronizado, el archivo se
+        editó a mano: se adopta su status y se descarta el estado guardado.
+        """
+        rows = self.all()
+        edited = []
+        for task in tasks:
+            row = rows.get(task.id)
+            if row is None:
+                continue
+            if self.is_manual_edit(task.status, row):
+                edited.append(task.id)
+                continue
+            task.status = row["status"]
+            task.retry_count = row["retry_count"]
+            task.started_at = _parse_iso(row["started_at"])
+            task.completed_at = _parse_iso(row["completed_at"])
+            task.error_message = row["error_message"]
+
+        if edited:
+            self.logger.info(f"✏️  Status editado a mano en {len(edited)} tarea(s): se usa el del archivo")
+            self.forget(edited)
+
+    def unsynced(self) -> List[Dict]:
+        """Filas cuyo status aún no está escrito en el frontmatter"""
+        rows = self._query("SELECT * FROM task_state WHERE synced_status IS NULL OR synced_status != status")
+        return [dict(row) for row in rows]
+
+    def mark_synced(self, task_id: str, status: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE task_state SET synced_status = ? WHERE id = ?", (status, task_id))
+
+    def forget(self, task_ids: Optional[Iterable[str]] = None):
+        """Borra el estado de las tareas indicadas (o de todas)"""
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                if task_ids is None:
+                    conn.execute("DELETE FROM task_state")
+                else:
+                    conn.executemany("DELETE FROM task_state WHERE id = ?", [(i,) for i in task_ids])
+
+    # --- Índice de frontmatter para consultas rápidas (status) ---
+
+    def index_entries(self) -> Dict[str, sqlite3.Row]:
+        """Resumen de frontmatter por ruta, con el mtime y tamaño con que se leyó"""
+        return {row["path"]: row for row in self._query("SELECT * FROM task_index")}
+
+    def update_index(self, rows: List[tuple], removed: Iterable[str] = ()):
+        """
+        Upsert de (path, mtime_ns, size, id, title, status, priority, dependencies_json).
+
+        No crea la base de datos: en un proyecto que aún no ha ejecutado nada,
+        `status` no deja ningún archivo detrás (el índice se construye tras el primer run).
+        """
+        removed = [(path,) for path in removed]
+        if not rows and not removed:
+            return
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO task_index VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.executemany("DELETE FROM task_index WHERE path = ?", removed)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
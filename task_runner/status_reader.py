@@ -0,0 +1,139 @@
+"""
+Status Reader - Estado de las tareas sin parsear el backlog completo
+
+`status` solo necesita id, título, status, prioridad y dependencias. En lugar
+de parsear cada markdown (secciones, bloque E2E) o cargar la caché de parseo
+entera, se mantiene en el StateStore un índice compacto del frontmatter por
+archivo, validado con (mtime_ns, tamaño) igual que ParseCache. En una llamada
+en caliente solo se hace un scandir y una consulta a SQLite; los archivos
+nuevos o modificados se re-leen (solo el frontmatter) y se actualiza el índice.
+El índice solo se guarda si la base de datos ya existe: en un proyecto sin
+ningún run, `status` lee los frontmatter sin crear task-state.db.
+
+Encima se superpone el estado de ejecución del StateStore con la misma regla
+que TaskEngine.load_tasks (una edición manual del frontmatter gana), pero sin
+escribir nada en task_state: `status` es de solo lectura.
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from .parse_cache import RACY_WINDOW_NS
+from .state_store import StateStore
+from .task_parser import TaskParser
+
+
+class TaskStatus(NamedTuple):
+    """Vista ligera de una tarea para listados de estado"""
+    id: str
+    title: str
+    status: str
+    priority: str
+    dependencies: List[str]
+    error_message: Optional[str] = None
+    retry_count: int = 0
+
+
+class StatusReader:
+    """Resumen de estado a partir del índice de frontmatter y el StateStore"""
+
+    def __init__(self, tasks_dir: Path, state: StateStore):
+        self.tasks_dir = Path(tasks_dir)
+        self.state = state
+        self.parser = TaskParser(self.tasks_dir)
+        self.logger = logging.getLogger("StatusReader")
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        """Archivos *.md del directorio con su stat (scandir evita un stat extra por archivo)"""
+        if not self.tasks_dir.is_dir():
+            return {}
+        files = {}
+        with os.scandir(self.tasks_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".md") and entry.is_file():
+                    files[entry.path] = entry.stat()
+        return files
+
+    def _index_row(self, path: str, stat: os.stat_result) -> Optional[tuple]:
+        """Lee solo el frontmatter de un archivo y lo convierte en fila del índice"""
+        try:
+            meta = self.parser.read_frontmatter(Path(path))
+        except Exception as e:
+            self.logger.warning(f"⚠️  Frontmatter ilegible en {path}: {e}")
+            return None
+        # Mismos valores por defecto que TaskParser.parse_task_file
+        stem = Path(path).stem
+        return (
+            path, stat.st_mtime_ns, stat.st_size,
+            meta.get("id", stem),
+            meta.get("title", stem),
+            meta.get("status", "pending"),
+            meta.get("priority", "medium"),
+            json.dumps(meta.get("dependencies", []))
+        )
+
+    def read(self) -> List[TaskStatus]:
+        """Tareas ordenadas por nombre de archivo, con el estado de ejecución aplicado"""
+        files = self._scan()
+        index = self.state.index_entries()
+
+        rows, changed = [], []
+        removed = [path for path in index if path not in files]
+        now = time.time_ns()
+        for path in sorted(files):
+            stat = files[path]
+            row = index.get(path)
+            if row is not None and row[1] == stat.st_mtime_ns and row[2] == stat.st_size:
+                rows.append(row)
+                continue
+            fresh = self._index_row(path, stat)
+            if fresh is None:
+                continue
+            rows.append(fresh)
+            # Como en ParseCache: un archivo recién escrito podría cambiar sin que cambie su mtime
+            if now - stat.st_mtime_ns < RACY_WINDOW_NS:
+                if row is not None:
+                    removed.append(path)
+            else:
+                changed.append(fresh)
+
+        if changed or removed:
+            self.state.update_index(changed, removed)
+
+        # Un solo json.loads para todas las listas de dependencias
+        dependencies = json.loads("[" + ",".join(row[7] for row in rows) + "]")
+        states = self.state.all()
+        tasks = []
+        for (_, _, _, task_id, title, status, priority, _), deps in zip(rows, dependencies):
+            task = TaskStatus(task_id, title, status, priority, deps)
+            stored = states.get(task_id)
+            if stored is not None and not StateStore.is_manual_edit(status, stored):
+                task = task._replace(
+                    status=stored["status"],
+                    error_message=stored["error_message"],
+                    retry_count=stored["retry_count"]
+                )
+            tasks.append(task)
+        return tasks
+
+    def get_status(self) -> Dict:
+        """Mismo formato que TaskEngine.get_status"""
+        tasks = self.read()
+        counts: Dict[str, int] = {}
+        for task in tasks:
+            counts[task.status] = counts.get(task.status, 0) + 1
+        return {
+            "tasks": tasks,
+            "summary": {
+                "total": len(tasks),
+                "completed": counts.get("completed", 0),
+                "failed": counts.get("failed", 0),
+                "pending": counts.get("pending", 0),
+                "in_progress": counts.get("in_progress", 0),
+                "blocked": len([t for t in tasks if t.status == "pending" and t.dependencies])
+            }
+        }
@@ -0,0 +1,313 @@
+"""
+Tape - Escritor persistente y con buffer para The Tape (registro JSONL append-only)
+e índice de offsets para recuperar mensajes sin recorrer la cinta entera
+"""
+
+import os
+import json
+import time
+import atexit
+import weakref
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("none", "batch", "every-record")
+
+# Escritores vivos, para volcar su buffer al salir del intérprete
+_open_writers: "weakref.WeakSet[TapeWriter]" = weakref.WeakSet()
+
+
+class TapeWriter:
+    """
+    Mantiene un único handle abierto sobre la cinta y agrupa registros en memoria.
+
+    El buffer se vuelca (group commit) al superar `max_records` registros,
+    `max_bytes` bytes o `flush_interval` segundos desde el último volcado.
+    Políticas de durabilidad:
+      - none: el volcado llega al sistema operativo, sin fsync.
+      - batch: fsync tras cada volcado de grupo.
+      - every-record: cada registro se escribe y se sincroniza al momento.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        durability: str = "batch",
+        max_records: int = 64,
+        max_bytes: int = 256 * 1024,
+        flush_interval: float = 1.0,
+        index: Optional["TapeIndex"] = None
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Modo de durabilidad desconocido '{durability}'. Usa uno de {DURABILITY_MODES}")
+
+        self.path = path
+        self.durability = durability
+        self.max_records = max(1, max_records)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.index = index
+
+        self._file = None
+        self._buffer: List[bytes] = []
+        # (visible_id, internal_id) de cada registro ADD_MESSAGE en buffer, None para el resto
+        self._buffer_keys: List[Optional[Tuple[Any, Any]]] = []
+        self._buffer_bytes = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.flush_count = 0
+        _open_writers.add(self)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._file.seek(0, os.SEEK_END)
+
+    def append(self, record: Dict[str, Any]):
+        """Encola un registro; lo vuelca si se supera algún umbral"""
+        line = (json.dumps(record) + "\n").encode("utf-8")
+
+        key = None
+        if record.get("action") == "ADD_MESSAGE":
+            key = (record.get("visible_id"), record.get("internal_id"))
+
+        with self._lock:
+            self._buffer.append(line)
+            self._buffer_keys.append(key)
+            self._buffer_bytes += len(line)
+
+            if (self.durability == "every-record"
+                    or len(self._buffer) >= self.max_records
+                    or self._buffer_bytes >= self.max_bytes
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        """Vuelca el buffer a disco según la política de durabilidad"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        if self.index is not None:
+            # Poner el índice al día con la cinta antes de añadir este grupo
+            self.index.ensure_loaded()
+
+        self._open()
+        offset = self._file.tell()
+        self._file.write(b"".join(self._buffer))
+        self._file.flush()
+        if self.durability != "none":
+            os.fsync(self._file.fileno())
+
+        if self.index is not None:
+            entries = []
+            for line, key in zip(self._buffer, self._buffer_keys):
+                if key is not None:
+                    entries.append((key[0], key[1], offset, len(line)))
+                offset += len(line)
+            self.index.record(entries, offset)
+
+        self._buffer.clear()
+        self._buffer_keys.clear()
+        self._buffer_bytes = 0
+        self.flush_count += 1
+
+    def close(self):
+        """Vuelca lo pendiente y cierra el handle (se reabre si se vuelve a escribir)"""
+        with self._lock:
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self.index is not None:
+                self.index.close()
+
+    @property
+    def pending_records(self) -> int:
+        return len(self._buffer)
+
+
+class TapeIndex:
+    """
+    Índice sidecar (JSONL) de The Tape: visible_id / internal_id → (offset, longitud).
+
+    Cada volcado del TapeWriter añade sus entradas y una marca {"end": N} con el
+    tamaño de cinta cubierto. Al cargar, si la cinta creció más allá de la marca
+    se indexa solo la cola; si encogió, falta el sidecar o una lectura no cuadra,
+    se reconstruye desde la cinta. Con varias sesiones en la misma cinta (reintentos
+    de una tarea) gana la aparición más reciente de cada ID.
+    """
+
+    def __init__(self, tape_path: str, index_path: Optional[str] = None):
+        self.tape_path = tape_path
+        if index_path is None:
+            base = tape_path[:-len(".jsonl")] if tape_path.endswith(".jsonl") else tape_path
+            index_path = base + ".idx.jsonl"
+        self.index_path = index_path
+
+        self.by_visible_id: Dict[Any, Tuple[int, int]] = {}
+        self.by_internal_id: Dict[Any, Tuple[int, int]] = {}
+        self.end = 0
+        self._loaded = False
+        self._file = None
+        self._lock = threading.RLock()
+
+    def _tape_size(self) -> int:
+        return os.path.getsize(self.tape_path) if os.path.exists(self.tape_path) else 0
+
+    def _add(self, visible_id, internal_id, offset: int, length: int):
+        location = (offset, length)
+        if visible_id is not None:
+            self.by_visible_id[visible_id] = location
+        if internal_id is not None:
+            self.by_internal_id[internal_id] = location
+
+    def _scan(self, start: int) -> Tuple[List[Tuple[Any, Any, int, int]], int]:
+        """Recorre la cinta desde `start` y devuelve (entradas ADD_MESSAGE, offset final)"""
+        entries = []
+        offset = start
+        if not os.path.exists(self.tape_path):
+            return entries, offset
+
+        with open(self.tape_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Línea a medio escribir: se indexará cuando esté completa
+                    break
+                try:
+                    record = json.loads(line)
+                    if record.get("action") == "ADD_MESSAGE":
+                        entries.append((record.get("visible_id"), record.get("internal_id"), offset, len(line)))
+                except (ValueError, AttributeError):
+                    pass
+                offset += len(line)
+        return entries, offset
+
+    def ensure_loaded(self):
+        """Carga el sidecar (o lo reconstruye) y lo pone al día con la cinta"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            if not os.path.exists(self.index_path):
+                self.rebuild()
+                return
+
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        if "end" in entry:
+                            self.end = entry["end"]
+                        else:
+                            self._add(entry.get("v"), entry.get("i"), entry["o"], entry["n"])
+            except (OSError, KeyError, TypeError) as e:
+                logger.warning(f"Índice de The Tape ilegible ({e}), reconstruyendo")
+                self.rebuild()
+                return
+
+            tape_size = self._tape_size()
+            if tape_size < self.end:
+                # La cinta fue truncada o reemplazada
+                self.rebuild()
+            elif tape_size > self.end:
+                entries, end = self._scan(self.end)
+                self.record(entries, end)
+
+    def rebuild(self):
+        """Reconstruye el índice completo recorriendo la cinta"""
+        with self._lock:
+            self.close()
+            self.by_visible_id.clear()
+            self.by_internal_id.clear()
+            self.end = 0
+            self._loaded = True
+
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+
+            entries, end = self._scan(0)
+            self.record(entries, end)
+
+    def record(self, entries: List[Tuple[Any, Any, int, int]], end: int):
+        """Añade entradas (visible_id, internal_id, offset, longitud) y avanza la marca"""
+        with self._lock:
+            for visible_id, internal_id, offset, length in entries:
+                self._add(visible_id, internal_id, offset, length)
+            self.end = end
+
+            try:
+                if self._file is None:
+                    self._file = open(self.index_path, "a", encoding="utf-8")
+                lines = [json.dumps({"v": v, "i": i, "o": o, "n": n}) for v, i, o, n in entries]
+                lines.append(json.dumps({"end": end}))
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+            except OSError as e:
+                # El índice es reconstruible: no debe romper la escritura de la cinta
+                logger.error(f"Error escribiendo índice de The Tape: {e}")
+
+    def _read_at(self, location: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        offset, length = location
+        try:
+            with open(self.tape_path, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.read(length))
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, visible_id=None, internal_id=None) -> Optional[Dict[str, Any]]:
+        """Devuelve el registro ADD_MESSAGE de un mensaje con un seek y un decode"""
+        self.ensure_loaded()
+
+        for attempt in range(2):
+            if internal_id is not None:
+                location = self.by_internal_id.get(internal_id)
+            else:
+                location = self.by_visible_id.get(visible_id)
+
+            if location is not None:
+                record = self._read_at(location)
+                if (record is not None and record.get("action") == "ADD_MESSAGE"
+                        and (internal_id is None or record.get("internal_id") == internal_id)
+                        and (visible_id is None or record.get("visible_id") == visible_id)):
+                    return record
+            elif self.end == self._tape_size():
+                # Índice al día y sin entrada: el mensaje no existe
+                return None
+
+            if attempt == 0:
+                logger.warning("Índice de The Tape desactualizado, reconstruyendo")
+                self.rebuild()
+
+        return None
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _flush_open_writers():
+    """Hook de salida: no perder registros en buffer al terminar el proceso"""
+    for writer in list(_open_writers):
+        try:
+            writer.close()
+        except Exception as e:
+            logger.error(f"Error volcando The Tape ({writer.path}): {e}")
+
+
+atexit.register(_flush_open_writers)
@@ -3,18 +3,29 @@ Task Engine - Orquestador principal del sistema
 """
 
 import json
-import asyncio
+import time
 import logging
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional
+from contextlib import ExitStack
+from typing import List, Dict, Optional, Iterable, TYPE_CHECKING
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from .task_parser import TaskParser, Task
-from .tool_calling_agent import ToolCallingAgent
-from .cdp_wrapper import CDPWrapper
-from .visual_validator import VisualValidator
-from .report_generator import ReportGenerator
+from . import tracing
+from .task_parser import TaskParser, Task, PARSED_FIELDS
+from .scheduler import DependencyGraph
+from .state_store import StateStore, state_db_path
+
+# Agente (openai), navegador (aiohttp), asyncio y pools se importan al usarse:
+# status, sync o reset no deben pagar su tiempo de importación
+if TYPE_CHECKING:
+    from .tool_calling_agent import ToolCallingAgent, AsyncToolCallingAgent
+    from .cdp_wrapper import CDPWrapper
+    from .browser_pool import BrowserPool
+    from .visual_validator import VisualValidator
+    from .report_generator import ReportGenerator
+    from .command_runner import CommandRunner
+    from .task_watcher import TaskWatcher
 
 
 class TaskEngine:
@@ -69,270 +80,699 @@ class TaskEngine:
         self.logger = logging.getLogger("TaskEngine")
         
         # Inicializar componentes
-        self.parser = TaskParser(self.tasks_dir)
-        
-        # Nueva V2: ToolCallingAgent puro
-        self.opencode = ToolCallingAgent(
-            model=config.get("opencode", {}).get("model", "kimi-k2.5-free"),
-            provider=config.get("opencode", {}).get("provider", "zen"),
-            max_iterations=config.get("orchestrator", {}).get("max_iterations", 15),
-            tasks_dir=str(self.tasks_dir)
+        self.parser = TaskParser(
+            self.tasks_dir,
+            cache_path=config.get("files", {}).get("parse_cache"),
+            parallel_threshold=config.get("orchestrator", {}).get("parse_parallel_threshold", 500),
+            max_workers=config.get("orchestrator", {}).get("parse_workers")
         )
         
-        self.cdp = CDPWrapper(config.get("cdp", {}))
-        self.visual_validator = VisualValidator(config.get("validation", {}).get("visual", {}), config.get("opencode", {}))
-        self.report_generator = ReportGenerator(config.get("directories", {}).get("reports", "./reports"))
+        self.async_agent: Optional["AsyncToolCallingAgent"] = None
+        
+        # Estado de ejecución (status, reintentos, errores) en SQLite; el frontmatter se sincroniza aparte
+        self.state = StateStore(state_db_path(config))
+        self._file_status: Dict[str, str] = {}
+        
+        # Agente, navegador, validador visual... se construyen al usarse por primera vez:
+        # comandos como status o reset no pagan su inicialización
+        self._components: Dict[str, object] = {}
+        self._components_lock = threading.Lock()
         
         # Estado de ejecución
         self.tasks: List[Task] = []
+        self.graph: Optional[DependencyGraph] = None
         self.execution_log: List[Dict] = []
+        
+        # Modo watch: tareas nuevas o editadas entran en el grafo durante el run
+        self._watcher: Optional["TaskWatcher"] = None
+        self._deferred_changes: set = set()
+    
+    def _component(self, name: str, factory):
+        """Devuelve el componente `name`, creándolo con factory() la primera vez"""
+        component = self._components.get(name)
+        if component is None:
+            with self._components_lock:
+                component = self._components.get(name)
+                if component is None:
+                    component = self._components[name] = factory()
+        return component
+    
+    @property
+    def opencode(self) -> "ToolCallingAgent":
+        # Nueva V2: ToolCallingAgent puro
+        from .tool_calling_agent import ToolCallingAgent
+        return self._component("opencode", lambda: ToolCallingAgent(
+            model=self.config.get("opencode", {}).get("model", "kimi-k2.5-free"),
+            provider=self.config.get("opencode", {}).get("provider", "zen"),
+            max_iterations=self.config.get("orchestrator", {}).get("max_iterations", 15),
+            tasks_dir=str(self.tasks_dir),
+            max_parallel_tools=self.config.get("orchestrator", {}).get("max_parallel_tools", 4),
+            memory_config=self.config.get("memory", {})
+        ))
+    
+    @property
+    def command_runner(self) -> "CommandRunner":
+        from .command_runner import CommandRunner
+        return self._component("command_runner", lambda: CommandRunner(
+            self.config.get("validation", {}).get("unit_tests", {})
+        ))
+    
+    @property
+    def browser_pool(self) -> "BrowserPool":
+        from .browser_pool import BrowserPool
+        return self._component("browser_pool", lambda: BrowserPool(self.config.get("cdp", {})))
+    
+    @property
+    def visual_validator(self) -> "VisualValidator":
+        from .visual_validator import VisualValidator
+        return self._component("visual_validator", lambda: VisualValidator(
+            self.config.get("validation", {}).get("visual", {}),
+            self.config.get("opencode", {}),
+            cache_path=self.config.get("files", {}).get("visual_cache")
+        ))
+    
+    @property
+    def report_generator(self) -> "ReportGenerator":
+        from .report_generator import ReportGenerator
+        return self._component("report_generator", lambda: ReportGenerator(
+            self.config.get("directories", {}).get("reports", "./reports")
+        ))
     
     def load_tasks(self) -> List[Task]:
         """Carga todas las tareas desde archivos"""
         self.logger.info(f"Cargando tareas desde {self.tasks_dir}")
         self.tasks = self.parser.parse_all_tasks()
         self.logger.info(f"{len(self.tasks)} tareas cargadas")
+        
+        # El estado guardado manda sobre el frontmatter, salvo ediciones manuales
+        self._file_status = {t.id: t.status for t in self.tasks}
+        self.state.apply(self.tasks)
+        
+        # Indexar dependencias y detectar ciclos / dependencias rotas
+        self.graph = DependencyGraph(self.tasks)
+        self.graph.validate()
         return self.tasks
     
     def get_next_tasks(self) -> List[Task]:
         """Obtiene las siguientes tareas listas para ejecutar"""
-        ready_tasks = []
+        if self.graph is None:
+            self.graph = DependencyGraph(self.tasks)
         
-        for task in self.tasks:
-            if task.status != "pending":
-                continue
-            
-            # Verificar dependencias
-            deps_satisfied = all(
-                any(t.id == dep and t.status == "completed" for t in self.tasks)
-                for dep in task.dependencies
-            )
-            
-            if deps_satisfied:
-                ready_tasks.append(task)
-        
-        return ready_tasks
+        return self.graph.get_ready()
     
-    def run(self, task_id: Optional[str] = None, parallel: bool = False):
+    def run(self, task_id: Optional[str] = None, parallel: bool = False, use_async: bool = False, watch: bool = False):
         """Ejecuta el orchestrator"""
         self.logger.info("🚀 Iniciando AI Task Orchestrator")
         
+        tracing_config = self.config.get("tracing", {})
+        tracer = tracing.start(tracing_config.get("max_events", 100000)) if tracing_config.get("enabled", True) else None
+        try:
+            with tracing.span("run", cat="run", task_id=task_id, parallel=parallel, use_async=use_async, watch=watch):
+                if not self._run_tasks(task_id, parallel, use_async, watch):
+                    return
+        finally:
+            if tracer is not None:
+                tracing.stop()
+        
+        # Cerrar pestañas y conexión de navegador del pool (si se llegó a abrir)
+        if "browser_pool" in self._components:
+            self.browser_pool.close()
+        
+        # Generar reporte
+        metrics = {}
+        if "visual_validator" in self._components:
+            metrics["visual_cache"] = self.visual_validator.cache.stats
+        if tracer is not None:
+            metrics["trace"] = self._save_trace(tracer)
+        self.report_generator.generate(self.tasks, self.execution_log, metrics=metrics)
+        
+        # Guardar estado
+        self._save_status()
+        if self.config.get("orchestrator", {}).get("frontmatter_sync", "end_of_run") == "end_of_run":
+            self.sync_frontmatter()
+    
+    def _run_tasks(self, task_id: Optional[str], parallel: bool, use_async: bool, watch: bool) -> bool:
+        """Carga y ejecuta las tareas del run. Devuelve False si task_id no existe."""
+        # El watcher se crea antes de cargar: lo que cambie durante la carga no se pierde
+        if watch and not task_id:
+            from .task_watcher import TaskWatcher
+            self._watcher = TaskWatcher(self.tasks_dir, self.config.get("watch", {}))
+        
         # Cargar tareas
-        self.load_tasks()
+        with tracing.span("load_tasks", cat="run"):
+            self.load_tasks()
         
         if task_id:
             # Ejecutar tarea específica
-            task = next((t for t in self.tasks if t.id == task_id), None)
+            task = self.graph.get_task(task_id)
             if not task:
                 self.logger.error(f"❌ Tarea {task_id} no encontrada")
-                return
+                return False
             self._execute_task(task)
-        else:
-            # Ejecutar todas las tareas pendientes
-            self._run_all_tasks(parallel)
-        
-        # Generar reporte
-        self.report_generator.generate(self.tasks, self.execution_log)
+            return True
         
-        # Guardar estado
-        self._save_status()
+        # Ejecutar todas las tareas pendientes
+        try:
+            self._run_all_tasks(parallel, use_async)
+        except KeyboardInterrupt:
+            if self._watcher is None:
+                raise
+            self.logger.info("⏹️  Modo watch detenido")
+        finally:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+        return True
     
-    def _run_all_tasks(self, parallel: bool = False):
+    def _save_trace(self, tracer: "tracing.Tracer") -> Dict:
+        """Escribe el trace del run (Chrome trace-event JSON) y resume sus etapas"""
+        trace_file = self.log_dir / "traces" / f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        try:
+            tracer.save(trace_file)
+            self.logger.info(f"🧭 Trace guardado en {trace_file} (ábrelo en chrome://tracing o ui.perfetto.dev)")
+        except OSError as e:
+            self.logger.warning(f"⚠️  No se pudo guardar el trace: {e}")
+            trace_file = None
+        return {
+            "file": str(trace_file) if trace_file else None,
+            "stages": tracer.summary(),
+            "dropped_events": tracer.dropped
+        }
+    
+    def set_task_status(self, task: Task, new_status: str, error_message: Optional[str] = None):
+        """Transición de estado: una fila en el StateStore, sin reescribir el markdown"""
+        task.status = new_status
+        if error_message:
+            task.error_message = error_message
+        self.state.record(task, self._file_status.get(task.id))
+    
+    def sync_frontmatter(self) -> int:
+        """Escribe en el frontmatter el status de las tareas que cambiaron desde la última sincronización"""
+        tasks = {t.id: t for t in self.tasks}
+        synced = 0
+        for row in self.state.unsynced():
+            task = tasks.get(row["id"])
+            if task is None or not task.file_path:
+                continue
+            self.parser.update_task_status(task, row["status"])
+            self.state.mark_synced(task.id, row["status"])
+            self._file_status[task.id] = row["status"]
+            synced += 1
+        if synced:
+            self.logger.info(f"📝 Frontmatter sincronizado en {synced} tarea(s)")
+        return synced
+    
+    def _run_all_tasks(self, parallel: bool = False, use_async: bool = False):
         """Ejecuta todas las tareas pendientes"""
         max_workers = self.config.get("orchestrator", {}).get("parallel_workers", 1)
         
-        if parallel and max_workers > 1:
+        if use_async:
+            import asyncio
+            max_concurrency = self.config.get("orchestrator", {}).get("async_concurrency", 32)
+            asyncio.run(self._run_async(max_concurrency))
+        elif parallel and max_workers > 1:
             self._run_parallel(max_workers)
         else:
             self._run_sequential()
     
     def _run_sequential(self):
         """Ejecuta tareas secuencialmente"""
-        max_retries = self.config.get("orchestrator", {}).get("max_retries", 3)
-        
         while True:
-            ready_tasks = self.get_next_tasks()
+            task = self.graph.pop_ready()
             
-            if not ready_tasks:
-                pending_tasks = [t for t in self.tasks if t.status == "pending"]
-                if pending_tasks:
-                    self.logger.warning(f"⚠️  {len(pending_tasks)} tareas bloqueadas por dependencias")
-                    for t in pending_tasks:
-                        self.logger.warning(f"   - {t.id}: depende de {t.dependencies}")
+            if task is None:
+                if self._wait_for_tasks():
+                    continue
                 break
             
-            task = ready_tasks[0]
-            retries = 0
+            self._execute_with_retries(task)
+            self.graph.mark_finished(task)
+            self._ingest_changes()
+    
+    def _execute_with_retries(self, task: Task) -> bool:
+        """Ejecuta una tarea reintentándola hasta max_retries veces si falla"""
+        max_retries = self.config.get("orchestrator", {}).get("max_retries", 3)
+        retries = 0
+        success = False
+        
+        while retries < max_retries:
+            success = self._execute_task(task)
             
-            while retries < max_retries:
-                success = self._execute_task(task)
-                
-                if success:
-                    break
-                
-                retries += 1
-                if retries < max_retries:
-                    self.logger.warning(f"⚠️  Tarea {task.id} falló, reintento {retries}/{max_retries}...")
-                    task.status = "pending"
-                    task.error_message = None
+            if success:
+                break
             
-            if retries >= max_retries and not success:
-                self.logger.error(f"❌ Tarea {task.id} falló después de {max_retries} intentos, continuando con siguientes...")
+            retries += 1
+            if retries < max_retries:
+                self.logger.warning(f"⚠️  Tarea {task.id} falló, reintento {retries}/{max_retries}...")
+                task.status = "pending"
+                task.error_message = None
+        
+        if retries >= max_retries and not success:
+            self.logger.error(f"❌ Tarea {task.id} falló después de {max_retries} intentos, continuando con siguientes...")
+        
+        return success
+    
+    def _log_blocked_tasks(self):
+        """Informa de las tareas que quedaron pendientes por dependencias no satisfechas"""
+        pending_tasks = [t for t in self.tasks if t.status == "pending"]
+        if pending_tasks:
+            self.logger.warning(f"⚠️  {len(pending_tasks)} tareas bloqueadas por dependencias")
+            for t in pending_tasks:
+                self.logger.warning(f"   - {t.id}: depende de {t.dependencies}")
+    
+    def _watch_tick(self) -> Optional[float]:
+        """Tope de espera de los bucles en modo watch (None: esperar sin tope)"""
+        if self._watcher is None:
+            return None
+        return self.config.get("watch", {}).get("poll_interval", 1.0)
+    
+    def _wait_for_tasks(self) -> bool:
+        """
+        Sin tareas listas ni en curso: fuera del modo watch el run termina; en
+        modo watch se espera a que lleguen tareas nuevas o editadas.
+        Devuelve False si hay que terminar (sin watch, o tras watch.idle_timeout).
+        """
+        self._log_blocked_tasks()
+        if self._watcher is None:
+            return False
+        
+        idle_timeout = self.config.get("watch", {}).get("idle_timeout")
+        deadline = time.monotonic() + idle_timeout if idle_timeout is not None else None
+        self.logger.info("👀 Esperando tareas nuevas o editadas...")
+        while not self.graph.has_ready():
+            timeout = self._watch_tick()
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    self.logger.info(f"⏹️  Sin tareas en {idle_timeout}s: fin del modo watch")
+                    return False
+            self._ingest_changes(timeout)
+        return True
+    
+    def _ingest_changes(self, timeout: Optional[float] = 0, busy: Iterable[str] = ()) -> int:
+        """
+        Modo watch: parsea solo los archivos cambiados y los lleva al grafo en vivo.
+        
+        Los cambios de tareas en ejecución (busy o in_progress) se aplazan hasta que
+        terminen. Devuelve cuántas tareas se añadieron o actualizaron.
+        """
+        if self._watcher is None:
+            return 0
+        changed = self._watcher.changes(timeout) | self._deferred_changes
+        self._deferred_changes = set()
+        if not changed:
+            return 0
+        
+        busy = set(busy)
+        by_path = {t.file_path: t for t in self.tasks}
+        ingested = 0
+        removed = []
+        for path in sorted(changed):
+            current = by_path.get(path)
+            if current is not None and (current.id in busy or current.status == "in_progress"):
+                self._deferred_changes.add(path)
+                continue
+            if not path.exists():
+                removed.append(path)
+                continue
+            try:
+                task = self.parser.parse_task_file(path)
+            except Exception as e:
+                self.logger.error(f"❌ Error parseando {path}: {e}")
+                continue
+            existing = self.graph.get_task(task.id)
+            if existing is not None and (existing.id in busy or existing.status == "in_progress"):
+                self._deferred_changes.add(path)
+                continue
+            ingested += self._merge_task(task, existing)
+        
+        # Borrados al final: un renombrado ya habrá movido la tarea a su nueva ruta
+        for path in removed:
+            task = by_path.get(path)
+            if task is not None and task.file_path == path and task.status == "pending":
+                self.graph.remove(task.id)
+                self.tasks.remove(task)
+                self.logger.info(f"➖ [{task.id}] Archivo borrado: la tarea sale de la cola")
+        return ingested
+    
+    def _merge_task(self, task: Task, existing: Optional[Task]) -> int:
+        """Añade una tarea recién parseada o actualiza la definición de la existente"""
+        missing = [dep for dep in task.dependencies if self.graph.get_task(dep) is None]
+        if missing:
+            self.logger.warning(f"⚠️  {task.id} depende de tareas aún inexistentes: {missing}")
+        
+        if existing is None:
+            self._file_status[task.id] = task.status
+            self.state.apply([task])
+            self.tasks.append(task)
+            self.graph.upsert(task)
+            self.logger.info(f"➕ [{task.id}] Nueva tarea: {task.title}")
+            return 1
+        
+        if existing.file_path != task.file_path and existing.file_path is not None and existing.file_path.exists():
+            self.logger.warning(f"⚠️  ID de tarea duplicado: {task.id} en {task.file_path} (se ignora)")
+            return 0
+        
+        # Mismo criterio que StateStore.apply: el status del archivo solo manda si se editó a mano
+        manual_status = task.status != self._file_status.get(task.id)
+        for name in PARSED_FIELDS:
+            if name != "status" or manual_status:
+                setattr(existing, name, getattr(task, name))
+        existing.file_path = task.file_path
+        if manual_status:
+            self._file_status[task.id] = task.status
+            existing.retry_count = 0
+            existing.error_message = None
+            self.state.forget([task.id])
+        self.graph.upsert(existing)
+        self.logger.info(f"✏️  [{task.id}] Tarea actualizada" + (f" (status: {task.status})" if manual_status else ""))
+        return 1
     
     def _run_parallel(self, max_workers: int):
         """Ejecuta tareas en paralelo donde sea posible"""
+        from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
         self.logger.info(f"⚡ Ejecutando en paralelo con {max_workers} workers")
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {}
-            completed_tasks = set()
+            futures: Dict[Future, Task] = {}
             
             while True:
-                # Obtener tareas listas
-                ready_tasks = [
-                    t for t in self.get_next_tasks()
-                    if t.id not in completed_tasks and t.id not in futures.values()
-                ]
+                # Rellenar huecos libres con tareas listas del grafo
+                while len(futures) < max_workers:
+                    task = self.graph.pop_ready()
+                    if task is None:
+                        break
+                    futures[executor.submit(self._execute_with_retries, task)] = task
                 
-                if not ready_tasks and not futures:
+                if not futures:
+                    if self._wait_for_tasks():
+                        continue
                     break
                 
-                # Enviar tareas a ejecutar
-                for task in ready_tasks[:max_workers - len(futures)]:
-                    future = executor.submit(self._execute_task, task)
-                    futures[future] = task.id
-                
-                # Esperar a que alguna termine
-                done_futures = [f for f in futures.keys() if f.done()]
+                # Bloquear hasta que termine al menos una (sin busy-polling; en modo watch, con tope)
+                done, _ = wait(futures, timeout=self._watch_tick(), return_when=FIRST_COMPLETED)
                 
-                for future in done_futures:
-                    task_id = futures.pop(future)
-                    completed_tasks.add(task_id)
+                for future in done:
+                    task = futures.pop(future)
                     
                     try:
                         future.result()
                     except Exception as e:
-                        self.logger.error(f"❌ Error en tarea {task_id}: {e}")
+                        self.logger.error(f"❌ Error en tarea {task.id}: {e}")
+                        task.status = "failed"
+                        task.error_message = str(e)
+                    
+                    # Desbloquea dependientes para la siguiente vuelta
+                    self.graph.mark_finished(task)
+                
+                self._ingest_changes(busy=[t.id for t in futures.values()])
+    
+    async def _run_async(self, max_concurrency: int):
+        """Ejecuta tareas como corrutinas en un único event loop"""
+        import asyncio
+        self.logger.info(f"⚡ Ejecutando con asyncio (hasta {max_concurrency} tareas concurrentes)")
+        
+        running: Dict[asyncio.Future, Task] = {}
+        
+        while True:
+            while len(running) < max_concurrency:
+                task = self.graph.pop_ready()
+                if task is None:
+                    break
+                running[asyncio.ensure_future(self._execute_with_retries_async(task))] = task
+            
+            if not running:
+                if await asyncio.to_thread(self._wait_for_tasks):
+                    continue
+                break
+            
+            done, _ = await asyncio.wait(running, timeout=self._watch_tick(), return_when=asyncio.FIRST_COMPLETED)
+            
+            for future in done:
+                task = running.pop(future)
+                
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"❌ Error en tarea {task.id}: {e}")
+                    task.status = "failed"
+                    task.error_message = str(e)
+                
+                self.graph.mark_finished(task)
+            
+            if self._watcher is not None:
+                # El debounce del watcher duerme: fuera del event loop
+                await asyncio.to_thread(self._ingest_changes, 0, [t.id for t in running.values()])
+    
+    async def _execute_with_retries_async(self, task: Task) -> bool:
+        """Equivalente asíncrono de _execute_with_retries"""
+        max_retries = self.config.get("orchestrator", {}).get("max_retries", 3)
+        retries = 0
+        success = False
+        
+        while retries < max_retries:
+            success = await self._execute_task_async(task)
+            
+            if success:
+                break
+            
+            retries += 1
+            if retries < max_retries:
+                self.logger.warning(f"⚠️  Tarea {task.id} falló, reintento {retries}/{max_retries}...")
+                task.status = "pending"
+                task.error_message = None
+        
+        if retries >= max_retries and not success:
+            self.logger.error(f"❌ Tarea {task.id} falló después de {max_retries} intentos, continuando con siguientes...")
+        
+        return success
     
     def _execute_task(self, task: Task) -> bool:
         """Ejecuta una tarea individual completa"""
+        with tracing.span(task.id, cat="task", lane=task.id, title=task.title) as task_span:
+            success = self._execute_attempts(task)
+            task_span.set(success=success)
+        return success
+    
+    def _execute_attempts(self, task: Task) -> bool:
+        """Intentos de _execute_task hasta completar la tarea o agotar max_retries"""
+        execution_record = self._begin_task(task)
+        max_retries = self.config.get("orchestrator", {}).get("max_retries", 3)
+        
+        for attempt in range(max_retries):
+            self.logger.info(f"\n🔄 Intento {attempt + 1}/{max_retries}")
+            
+            with tracing.span(f"attempt {attempt + 1}", cat="attempt", attempt=attempt + 1):
+                try:
+                    # 1. Ejecutar implementación con OpenCode
+                    self.logger.info("🤖 Invocando agente de IA...")
+                    implementation_result = self._run_implementation(task, attempt)
+                    
+                    # 2-4. Tests unitarios, E2E y validación visual
+                    e2e_result = self._run_validation_stages(task, attempt, implementation_result, execution_record)
+                    if e2e_result is None:
+                        continue
+                    
+                    return self._complete_task(task, implementation_result, e2e_result, execution_record)
+                    
+                except Exception as e:
+                    if self._handle_attempt_error(task, attempt, e, execution_record):
+                        return False
+        
+        return False
+    
+    async def _execute_task_async(self, task: Task) -> bool:
+        """Equivalente asíncrono de _execute_task: el agente corre en el event loop"""
+        with tracing.span(task.id, cat="task", lane=task.id, title=task.title) as task_span:
+            success = await self._execute_attempts_async(task)
+            task_span.set(success=success)
+        return success
+    
+    async def _execute_attempts_async(self, task: Task) -> bool:
+        """Intentos de _execute_task_async hasta completar la tarea o agotar max_retries"""
+        import asyncio
+        execution_record = self._begin_task(task)
+        max_retries = self.config.get("orchestrator", {}).get("max_retries", 3)
+        
+        for attempt in range(max_retries):
+            self.logger.info(f"\n🔄 [{task.id}] Intento {attempt + 1}/{max_retries}")
+            
+            with tracing.span(f"attempt {attempt + 1}", cat="attempt", attempt=attempt + 1):
+                try:
+                    self.logger.info(f"🤖 [{task.id}] Invocando agente de IA...")
+                    implementation_result = await self._run_implementation_async(task, attempt)
+                    
+                    # Las etapas de validación son bloqueantes (subprocess, CDP): van a un hilo
+                    # (to_thread copia el contexto, así que sus spans siguen en el carril de la tarea)
+                    e2e_result = await asyncio.to_thread(
+                        self._run_validation_stages, task, attempt, implementation_result, execution_record
+                    )
+                    if e2e_result is None:
+                        continue
+                    
+                    return self._complete_task(task, implementation_result, e2e_result, execution_record)
+                    
+                except Exception as e:
+                    if self._handle_attempt_error(task, attempt, e, execution_record):
+                        return False
+        
+        return False
+    
+    def _begin_task(self, task: Task) -> Dict:
+        """Marca la tarea en progreso y crea su registro de ejecución"""
         self.logger.info(f"\n{'='*60}")
         self.logger.info(f"📋 Ejecutando tarea: {task.id} - {task.title}")
         self.logger.info(f"{'='*60}")
         
         task.status = "in_progress"
         task.started_at = datetime.now()
-        self.parser.update_task_status(task, "in_progress")
+        self.set_task_status(task, "in_progress")
         
-        execution_record = {
+        return {
             "task_id": task.id,
             "started_at": task.started_at.isoformat(),
             "steps": []
         }
+    
+    def _run_validation_stages(self, task: Task, attempt: int, implementation_result: Dict, execution_record: Dict) -> Optional[Dict]:
+        """
+        Verifica un intento: implementación, tests unitarios, E2E y validación visual.
         
+        Devuelve el resultado E2E si todo pasa, None si hay que reintentar, y lanza
+        excepción si el último intento falla.
+        """
         max_retries = self.config.get("orchestrator", {}).get("max_retries", 3)
+        is_last_attempt = attempt >= max_retries - 1
         
-        for attempt in range(max_retries):
-            self.logger.info(f"\n🔄 Intento {attempt + 1}/{max_retries}")
+        if not implementation_result["success"]:
+            if not is_last_attempt:
+                self.logger.warning("⚠️  Implementación falló, reintentando...")
+                return None
+            else:
+                raise Exception(f"Implementación falló después de {max_retries} intentos")
+        
+        # 2. Ejecutar tests unitarios
+        self.logger.info("🧪 Ejecutando tests unitarios...")
+        with tracing.span("unit_tests", commands=len(task.unit_tests)) as stage:
+            unit_test_result = self._run_unit_tests(task, attempt)
+            stage.set(success=unit_test_result["success"])
+        execution_record["steps"].append({
+            "step": "unit_tests",
+            "success": unit_test_result["success"],
+            "details": unit_test_result
+        })
+        
+        if not unit_test_result["success"]:
+            # El siguiente intento recibe qué comandos fallaron y la cola de su salida
+            task.error_message = self._unit_test_failures(unit_test_result)
+            if not is_last_attempt:
+                self.logger.warning("⚠️  Tests unitarios fallaron, reintentando...")
+                return None
+            else:
+                raise Exception(task.error_message)
+        
+        # 3. Ejecutar tests E2E con CDP
+        self.logger.info("🌐 Ejecutando tests E2E con CDP...")
+        with tracing.span("e2e_tests", steps=len(task.e2e_tests.steps)) as stage:
+            e2e_result = self._run_e2e_tests(task)
+            stage.set(success=e2e_result["success"])
+        execution_record["steps"].append({
+            "step": "e2e_tests",
+            "success": e2e_result["success"],
+            "details": e2e_result
+        })
+        
+        if not e2e_result["success"]:
+            if not is_last_attempt:
+                self.logger.warning("⚠️  Tests E2E fallaron, reintentando...")
+                return None
+            else:
+                raise Exception("Tests E2E fallaron")
+        
+        # 4. Validar visualmente con IA
+        if self.config.get("validation", {}).get("visual", {}).get("enabled", True):
+            self.logger.info("👁️  Validando visualmente con IA...")
+            with tracing.span("visual_validation", screenshots=len(e2e_result.get("screenshots", []))) as stage:
+                visual_result = self._validate_visual(
+                    task, e2e_result.get("screenshots", []), e2e_result.get("regions")
+                )
+                stage.set(success=visual_result["success"])
+            execution_record["steps"].append({
+                "step": "visual_validation",
+                "success": visual_result["success"],
+                "details": visual_result
+            })
             
-            try:
-                # 1. Ejecutar implementación con OpenCode
-                self.logger.info("🤖 Invocando agente de IA...")
-                implementation_result = self._run_implementation(task, attempt)
-                
-                if not implementation_result["success"]:
-                    if attempt < max_retries - 1:
-                        self.logger.warning("⚠️  Implementación falló, reintentando...")
-                        continue
-                    else:
-                        raise Exception(f"Implementación falló después de {max_retries} intentos")
-                
-                # 2. Ejecutar tests unitarios
-                self.logger.info("🧪 Ejecutando tests unitarios...")
-                unit_test_result = self._run_unit_tests(task)
-                execution_record["steps"].append({
-                    "step": "unit_tests",
-                    "success": unit_test_result["success"],
-                    "details": unit_test_result
-                })
-                
-                if not unit_test_result["success"]:
-                    if attempt < max_retries - 1:
-                        self.logger.warning("⚠️  Tests unitarios fallaron, reintentando...")
-                        continue
-                    else:
-                        raise Exception("Tests unitarios fallaron")
-                
-                # 3. Ejecutar tests E2E con CDP
-                self.logger.info("🌐 Ejecutando tests E2E con CDP...")
-                e2e_result = self._run_e2e_tests(task)
-                execution_record["steps"].append({
-                    "step": "e2e_tests",
-                    "success": e2e_result["success"],
-                    "details": e2e_result
-                })
-                
-                if not e2e_result["success"]:
-                    if attempt < max_retries - 1:
-                        self.logger.warning("⚠️  Tests E2E fallaron, reintentando...")
-                        continue
-                    else:
-                        raise Exception("Tests E2E fallaron")
-                
-                # 4. Validar visualmente con IA
-                if self.config.get("validation", {}).get("visual", {}).get("enabled", True):
-                    self.logger.info("👁️  Validando visualmente con IA...")
-                    visual_result = self._validate_visual(task, e2e_result.get("screenshots", []))
-                    execution_record["steps"].append({
-                        "step": "visual_validation",
-                        "success": visual_result["success"],
-                        "details": visual_result
-                    })
-                    
-                    if not visual_result["success"]:
-                        if attempt < max_retries - 1:
-                            self.logger.warning("⚠️  Validación visual falló, reintentando...")
-                            continue
-                        else:
-                            raise Exception("Validación visual falló")
-                
-                # ¡Éxito!
-                task.status = "completed"
-                task.completed_at = datetime.now()
-                task.artifacts = e2e_result.get("screenshots", [])
-                self.parser.update_task_status(task, "completed")
-                
-                execution_record["completed_at"] = task.completed_at.isoformat()
-                execution_record["success"] = True
-                execution_record["implementation_summary"] = implementation_result.get("output", "")
-                self.execution_log.append(execution_record)
-                
-                self.logger.info(f"✅ Tarea {task.id} completada exitosamente!")
-                return True
-                
-            except Exception as e:
-                self.logger.error(f"❌ Error en intento {attempt + 1}: {e}")
-                task.retry_count += 1
-                
-                if attempt == max_retries - 1:
-                    # Último intento falló
-                    task.status = "failed"
-                    task.error_message = str(e)
-                    self.parser.update_task_status(task, "failed", str(e))
-                    
-                    execution_record["completed_at"] = datetime.now().isoformat()
-                    execution_record["success"] = False
-                    execution_record["error"] = str(e)
-                    self.execution_log.append(execution_record)
-                    
-                    self.logger.error(f"❌ Tarea {task.id} falló después de {max_retries} intentos")
-                    return False
+            if not visual_result["success"]:
+                if not is_last_attempt:
+                    self.logger.warning("⚠️  Validación visual falló, reintentando...")
+                    return None
+                else:
+                    raise Exception("Validación visual falló")
         
-        return False
+        return e2e_result
+    
+    def _complete_task(self, task: Task, implementation_result: Dict, e2e_result: Dict, execution_record: Dict) -> bool:
+        """Marca la tarea como completada y registra la ejecución"""
+        task.status = "completed"
+        task.completed_at = datetime.now()
+        task.artifacts = e2e_result.get("screenshots", [])
+        self.set_task_status(task, "completed")
+        
+        execution_record["completed_at"] = task.completed_at.isoformat()
+        execution_record["success"] = True
+        execution_record["implementation_summary"] = implementation_result.get("output", "")
+        self.execution_log.append(execution_record)
+        
+        self.logger.info(f"✅ Tarea {task.id} completada exitosamente!")
+        return True
+    
+    def _handle_attempt_error(self, task: Task, attempt: int, error: Exception, execution_record: Dict) -> bool:
+        """Registra el error de un intento. Devuelve True si la tarea queda fallida."""
+        max_retries = self.config.get("orchestrator", {}).get("max_retries", 3)
+        
+        self.logger.error(f"❌ Error en intento {attempt + 1}: {error}")
+        task.retry_count += 1
+        
+        if attempt < max_retries - 1:
+            return False
+        
+        # Último intento falló
+        task.status = "failed"
+        task.error_message = str(error)
+        self.set_task_status(task, "failed", str(error))
+        
+        execution_record["completed_at"] = datetime.now().isoformat()
+        execution_record["success"] = False
+        execution_record["error"] = str(error)
+        self.execution_log.append(execution_record)
+        
+        self.logger.error(f"❌ Tarea {task.id} falló después de {max_retries} intentos")
+        return True
     
     def _run_implementation(self, task: Task, attempt: int) -> Dict:
         """Ejecuta la implementación usando el ToolCallingAgent"""
+        system_prompt, task_prompt = self._prepare_implementation(task, attempt)
+        
+        # Ejecutar Agent Loop
+        with tracing.span("implementation") as stage:
+            result = self.opencode.run_task(task_id=task.id, system_prompt=system_prompt, task_prompt=task_prompt, logs_dir=str(self.log_dir))
+            stage.set(status=result.get("status"), iterations=result.get("iterations"))
         
+        return self._implementation_result(result)
+    
+    async def _run_implementation_async(self, task: Task, attempt: int) -> Dict:
+        """Ejecuta la implementación usando el AsyncToolCallingAgent"""
+        system_prompt, task_prompt = self._prepare_implementation(task, attempt)
+        
+        with tracing.span("implementation") as stage:
+            result = await self._get_async_agent().run_task(task_id=task.id, system_prompt=system_prompt, task_prompt=task_prompt, logs_dir=str(self.log_dir))
+            stage.set(status=result.get("status"), iterations=result.get("iterations"))
+        
+        return self._implementation_result(result)
+    
+    def _prepare_implementation(self, task: Task, attempt: int):
+        """Construye (system_prompt, task_prompt) para el agente de implementación"""
         # Preparar prompt con contexto
         system_prompt = "Eres un agente de software autónomo. Implementa la tarea basándote estrictamente en los requisitos. Usa herramientas como escribir archivos y comandos de terminal. CUANDO TERMINES, llama OBLIGATORIAMENTE a finish_task()."
         task_prompt = self._build_implementation_prompt(task, attempt)
@@ -347,10 +787,10 @@ class TaskEngine:
             context_str += "---\n\n"
             task_prompt = context_str + task_prompt
         
-        # Ejecutar Agent Loop
-        result = self.opencode.run_task(task_id=task.id, system_prompt=system_prompt, task_prompt=task_prompt, logs_dir=str(self.log_dir))
-        
-        # Evaluar resultado
+        return system_prompt, task_prompt
+    
+    def _implementation_result(self, result: Dict) -> Dict:
+        """Evalúa el resultado devuelto por el agente"""
         success = result.get("status") == "completed"
         
         return {
@@ -359,6 +799,20 @@ class TaskEngine:
             "error": result.get("summary", "") if not success else None
         }
     
+    def _get_async_agent(self) -> "AsyncToolCallingAgent":
+        """Crea bajo demanda el agente asíncrono (solo lo usa el runner asyncio)"""
+        if self.async_agent is None:
+            from .tool_calling_agent import AsyncToolCallingAgent
+            self.async_agent = AsyncToolCallingAgent(
+                model=self.config.get("opencode", {}).get("model", "kimi-k2.5-free"),
+                provider=self.config.get("opencode", {}).get("provider", "zen"),
+                max_iterations=self.config.get("orchestrator", {}).get("max_iterations", 15),
+                tasks_dir=str(self.tasks_dir),
+                max_parallel_tools=self.config.get("orchestrator", {}).get("max_parallel_tools", 4),
+                memory_config=self.config.get("memory", {})
+            )
+        return self.async_agent
+    
     def _build_implementation_prompt(self, task: Task, attempt: int) -> str:
         """Construye el prompt para OpenCode"""
         prompt_parts = [
@@ -403,48 +857,23 @@ class TaskEngine:
         
         return "\n".join(prompt_parts)
     
-    def _run_unit_tests(self, task: Task) -> Dict:
-        """Ejecuta tests unitarios"""
+    def _run_unit_tests(self, task: Task, attempt: int = 0) -> Dict:
+        """Ejecuta tests unitarios (en paralelo, con timeouts y salida volcada a disco)"""
         if not task.unit_tests:
             return {"success": True, "message": "No hay tests unitarios definidos"}
         
-        import subprocess
-        import os
-        
-        results = []
-        for test_cmd in task.unit_tests:
-            try:
-                # Ejecutamos con subprocess ya que OpenCodeRunner ya no existe
-                self.logger.info(f"    $ {test_cmd}")
-                proc = subprocess.run(
-                    test_cmd, 
-                    shell=True, 
-                    capture_output=True, 
-                    text=True,
-                    cwd=os.getcwd()
-                )
-                
-                success = proc.returncode == 0
-                output = proc.stdout + "\n" + proc.stderr
-                
-                results.append({
-                    "command": test_cmd,
-                    "success": success,
-                    "output": output
-                })
-            except Exception as e:
-                results.append({
-                    "command": test_cmd,
-                    "success": False,
-                    "output": str(e)
-                })
-        
-        all_passed = all(r["success"] for r in results)
-        
-        return {
-            "success": all_passed,
-            "tests": results
-        }
+        log_dir = self.log_dir / "unit-tests" / task.id / f"attempt-{attempt + 1}"
+        return self.command_runner.run(task.unit_tests, log_dir)
+    
+    @staticmethod
+    def _unit_test_failures(unit_test_result: Dict) -> str:
+        """Resumen de los comandos fallidos (solo la cola de su salida) para el prompt de reintento"""
+        parts = ["Tests unitarios fallaron:"]
+        for test in unit_test_result.get("tests", []):
+            if not test["success"]:
+                status = "timeout" if test.get("timed_out") else f"exit {test.get('returncode')}"
+                parts.append(f"$ {test['command']} ({status})\n{test['output']}")
+        return "\n\n".join(parts)
     
     def _run_e2e_tests(self, task: Task) -> Dict:
         """Ejecuta tests E2E con CDP"""
@@ -452,87 +881,106 @@ class TaskEngine:
             return {"success": True, "message": "No hay tests E2E definidos", "screenshots": []}
         
         # Asegurar CDP está disponible
-        if not self.cdp.is_available():
+        if not self.browser_pool.is_available():
             return {
                 "success": False,
-                "error": "CDP Controller no disponible. Asegúrate de que Chrome esté ejecutándose con --remote-debugging-port=9222"
+                "error": "Chrome CDP no disponible. Asegúrate de que Chrome esté ejecutándose con --remote-debugging-port=9222"
             }
         
-        # Ejecutar steps
+        # Pestaña aislada del pool: varias tareas pueden validar a la vez
+        with ExitStack() as stack:
+            # Solo la obtención de la pestaña se reporta así; los errores de los steps
+            # o de la liberación llegan con su causa real
+            try:
+                cdp = stack.enter_context(self.browser_pool.lease())
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"No se pudo obtener una pestaña de Chrome: {e}",
+                    "screenshots": []
+                }
+            return self._run_e2e_steps(task, cdp)
+    
+    def _run_e2e_steps(self, task: Task, cdp: "CDPWrapper") -> Dict:
+        """Ejecuta los steps E2E de una tarea sobre una pestaña prestada"""
         screenshots = []
-        console_errors = []
+        regions = {}
         performance_metrics = {}
         
         try:
+            # Suscribirse a consola y rendimiento antes del primer step
+            cdp.start_capture()
+            
             for step in task.e2e_tests.steps:
                 self.logger.info(f"  - Ejecutando: {step.action}")
                 
-                if step.action == "navigate":
-                    url = step.params.get("url") or step.params.get("value")
-                    self.cdp.navigate(url)
-                
-                elif step.action == "screenshot":
-                    filename = step.params.get("filename") or step.params.get("value")
-                    width = step.params.get("width")
-                    height = step.params.get("height")
+                with tracing.span(step.action, cat="e2e_step"):
+                    if step.action == "navigate":
+                        url = step.params.get("url") or step.params.get("value")
+                        cdp.navigate(
+                            url,
+                            wait_until=step.params.get("wait_until"),
+                            selector=step.params.get("wait_for"),
+                            timeout=self._step_timeout(step.params)
+                        )
                     
-                    screenshot_path = self._get_screenshot_path(task.id, filename)
-                    self.cdp.screenshot(screenshot_path, width=width, height=height)
-                    screenshots.append(str(screenshot_path))
-                
-                elif step.action == "eval":
-                    code = step.params.get("code") or step.params.get("value")
-                    result = self.cdp.evaluate(code)
+                    elif step.action == "screenshot":
+                        filename = step.params.get("filename") or step.params.get("value")
+                        width = step.params.get("width")
+                        height = step.params.get("height")
+                        
+                        screenshot_path = self._get_screenshot_path(task.id, filename)
+                        cdp.screenshot(screenshot_path, width=width, height=height)
+                        screenshots.append(str(screenshot_path))
+                        # Región de interés {x, y, width, height}: la validación visual recorta a ella
+                        if step.params.get("region"):
+                            regions[str(screenshot_path)] = step.params["region"]
                     
-                    # Verificar expectativa si existe
-                    if "expect" in step.params:
-                        expected = step.params["expect"]
-                        if result != expected:
-                            return {
-                                "success": False,
-                                "error": f"Eval result mismatch. Expected: {expected}, Got: {result}",
-                                "screenshots": screenshots
-                            }
-                
-                elif step.action == "wait":
-                    ms = step.params.get("milliseconds", 1000)
-                    import time
-                    time.sleep(ms / 1000)
-                
-                elif step.action == "click":
-                    selector = step.params.get("selector") or step.params.get("value")
-                    self.cdp.click(selector)
+                    elif step.action == "eval":
+                        code = step.params.get("code") or step.params.get("value")
+                        result = cdp.evaluate(code)
+                        
+                        # Verificar expectativa si existe
+                        if "expect" in step.params:
+                            expected = step.params["expect"]
+                            if result != expected:
+                                return {
+                                    "success": False,
+                                    "error": f"Eval result mismatch. Expected: {expected}, Got: {result}",
+                                    "screenshots": screenshots
+                                }
+                    
+                    elif step.action == "wait":
+                        self._run_wait_step(cdp, step.params)
+                    
+                    elif step.action == "click":
+                        selector = step.params.get("selector") or step.params.get("value")
+                        cdp.click(selector)
             
-            # Verificar console errors
-            if task.e2e_tests.console_checks.fail_on_error:
-                console_logs = self.cdp.get_console_logs()
-                errors = [log for log in console_logs if log.get("level") == "error"]
-                
-                if errors:
-                    return {
-                        "success": False,
-                        "error": f"Console errors detected: {errors}",
-                        "screenshots": screenshots
-                    }
+            # Verificar consola y métricas capturadas durante los steps
+            console_logs = cdp.get_console_logs()
+            problems = self._check_console(task.e2e_tests.console_checks, console_logs)
             
-            # Verificar métricas de performance
-            if any([task.e2e_tests.performance_thresholds.lcp,
-                   task.e2e_tests.performance_thresholds.cls,
-                   task.e2e_tests.performance_thresholds.fcp]):
-                metrics = self.cdp.get_performance_metrics()
-                
-                if task.e2e_tests.performance_thresholds.lcp:
-                    if metrics.get("lcp", 0) > task.e2e_tests.performance_thresholds.lcp:
-                        return {
-                            "success": False,
-                            "error": f"LCP {metrics.get('lcp')}ms excede umbral {task.e2e_tests.performance_thresholds.lcp}ms",
-                            "screenshots": screenshots
-                        }
+            thresholds = task.e2e_tests.performance_thresholds
+            if any(getattr(thresholds, name) is not None for name in ("lcp", "cls", "fcp", "ttfb")):
+                performance_metrics = cdp.get_performance_metrics()
+                problems += self._check_performance(thresholds, performance_metrics)
+            
+            if problems:
+                return {
+                    "success": False,
+                    "error": "; ".join(problems),
+                    "screenshots": screenshots,
+                    "metrics": performance_metrics,
+                    "console": console_logs
+                }
             
             return {
                 "success": True,
                 "screenshots": screenshots,
-                "metrics": performance_metrics
+                "regions": regions,
+                "metrics": performance_metrics,
+                "console": console_logs
             }
             
         except Exception as e:
@@ -542,29 +990,100 @@ class TaskEngine:
                 "screenshots": screenshots
             }
     
-    def _validate_visual(self, task: Task, screenshots: List[str]) -> Dict:
+    def _check_console(self, checks, console_logs: List[Dict]) -> List[str]:
+        """Errores y warnings de consola no permitidos (allowed_warnings de la tarea y del config)"""
+        allowed = list(checks.allowed_warnings or [])
+        allowed += self.config.get("validation", {}).get("console", {}).get("allowed_warnings", [])
+        
+        def is_allowed(entry):
+            return any(pattern in entry.get("text", "") for pattern in allowed)
+        
+        problems = []
+        if checks.fail_on_error:
+            errors = [e for e in console_logs if e.get("level") == "error" and not is_allowed(e)]
+            if errors:
+                problems.append(f"Console errors detected: {[e['text'] for e in errors]}")
+        
+        warnings = [e for e in console_logs if e.get("level") == "warning" and not is_allowed(e)]
+        if warnings and checks.allowed_warnings:
+            # Con lista de warnings permitidos, cualquier otro warning es un fallo
+            problems.append(f"Console warnings no permitidos: {[e['text'] for e in warnings]}")
+        elif warnings:
+            self.logger.warning(f"⚠️  {len(warnings)} warnings de consola")
+        
+        return problems
+    
+    def _check_performance(self, thresholds, metrics: Dict) -> List[str]:
+        """Compara lcp, cls, fcp y ttfb con los umbrales de la tarea"""
+        problems = []
+        for name, unit in (("lcp", "ms"), ("cls", ""), ("fcp", "ms"), ("ttfb", "ms")):
+            limit = getattr(thresholds, name)
+            if limit is None:
+                continue
+            if name not in metrics:
+                self.logger.warning(f"⚠️  Métrica {name.upper()} no disponible, no se puede verificar")
+                continue
+            if metrics[name] > limit:
+                problems.append(f"{name.upper()} {metrics[name]}{unit} excede umbral {limit}{unit}")
+        return problems
+    
+    @staticmethod
+    def _step_timeout(params: Dict) -> Optional[float]:
+        """Timeout de un step E2E (en ms en el YAML) convertido a segundos"""
+        timeout = params.get("timeout")
+        return timeout / 1000 if timeout else None
+
+    def _run_wait_step(self, cdp: "CDPWrapper", params: Dict):
+        """
+        Step `wait` basado en condiciones en lugar de pausas fijas:
+          selector: espera a que exista el elemento
+          condition: espera a que la expresión JS sea truthy
+          until: load | networkidle
+          milliseconds: pausa fija (compatibilidad)
+        La forma corta `wait: 500` es una pausa y `wait: "#app"` un selector.
+        """
+        timeout = self._step_timeout(params)
+        value = params.get("value")
+
+        if params.get("selector") or isinstance(value, str):
+            cdp.wait_for_selector(params.get("selector") or value, timeout=timeout)
+        elif params.get("condition"):
+            cdp.wait_for_function(params["condition"], timeout=timeout)
+        elif params.get("until") == "load":
+            cdp.wait_for_load(timeout=timeout)
+        elif params.get("until") == "networkidle":
+            cdp.wait_for_network_idle(timeout=timeout)
+        elif params.get("until"):
+            raise ValueError(f"wait until desconocido '{params['until']}'. Usa load o networkidle")
+        else:
+            ms = params.get("milliseconds") or value or 1000
+            time.sleep(ms / 1000)
+
+    def _validate_visual(self, task: Task, screenshots: List[str], regions: Optional[Dict] = None) -> Dict:
         """Valida visualmente usando IA"""
         if not screenshots:
             return {"success": True, "message": "No hay screenshots para validar"}
         
-        results = []
-        for screenshot_path in screenshots:
-            result = self.visual_validator.validate(
-                screenshot_path,
-                task.description,
-                task.acceptance_criteria
-            )
-            results.append({
-                "screenshot": screenshot_path,
-                "valid": result.get("valid", False),
-                "feedback": result.get("feedback", "")
-            })
-        
-        all_valid = all(r["valid"] for r in results)
+        # Las capturas se agrupan en lotes: una petición al modelo por lote
+        batch_result = self.visual_validator.validate_multiple(
+            screenshots,
+            task.description,
+            task.acceptance_criteria,
+            regions=regions
+        )
+        results = [
+            {
+                "screenshot": r["screenshot"],
+                "valid": r.get("valid", False),
+                "feedback": r.get("feedback", "")
+            }
+            for r in batch_result["validations"]
+        ]
         
         return {
-            "success": all_valid,
-            "validations": results
+            "success": batch_result["valid"],
+            "validations": results,
+            "cache_hits": batch_result.get("cache_hits", 0)
         }
     
     def _get_screenshot_path(self, task_id: str, filename: str) -> Path:
@@ -2,13 +2,19 @@
 Task Parser - Parsea archivos markdown de tareas en objetos Python
 """
 
+import os
 import re
-import yaml
+import copy
+import math
+import logging
 from pathlib import Path
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 
+from .parse_cache import ParseCache
+from . import yaml_io
+
 
 @dataclass
 class PerformanceThresholds:
@@ -59,11 +65,64 @@ class Task:
     artifacts: List[str] = field(default_factory=list)
 
 
+FRONTMATTER_RE = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+
+# Campos de Task que salen del fichero (el resto es estado de ejecución)
+PARSED_FIELDS = (
+    "id", "title", "status", "priority", "dependencies", "estimated_time", "description",
+    "acceptance_criteria", "unit_tests", "e2e_tests", "definition_of_done",
+)
+
+
+def task_to_dict(task: Task) -> Dict[str, Any]:
+    """Campos parseados de una tarea como dict serializable"""
+    data = {name: copy.deepcopy(getattr(task, name)) for name in PARSED_FIELDS}
+    data["e2e_tests"] = asdict(task.e2e_tests)
+    return data
+
+
+def task_from_dict(data: Dict[str, Any], file_path: Path) -> Task:
+    """Reconstruye una tarea desde task_to_dict"""
+    # Copia: las tareas devueltas no comparten listas con la caché
+    fields = copy.deepcopy(data)
+    e2e = fields["e2e_tests"]
+    fields["e2e_tests"] = CDPTest(
+        steps=[CDPStep(**step) for step in e2e["steps"]],
+        console_checks=ConsoleChecks(**e2e["console_checks"]),
+        performance_thresholds=PerformanceThresholds(**e2e["performance_thresholds"])
+    )
+    return Task(**fields, file_path=file_path)
+
+
+def _parse_chunk(task_files: List[Path]) -> List[Tuple[Optional[Task], Optional[str]]]:
+    """Parsea un trozo de archivos (también en procesos del pool): (tarea, None) o (None, error)"""
+    parser = TaskParser(Path("."))
+    results = []
+    for task_file in task_files:
+        try:
+            results.append((parser.parse_task_file(task_file), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
 class TaskParser:
     """Parsea archivos markdown de tareas"""
     
-    def __init__(self, tasks_dir: Path):
+    def __init__(
+        self,
+        tasks_dir: Path,
+        cache_path: Optional[str] = None,
+        parallel_threshold: int = 500,
+        max_workers: Optional[int] = None
+    ):
         self.tasks_dir = Path(tasks_dir)
+        # Con cache_path solo se re-parsean los archivos cuyo mtime o tamaño cambió
+        self.cache = ParseCache(cache_path) if cache_path else None
+        # Con muchos archivos por parsear, el YAML (CPU) se reparte entre procesos
+        self.parallel_threshold = parallel_threshold
+        self.max_workers = max_workers
+        self.logger = logging.getLogger("TaskParser")
     
     def parse_all_tasks(self) -> List[Task]:
         """Parsea todas las tareas del directorio"""
@@ -72,24 +131,74 @@ class TaskParser:
         if not self.tasks_dir.exists():
             return tasks
         
-        for task_file in sorted(self.tasks_dir.glob("*.md")):
+        task_files = sorted(self.tasks_dir.glob("*.md"))
+        parsed: Dict[Path, Task] = {}
+        errors: Dict[Path, str] = {}
+        
+        # Primero la caché; solo los archivos nuevos o modificados se parsean
+        pending = []
+        for task_file in task_files:
             try:
-                task = self.parse_task_file(task_file)
-                tasks.append(task)
+                stat = task_file.stat() if self.cache is not None else None
+                cached = self.cache.get(task_file, stat) if self.cache is not None else None
             except Exception as e:
-                print(f"❌ Error parseando {task_file}: {e}")
+                errors[task_file] = str(e)
+                continue
+            if cached is not None:
+                parsed[task_file] = task_from_dict(cached, task_file)
+            else:
+                pending.append((task_file, stat))
+        
+        results = self._parse_files([task_file for task_file, _ in pending])
+        for (task_file, stat), (task, error) in zip(pending, results):
+            if error is not None:
+                errors[task_file] = error
+                continue
+            parsed[task_file] = task
+            if self.cache is not None:
+                self.cache.put(task_file, stat, task_to_dict(task))
+        
+        for task_file in task_files:
+            if task_file in parsed:
+                tasks.append(parsed[task_file])
+            elif task_file in errors:
+                print(f"❌ Error parseando {task_file}: {errors[task_file]}")
+        
+        if self.cache is not None:
+            self.cache.prune(task_files)
+            self.cache.save()
         
         return tasks
     
+    def _parse_files(self, task_files: List[Path]) -> List[Tuple[Optional[Task], Optional[str]]]:
+        """Parsea una lista de archivos; por encima del umbral, en un pool de procesos"""
+        workers = self.max_workers or os.cpu_count() or 1
+        if len(task_files) < self.parallel_threshold or workers < 2:
+            return _parse_chunk(task_files)
+        
+        # multiprocessing solo se importa si de verdad hace falta el pool
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        
+        # Trozos de varios archivos: amortizan el envío de cada tarea entre procesos
+        chunk_size = max(1, math.ceil(len(task_files) / (workers * 4)))
+        chunks = [task_files[i:i + chunk_size] for i in range(0, len(task_files), chunk_size)]
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                return [result for chunk in pool.map(_parse_chunk, chunks) for result in chunk]
+        except (OSError, BrokenProcessPool) as e:
+            self.logger.warning(f"⚠️  Pool de procesos no disponible, parseo secuencial: {e}")
+            return _parse_chunk(task_files)
+    
     def parse_task_file(self, file_path: Path) -> Task:
         """Parsea un archivo de tarea individual"""
         content = file_path.read_text(encoding="utf-8")
         
         # Extraer frontmatter YAML
-        frontmatter_match = re.match(r'^---\s*\n(.*?)\n---\s*\n', content, re.DOTALL)
+        frontmatter_match = FRONTMATTER_RE.match(content)
         
         if frontmatter_match:
-            frontmatter = yaml.safe_load(frontmatter_match.group(1))
+            frontmatter = yaml_io.safe_load(frontmatter_match.group(1))
             body = content[frontmatter_match.end():]
         else:
             frontmatter = {}
@@ -128,6 +237,11 @@ class TaskParser:
         
         return task
     
+    def read_frontmatter(self, file_path: Path) -> Dict[str, Any]:
+        """Solo el frontmatter YAML de un archivo (sin secciones ni bloque E2E)"""
+        match = FRONTMATTER_RE.match(file_path.read_text(encoding="utf-8"))
+        return (yaml_io.safe_load(match.group(1)) or {}) if match else {}
+    
     def _parse_sections(self, content: str) -> Dict[str, str]:
         """Parsea secciones markdown (## Título)"""
         sections = {}
@@ -178,8 +292,8 @@ class TaskParser:
             return CDPTest()
         
         try:
-            config = yaml.safe_load(yaml_match.group(1))
-        except yaml.YAMLError:
+            config = yaml_io.safe_load(yaml_match.group(1))
+        except yaml_io.YAMLError:
             return CDPTest()
         
         # Parsear steps
@@ -251,11 +365,11 @@ class TaskParser:
         # Actualizar frontmatter
         frontmatter_match = re.match(r'^(---\s*\n)(.*?)(\n---\s*\n)', content, re.DOTALL)
         if frontmatter_match:
-            frontmatter = yaml.safe_load(frontmatter_match.group(2))
+            frontmatter = yaml_io.safe_load(frontmatter_match.group(2))
             frontmatter["status"] = new_status
             
             # Reconstruir archivo
-            new_frontmatter = yaml.dump(frontmatter, default_flow_style=False, allow_unicode=True)
+            new_frontmatter = yaml_io.safe_dump(frontmatter, default_flow_style=False, allow_unicode=True)
             new_content = f"---\n{new_frontmatter}---\n{content[frontmatter_match.end():]}"
             
             task.file_path.write_text(new_content, encoding="utf-8")
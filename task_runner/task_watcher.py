@@ -0,0 +1,223 @@
+"""
+Task Watcher - Detecta archivos de tarea nuevos, editados o borrados
+
+En Linux usa inotify (vía ctypes sobre libc, sin dependencias extra): el
+proceso duerme en select() hasta que el kernel notifica un cambio. En otros
+sistemas, o si inotify no está disponible (p. ej. límite de watches agotado),
+se escanea el directorio cada poll_interval segundos comparando (mtime, tamaño).
+
+Los eventos de un mismo guardado (editores que escriben en varios pasos o
+renombran un temporal) se agrupan durante `debounce` segundos.
+"""
+
+import os
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:
+    ctypes = None
+
+# Constantes de <sys/inotify.h>. Sin IN_CREATE: un archivo recién creado aún
+# puede estar vacío; IN_CLOSE_WRITE llega cuando el escritor lo cierra
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+IN_Q_OVERFLOW = 0x00004000
+EVENT_HEADER = struct.Struct("iIII")
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+
+def _load_libc():
+    """libc con inotify_init1, o None si el sistema no lo soporta"""
+    if ctypes is None or not hasattr(select, "select") or os.name != "posix":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _InotifyBackend:
+    """Eventos del kernel para un directorio (no recursivo)"""
+
+    name = "inotify"
+
+    def __init__(self, directory: Path, libc):
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch falló en {directory}")
+        self.directory = directory
+        self.overflowed = False
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        """Espera hasta timeout segundos por eventos y devuelve las rutas afectadas"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+
+        paths, offset = set(), 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Se perdieron eventos: el llamante debe re-escanear el directorio
+                self.overflowed = True
+            elif name:
+                paths.add(self.directory / os.fsdecode(name))
+        return paths
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class _PollingBackend:
+    """
+    Escaneo periódico del directorio comparando (mtime_ns, tamaño).
+
+    Sin aviso de cierre, un archivo a medio escribir es indistinguible de uno
+    terminado: un cambio solo se notifica cuando su firma se repite en dos
+    escaneos seguidos. Los borrados se notifican en el acto.
+    """
+
+    name = "polling"
+
+    def __init__(self, directory: Path, poll_interval: float):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.overflowed = False
+        self._snapshot = self._scan()
+        self._settling: Dict[Path, Tuple[int, int]] = {}
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        if timeout is None or timeout > 0:
+            time.sleep(self.poll_interval if timeout is None else min(timeout, self.poll_interval))
+        snapshot = self._scan()
+        changed = set()
+        for path in snapshot.keys() | self._snapshot.keys() | self._settling.keys():
+            signature = snapshot.get(path)
+            if signature is None:
+                self._settling.pop(path, None)
+                if path in self._snapshot:
+                    changed.add(path)
+            elif self._settling.get(path) == signature:
+                del self._settling[path]
+                changed.add(path)
+            elif signature != self._snapshot.get(path) or path in self._settling:
+                self._settling[path] = signature
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class TaskWatcher:
+    """Cambios en los *.md de un directorio de tareas"""
+
+    def __init__(self, tasks_dir: Path, config: Optional[Dict] = None):
+        config = config or {}
+        self.tasks_dir = Path(tasks_dir)
+        self.debounce = config.get("debounce", 0.2)
+        self.logger = logging.getLogger("TaskWatcher")
+        self.tasks_dir.mkdir(parents=True, exist_ok=True)
+
+        backend = config.get("backend", "auto")
+        poll_interval = config.get("poll_interval", 1.0)
+        self.backend = None
+        if backend in ("auto", "inotify"):
+            libc = _load_libc()
+            try:
+                if libc is None:
+                    raise OSError("inotify no disponible en este sistema")
+                self.backend = _InotifyBackend(self.tasks_dir, libc)
+            except OSError as e:
+                if backend == "inotify":
+                    raise
+                self.logger.warning(f"⚠️  {e}: se usa polling cada {poll_interval}s")
+        if self.backend is None:
+            self.backend = _PollingBackend(self.tasks_dir, poll_interval)
+        self._lock = threading.Lock()
+        # Tareas conocidas: tras un overflow de inotify permiten reportar también los borrados
+        self._known: Set[Path] = set(self.tasks_dir.glob("*.md"))
+        self.logger.info(f"👀 Vigilando {self.tasks_dir} ({self.backend.name})")
+
+    def changes(self, timeout: Optional[float] = None) -> Set[Path]:
+        """
+        Archivos *.md creados, modificados o borrados.
+
+        Espera hasta `timeout` segundos (None: hasta el primer cambio, 0: sin
+        esperar). Tras el primer evento sigue agrupando durante `debounce`.
+        """
+        with self._lock:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            paths = self.backend.read(timeout)
+            while not paths and not self.backend.overflowed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                paths = self.backend.read(remaining)
+            if paths and self.debounce:
+                deadline = time.monotonic() + self.debounce
+                remaining = self.debounce
+                while remaining > 0:
+                    paths |= self.backend.read(remaining)
+                    remaining = deadline - time.monotonic()
+            if self.backend.overflowed:
+                # Eventos perdidos: todo lo que existe y todo lo que ya no está
+                self.backend.overflowed = False
+                existing = set(self.tasks_dir.glob("*.md"))
+                paths |= existing | (self._known - existing)
+            changed = {path for path in paths if path.suffix == ".md"}
+            for path in changed:
+                if path.exists():
+                    self._known.add(path)
+                else:
+                    self._known.discard(path)
+            return changed
+
+    def close(self):
+        with self._lock:
+            self.backend.close()
@@ -0,0 +1,195 @@
+"""
+Tokenizer - Conteo de tokens para la presión de memoria SMMA
+
+Backends:
+  - heuristic: len(texto) / 3.5, sin dependencias (comportamiento histórico)
+  - bpe: BPE a nivel de byte cargado desde un vocabulario local en formato
+    .tiktoken (p.ej. cl100k_base.tiktoken). Usa el paquete `tiktoken` si está
+    instalado y, si no, una implementación en Python puro del mismo algoritmo.
+"""
+
+import os
+import re
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+logger = logging.getLogger(__name__)
+
+# Patrón de pre-tokenización de cl100k_base
+CL100K_PATTERN = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+
+# Aproximación con `re` estándar (sin \p{...}): letras = [^\W\d_], números = \d
+CL100K_PATTERN_STDLIB = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|(?:[^\r\n\w]|_)?[^\W\d_]+|\d{1,3}| ?(?:[^\s\w]|_)+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+
+
+class Tokenizer:
+    """Interfaz común de los backends de conteo"""
+
+    name = "base"
+
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+
+class HeuristicTokenizer(Tokenizer):
+    """1 token ≈ 4 caracteres en inglés/código, 3 en español: usamos 3.5"""
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return max(1, int(len(text) / 3.5))
+
+
+def load_vocab(vocab_file: str) -> Dict[bytes, int]:
+    """Carga un vocabulario .tiktoken (una línea `<token base64> <rank>` por entrada)"""
+    ranks = {}
+    with open(vocab_file, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+class BPETokenizer(Tokenizer):
+    """BPE a nivel de byte desde un vocabulario local"""
+
+    name = "bpe"
+
+    def __init__(self, vocab_file: str, pattern: Optional[str] = None, piece_cache_size: int = 50000):
+        self.vocab_file = vocab_file
+        self.ranks = load_vocab(vocab_file)
+        self._encoding = None
+
+        if tiktoken is not None:
+            self._encoding = tiktoken.Encoding(
+                name=os.path.basename(vocab_file),
+                pat_str=pattern or CL100K_PATTERN,
+                mergeable_ranks=self.ranks,
+                special_tokens={}
+            )
+        elif regex is not None:
+            self._pattern = regex.compile(pattern or CL100K_PATTERN)
+        else:
+            self._pattern = re.compile(pattern or CL100K_PATTERN_STDLIB)
+
+        # Los mismos fragmentos (palabras, indentación) se repiten muchísimo en código
+        self._piece_cache: Dict[bytes, int] = {}
+        self._piece_cache_size = piece_cache_size
+
+    @property
+    def native(self) -> bool:
+        """True si el conteo lo hace la extensión nativa de tiktoken"""
+        return self._encoding is not None
+
+    def _bpe_count(self, piece: bytes) -> int:
+        if piece in self.ranks:
+            return 1
+
+        cached = self._piece_cache.get(piece)
+        if cached is not None:
+            return cached
+
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_rank = None
+            best_i = -1
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_i = i
+            if best_i < 0:
+                break
+            parts[best_i:best_i + 2] = [parts[best_i] + parts[best_i + 1]]
+
+        if len(self._piece_cache) >= self._piece_cache_size:
+            self._piece_cache.clear()
+        self._piece_cache[piece] = len(parts)
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode_ordinary(text))
+        return sum(self._bpe_count(piece.encode("utf-8")) for piece in self._pattern.findall(text))
+
+
+class CachedTokenizer(Tokenizer):
+    """Cache LRU por hash de contenido: salidas de herramientas idénticas se tokenizan una vez"""
+
+    def __init__(self, backend: Tokenizer, max_entries: int = 4096):
+        self.backend = backend
+        self.name = backend.name
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+
+        key = hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        tokens = self.backend.count(text)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tokens
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+
+def create_tokenizer(config: Optional[Dict] = None) -> Tokenizer:
+    """
+    Crea el tokenizer configurado en la sección `memory` del config:
+      tokenizer: heuristic | bpe
+      vocab_file: ruta al vocabulario .tiktoken (requerido para bpe)
+      tokenizer_cache_size: entradas de la cache por contenido
+    Si el backend BPE no puede cargarse se usa la heurística.
+    """
+    config = config or {}
+    backend_name = config.get("tokenizer", "heuristic")
+
+    if backend_name == "bpe":
+        vocab_file = config.get("vocab_file")
+        if not vocab_file or not os.path.exists(vocab_file):
+            logger.warning(f"⚠️  Vocabulario BPE no encontrado ({vocab_file}), usando estimación heurística")
+            return HeuristicTokenizer()
+        try:
+            backend = BPETokenizer(vocab_file)
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo cargar el vocabulario BPE ({e}), usando estimación heurística")
+            return HeuristicTokenizer()
+        return CachedTokenizer(backend, max_entries=config.get("tokenizer_cache_size", 4096))
+
+    if backend_name != "heuristic":
+        logger.warning(f"⚠️  Tokenizer desconocido '{backend_name}', usando estimación heurística")
+    return HeuristicTokenizer()
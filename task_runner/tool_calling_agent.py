@@ -1,20 +1,39 @@
 import os
 import json
+import asyncio
+import functools
 import logging
 import subprocess
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from dotenv import load_dotenv
 
-try:
-    from openai import OpenAI
-except ImportError:
-    logging.warning("El paquete 'openai' no está instalado. Instálalo con 'pip install openai'")
-    OpenAI = None
+from . import tracing
+from .tool_executor import ToolExecutor, ToolCallRequest
+from .tokenizer import create_tokenizer
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
+_env_loaded = False
+
+
+def _load_env():
+    """Carga el .env una vez, al crear el primer agente (no al importar el módulo)"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def _openai_sdk():
+    """Importa el SDK de openai al crear el primer cliente: tarda casi un segundo"""
+    try:
+        import openai
+    except ImportError:
+        logger.warning("El paquete 'openai' no está instalado. Instálalo con 'pip install openai'")
+        return None
+    return openai
+
 class ToolCallingAgent:
     """
     Agente 100% basado en API (Tool Calling) usando la abstracción de OpenAI.
@@ -28,13 +47,22 @@ class ToolCallingAgent:
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
         max_iterations: int = 15,
-        tasks_dir: str = "tasks"
+        tasks_dir: str = "tasks",
+        max_parallel_tools: int = 4,
+        memory_config: Optional[Dict[str, Any]] = None
     ):
         self.model = model
         self.max_iterations = max_iterations
         self.tasks_dir = tasks_dir
+        # Opciones de MemoryManager (durabilidad y buffer de The Tape)
+        self.memory_config = memory_config or {}
+        # Tool calls independientes de un mismo turno se ejecutan concurrentemente
+        self.tool_executor = ToolExecutor(max_workers=max_parallel_tools)
+        # Tokenizer compartido entre tareas (el vocabulario BPE se carga una sola vez)
+        self._tokenizer = None
         
         # Configurar URLs por defecto según el proveedor
+        _load_env()
         if provider == "zen":
             self.base_url = base_url or "https://opencode.ai/zen/v1"
             self.api_key = api_key or os.getenv("ZEN_API_KEY")
@@ -49,17 +77,8 @@ class ToolCallingAgent:
             logger.error(f"No se encontró API Key para el proveedor '{provider}'")
         
         # Instanciar cliente
-        if OpenAI:
-            self.client = OpenAI(
-                base_url=self.base_url,
-                api_key=self.api_key,
-            )
-        else:
-            self.client = None
+        self.client = self._create_client()
 
-
-        self.messages: List[Dict[str, Any]] = []
-        
         # Definición de herramientas (JSON Schema)
         self.tools = [
             {
@@ -226,18 +245,46 @@ class ToolCallingAgent:
             }
         ]
 
+    def _create_client(self):
+        """Crea el cliente de la API (síncrono)"""
+        openai = _openai_sdk()
+        if openai:
+            return openai.OpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+            )
+        return None
 
-    def _execute_tool(self, name: str, args: Dict[str, Any]) -> str:
+    def _check_memory_pressure(self, name: str, memory) -> Optional[str]:
+        """Interceptor SMMA (Fase 4): devuelve un error si la herramienta debe bloquearse."""
+        if memory is None or name in ["prune_messages", "summarize_range", "finish_task"]:
+            return None
+        
+        metrics = memory.get_metrics()
+        # Interceptamos si la presión de memoria supera un límite peligroso (ej. 85%)
+        if metrics["pressure_percent"] > 85.0:
+            logger.warning(f"🚨 INTERCEPTOR SMMA ACTIVO: Bloqueando {name} por falta de memoria ({metrics['pressure_percent']}%)")
+            return f"ERROR CRÍTICO: Contexto al límite ({metrics['pressure_percent']}%). Tienes estrictamente prohibido ejecutar la herramienta '{name}'. Tu siguiente acción OBLIGATORIA debe ser invocar 'summarize_range' o 'prune_messages' para limpiar el historial y liberar tokens."
+        return None
+
+    @staticmethod
+    def _format_command_output(returncode: int, stdout: str, stderr: str) -> str:
+        """Formatea la salida de un comando de terminal para el modelo."""
+        output = f"EXIT CODE: {returncode}\n"
+        if stdout:
+            output += f"STDOUT:\n{stdout}\n"
+        if stderr:
+            output += f"STDERR:\n{stderr}\n"
+            
+        return output.strip() or "Comando ejecutado sin salida (éxito)."
+
+    def _execute_tool(self, name: str, args: Dict[str, Any], memory=None) -> str:
         """Ejecuta una herramienta y devuelve la salida como string."""
         logger.info(f"🛠️ Tool Call: {name}({args})")
         
-        # Interceptor SMMA (Fase 4)
-        if hasattr(self, 'memory') and name not in ["prune_messages", "summarize_range", "finish_task"]:
-            metrics = self.memory.get_metrics()
-            # Interceptamos si la presión de memoria supera un límite peligroso (ej. 85%)
-            if metrics["pressure_percent"] > 85.0:
-                logger.warning(f"🚨 INTERCEPTOR SMMA ACTIVO: Bloqueando {name} por falta de memoria ({metrics['pressure_percent']}%)")
-                return f"ERROR CRÍTICO: Contexto al límite ({metrics['pressure_percent']}%). Tienes estrictamente prohibido ejecutar la herramienta '{name}'. Tu siguiente acción OBLIGATORIA debe ser invocar 'summarize_range' o 'prune_messages' para limpiar el historial y liberar tokens."
+        blocked = self._check_memory_pressure(name, memory)
+        if blocked:
+            return blocked
 
         try:
             if name == "execute_terminal_command":
@@ -254,13 +301,7 @@ class ToolCallingAgent:
                     timeout=120
                 )
                 
-                output = f"EXIT CODE: {result.returncode}\n"
-                if result.stdout:
-                    output += f"STDOUT:\n{result.stdout}\n"
-                if result.stderr:
-                    output += f"STDERR:\n{result.stderr}\n"
-                    
-                return output.strip() or "Comando ejecutado sin salida (éxito)."
+                return self._format_command_output(result.returncode, result.stdout, result.stderr)
 
             elif name == "read_file":
                 path = args.get("path")
@@ -303,14 +344,14 @@ class ToolCallingAgent:
                 message_ids = args.get("message_ids", [])
                 if not isinstance(message_ids, list):
                     return "ERROR: message_ids debe ser una lista de enteros."
-                removed = self.memory.prune_messages(message_ids)
+                removed = memory.prune_messages(message_ids)
                 return f"ÉXITO: Se borraron {removed} mensajes del contexto activo."
                 
             elif name == "summarize_range":
                 start_id = args.get("start_id")
                 end_id = args.get("end_id")
                 summary_text = args.get("summary_text")
-                res = self.memory.summarize_range(start_id, end_id, summary_text)
+                res = memory.summarize_range(start_id, end_id, summary_text)
                 if res.get("success"):
                     return f"ÉXITO: Se resumieron {res['removed_count']} mensajes. Resumen insertado como ID visible {res['new_summary_id']}."
                 else:
@@ -318,7 +359,7 @@ class ToolCallingAgent:
                 
             elif name == "recall_original":
                 message_id = args.get("message_id")
-                res = self.memory.recall_original(message_id)
+                res = memory.recall_original(message_id)
                 if res.get("success"):
                     msg = res.get("message", {})
                     return f"ÉXITO: Mensaje original recuperado de The Tape [ID {res['visible_id']}, timestamp {res['timestamp']}]:\\nRole: {msg.get('role')}\\nContent: {msg.get('content')}"
@@ -332,17 +373,72 @@ class ToolCallingAgent:
         except Exception as e:
             return f"ERROR al ejecutar '{name}': {str(e)}"
 
+    def _create_memory(self, task_id: str, logs_dir: str):
+        """Crea la memoria de trabajo SMMA de una tarea."""
+        from .memory_manager import MemoryManager
+        return MemoryManager(
+            task_id=task_id,
+            logs_dir=logs_dir,
+            max_tokens=200000,
+            target_pressure=0.25,
+            tape_durability=self.memory_config.get("tape_durability", "batch"),
+            tape_buffer_records=self.memory_config.get("tape_buffer_records", 64),
+            tape_flush_interval=self.memory_config.get("tape_flush_interval", 1.0),
+            tokenizer=self._get_tokenizer()
+        )
+
+    def _get_tokenizer(self):
+        """Crea el tokenizer configurado la primera vez que se necesita."""
+        if self._tokenizer is None:
+            self._tokenizer = create_tokenizer(self.memory_config)
+        return self._tokenizer
+
+    @staticmethod
+    def _parse_tool_calls(message) -> List[ToolCallRequest]:
+        """Convierte los tool_calls del SDK en peticiones con argumentos ya decodificados."""
+        calls = []
+        for tool_call in message.tool_calls:
+            try:
+                args = json.loads(tool_call.function.arguments)
+            except json.JSONDecodeError:
+                args = {}
+            calls.append(ToolCallRequest(id=tool_call.id, name=tool_call.function.name, args=args))
+        return calls
+
+    def _build_llm_messages(self, memory) -> List[Any]:
+        """Mensajes activos más el dashboard SMMA (Fase 2) listos para la API."""
+        metrics = memory.get_metrics()
+        messages_to_send = memory.get_active_messages_for_llm()
+        
+        if metrics["message_count"] > 4:
+            dash_content = f"[SISTEMA SMMA] Presión de memoria: {metrics['pressure_percent']}%. Mensajes activos: {metrics['message_count']}."
+            if metrics.get("tokens_by_role"):
+                by_role = ", ".join(f"{role}={tokens}" for role, tokens in sorted(metrics["tokens_by_role"].items()))
+                dash_content += f" Tokens por rol: {by_role}."
+            if metrics["is_critical"]:
+                dash_content += " ALERTA: Acercándose al límite de contexto. Considera usar herramientas de limpieza explícitamente si existen, o resume."
+            messages_to_send.append({"role": "system", "content": dash_content})
+        
+        return messages_to_send
+
     def run_task(self, task_id: str, system_prompt: str, task_prompt: str, logs_dir: str = ".ai-tasks/logs") -> Dict[str, Any]:
         """Inicia el loop de agencia basándonos en la directiva inicial."""
         if not self.client:
             return {"status": "failed", "summary": "No se pudo inicializar OpenAI client (Revisa pip o OPENROUTER_API_KEY)."}
             
-        from .memory_manager import MemoryManager
-        self.memory = MemoryManager(task_id=task_id, logs_dir=logs_dir, max_tokens=200000, target_pressure=0.25)
+        # Memoria local: los workers de _run_parallel comparten esta instancia del agente
+        memory = self._create_memory(task_id, logs_dir)
+        try:
+            return self._agent_loop(memory, system_prompt, task_prompt)
+        finally:
+            # Volcar The Tape al terminar (finish_task, error o límite de iteraciones)
+            memory.close_tape()
 
+    def _agent_loop(self, memory, system_prompt: str, task_prompt: str) -> Dict[str, Any]:
+        """Loop de agencia síncrono sobre una memoria ya creada."""
         # Limpiamos/reiniciamos el historial
-        self.memory.add_message({"role": "system", "content": system_prompt})
-        self.memory.add_message({"role": "user", "content": task_prompt})
+        memory.add_message({"role": "system", "content": system_prompt})
+        memory.add_message({"role": "user", "content": task_prompt})
 
         iteration = 0
         final_status = "failed"
@@ -354,74 +450,52 @@ class ToolCallingAgent:
             
             # Llamamos al modelo
             try:
-                # Fase 2 Dashboard
-                metrics = self.memory.get_metrics()
-                dashboard_msg = None
-                if metrics["message_count"] > 4:
-                    dash_content = f"[SISTEMA SMMA] Presión de memoria: {metrics['pressure_percent']}%. Mensajes activos: {metrics['message_count']}."
-                    if metrics["is_critical"]:
-                        dash_content += " ALERTA: Acercándose al límite de contexto. Considera usar herramientas de limpieza explícitamente si existen, o resume."
-                    dashboard_msg = {"role": "system", "content": dash_content}
-                
-                messages_to_send = self.memory.get_active_messages_for_llm()
-                if dashboard_msg:
-                    messages_to_send.append(dashboard_msg)
-
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages_to_send,
-                    tools=self.tools,
-                    tool_choice="auto"
-                )
+                messages_to_send = self._build_llm_messages(memory)
+
+                with tracing.span("chat.completions", cat="llm", model=self.model, iteration=iteration) as llm_span:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages_to_send,
+                        tools=self.tools,
+                        tool_choice="auto"
+                    )
+                    llm_span.set(**tracing.usage_args(response))
             except Exception as e:
                 logger.error(f"Error llamando a la API: {e}")
                 return {"status": "failed", "summary": f"API Error: {e}"}
 
             message = response.choices[0].message
             # Guardamos respuesta en el historial
-            self.memory.add_message(message) 
+            memory.add_message(message) 
 
             # ¿El modelo pidió ejecutar herramientas?
             if message.tool_calls:
-                for tool_call in message.tool_calls:
-                    func_name = tool_call.function.name
-                    try:
-                        args = json.loads(tool_call.function.arguments)
-                    except json.JSONDecodeError:
-                        args = {}
-                        
-                    # Ejecutar herramienta local
-                    result_string = self._execute_tool(func_name, args)
+                # Oleadas sin conflictos; los resultados se añaden en el orden original
+                for wave in self.tool_executor.plan(self._parse_tool_calls(message)):
+                    results = self.tool_executor.run_wave(wave, functools.partial(self._execute_tool, memory=memory))
                     
-                    # Añadimos resultado al hilo para que la IA lo sepa en la próxima iteración
-                    # self.messages.append({
-                    #    "role": "tool",
-                    #    "tool_call_id": tool_call.id,
-                    #    "name": func_name,
-                    #    "content": result_string
-                    # })
-
-                    tool_msg = {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": func_name,
-                        "content": result_string
-                    }
-                    self.memory.add_message(tool_msg)  # ¡Añádelo a MemoryManager!
-                    
-                    # Interceptar finalización
-                    if func_name == "finish_task":
-                        status_str = args.get("status", "completed")
-                        return {
-                            "status": status_str,
-                            "summary": args.get("summary", "Done."),
-                            "iterations": iteration
+                    for call, result_string in zip(wave, results):
+                        tool_msg = {
+                            "role": "tool",
+                            "tool_call_id": call.id,
+                            "name": call.name,
+                            "content": result_string
                         }
+                        memory.add_message(tool_msg)  # ¡Añádelo a MemoryManager!
+                        
+                        # Interceptar finalización
+                        if call.name == "finish_task":
+                            status_str = call.args.get("status", "completed")
+                            return {
+                                "status": status_str,
+                                "summary": call.args.get("summary", "Done."),
+                                "iterations": iteration
+                            }
             else:
                 # El agente decidió no llamar herramientas y solo respondió texto
                 # A veces lo hacen para dar conversación. Le forzamos a seguir
                 logger.debug(f"IA: {message.content}")
-                self.messages.append({
+                memory.add_message({
                     "role": "user", 
                     "content": "No has llamado a 'finish_task' ni otra herramienta. Por favor, decide qué debes hacer a continuación o finaliza."
                 })
@@ -431,3 +505,134 @@ class ToolCallingAgent:
             "summary": final_summary,
             "iterations": iteration
         }
+
+
+class AsyncToolCallingAgent(ToolCallingAgent):
+    """
+    Variante asyncio del agente sobre AsyncOpenAI.
+    
+    El estado de cada tarea (MemoryManager) vive en la corrutina de run_task y no
+    en la instancia, así que un único agente puede atender cientos de tareas
+    concurrentes desde el mismo event loop sin un hilo por tarea.
+    """
+
+    def _create_client(self):
+        """Crea el cliente de la API (asíncrono)"""
+        openai = _openai_sdk()
+        if openai:
+            return openai.AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+            )
+        return None
+
+    async def _execute_tool_async(self, name: str, args: Dict[str, Any], memory) -> str:
+        """Ejecuta una herramienta sin bloquear el event loop."""
+        if name == "execute_terminal_command":
+            logger.info(f"🛠️ Tool Call: {name}({args})")
+            blocked = self._check_memory_pressure(name, memory)
+            if blocked:
+                return blocked
+            
+            cmd = args.get("command")
+            cwd = args.get("cwd", os.getcwd())
+            try:
+                proc = await asyncio.create_subprocess_shell(
+                    cmd,
+                    cwd=cwd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                try:
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=120)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    return f"ERROR al ejecutar '{name}': Command '{cmd}' timed out after 120 seconds"
+                
+                return self._format_command_output(
+                    proc.returncode,
+                    stdout.decode("utf-8", errors="replace"),
+                    stderr.decode("utf-8", errors="replace")
+                )
+            except Exception as e:
+                return f"ERROR al ejecutar '{name}': {str(e)}"
+        
+        if name in ["read_file", "write_file", "create_subtask"]:
+            # E/S de disco en el pool por defecto del loop
+            return await asyncio.to_thread(self._execute_tool, name, args, memory)
+        
+        # Herramientas SMMA y finish_task operan en memoria
+        return self._execute_tool(name, args, memory)
+
+    async def run_task(self, task_id: str, system_prompt: str, task_prompt: str, logs_dir: str = ".ai-tasks/logs") -> Dict[str, Any]:
+        """Loop de agencia asíncrono; equivalente a ToolCallingAgent.run_task."""
+        if not self.client:
+            return {"status": "failed", "summary": "No se pudo inicializar OpenAI client (Revisa pip o OPENROUTER_API_KEY)."}
+        
+        memory = self._create_memory(task_id, logs_dir)
+        try:
+            return await self._agent_loop_async(task_id, memory, system_prompt, task_prompt)
+        finally:
+            memory.close_tape()
+
+    async def _agent_loop_async(self, task_id: str, memory, system_prompt: str, task_prompt: str) -> Dict[str, Any]:
+        """Loop de agencia asíncrono sobre una memoria ya creada."""
+        memory.add_message({"role": "system", "content": system_prompt})
+        memory.add_message({"role": "user", "content": task_prompt})
+        
+        iteration = 0
+        
+        while iteration < self.max_iterations:
+            iteration += 1
+            logger.info(f"🔄 [{task_id}] Iteración {iteration}/{self.max_iterations}")
+            
+            try:
+                with tracing.span("chat.completions", cat="llm", model=self.model, iteration=iteration) as llm_span:
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=self._build_llm_messages(memory),
+                        tools=self.tools,
+                        tool_choice="auto"
+                    )
+                    llm_span.set(**tracing.usage_args(response))
+            except Exception as e:
+                logger.error(f"Error llamando a la API: {e}")
+                return {"status": "failed", "summary": f"API Error: {e}"}
+            
+            message = response.choices[0].message
+            memory.add_message(message)
+            
+            if message.tool_calls:
+                async def execute(name: str, args: Dict[str, Any]) -> str:
+                    return await self._execute_tool_async(name, args, memory)
+                
+                for wave in self.tool_executor.plan(self._parse_tool_calls(message)):
+                    results = await self.tool_executor.run_wave_async(wave, execute)
+                    
+                    for call, result_string in zip(wave, results):
+                        memory.add_message({
+                            "role": "tool",
+                            "tool_call_id": call.id,
+                            "name": call.name,
+                            "content": result_string
+                        })
+                        
+                        if call.name == "finish_task":
+                            return {
+                                "status": call.args.get("status", "completed"),
+                                "summary": call.args.get("summary", "Done."),
+                                "iterations": iteration
+                            }
+            else:
+                logger.debug(f"IA: {message.content}")
+                memory.add_message({
+                    "role": "user",
+                    "content": "No has llamado a 'finish_task' ni otra herramienta. Por favor, decide qué debes hacer a continuación o finaliza."
+                })
+        
+        return {
+            "status": "failed",
+            "summary": "Límite de iteraciones alcanzado sin un 'finish_task'.",
+            "iterations": iteration
+        }
@@ -0,0 +1,195 @@
+"""
+Tool Executor - Ejecución concurrente de tool calls independientes de un mismo turno
+"""
+
+import os
+import re
+import asyncio
+import logging
+import contextvars
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Awaitable, Optional, Set
+from concurrent.futures import ThreadPoolExecutor
+
+from . import tracing
+
+
+# Herramientas que mutan la memoria del agente o cierran el loop: siempre en solitario
+EXCLUSIVE_TOOLS = {"prune_messages", "summarize_range", "recall_original", "finish_task"}
+
+# Comandos de terminal que solo leen (POSIX, CMD y PowerShell). Sin sort, uniq
+# ni tree: escriben archivos con -o o con un argumento posicional de salida
+READ_ONLY_COMMANDS = {
+    "cat", "head", "tail", "less", "ls", "dir", "type", "pwd", "echo", "wc",
+    "grep", "egrep", "rg", "find", "findstr", "where", "which", "stat",
+    "file", "du", "df", "diff", "cut",
+    "get-content", "get-childitem", "get-location", "select-string", "test-path",
+}
+READ_ONLY_GIT_SUBCOMMANDS = {"status", "log", "diff", "show", "ls-files", "rev-parse", "blame"}
+
+# Opciones (por prefijo) con las que un comando de la lista blanca escribe o ejecuta
+WRITING_OPTIONS = {
+    "find": ("-delete", "-fprint", "-fls", "-exec", "-ok"),
+    "git": ("--output",),
+    "rg": ("--pre",),  # --pre/--pre-glob ejecutan un programa por archivo
+}
+
+# Redirecciones, encadenado (también por salto de línea) o sustitución de comandos:
+# no se puede saber qué escriben
+UNSAFE_SHELL_PATTERN = re.compile(r"[<>;&`\n\r]|\$\(|\|\|")
+
+# Marca de recurso que representa "cualquier archivo"
+ANY_PATH = "*"
+
+
+@dataclass
+class ToolCallRequest:
+    id: str
+    name: str
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+def is_read_only_command(command: Optional[str]) -> bool:
+    """Indica si un comando de terminal es de solo lectura (lista blanca conservadora)"""
+    if not command or UNSAFE_SHELL_PATTERN.search(command):
+        return False
+
+    for segment in command.split("|"):
+        tokens = segment.split()
+        if not tokens:
+            return False
+        program = os.path.basename(tokens[0]).lower()
+        if program.endswith(".exe"):
+            program = program[:-4]
+
+        if program == "git":
+            if len(tokens) < 2 or tokens[1] not in READ_ONLY_GIT_SUBCOMMANDS:
+                return False
+        elif program not in READ_ONLY_COMMANDS:
+            return False
+
+        writing_options = WRITING_OPTIONS.get(program)
+        if writing_options and any(token.lower().startswith(writing_options) for token in tokens[1:]):
+            return False
+
+    return True
+
+
+class ToolExecutor:
+    """
+    Agrupa los tool calls de un turno en oleadas sin conflictos y las ejecuta en un pool acotado.
+
+    Las oleadas respetan el orden original: una llamada solo se adelanta a las
+    anteriores si no comparte recursos con ellas. Los resultados se devuelven en
+    el mismo orden que las llamadas, para añadirlos a la memoria por tool_call_id.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+        self.logger = logging.getLogger("ToolExecutor")
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _resources(self, call: ToolCallRequest):
+        """Devuelve (lecturas, escrituras) de una llamada, o None si debe ir en exclusiva"""
+        if call.name in EXCLUSIVE_TOOLS:
+            return None
+        if call.name == "read_file":
+            return {os.path.abspath(str(call.args.get("path", "")))}, set()
+        if call.name == "write_file":
+            return set(), {os.path.abspath(str(call.args.get("path", "")))}
+        if call.name == "execute_terminal_command" and is_read_only_command(call.args.get("command")):
+            return {ANY_PATH}, set()
+        if call.name == "create_subtask":
+            return set(), {"create_subtask"}
+        return None
+
+    @staticmethod
+    def _conflicts(reads: Set[str], writes: Set[str], wave_reads: Set[str], wave_writes: Set[str]) -> bool:
+        if writes & (wave_reads | wave_writes) or reads & wave_writes:
+            return True
+        if ANY_PATH in reads and wave_writes:
+            return True
+        if ANY_PATH in wave_reads and writes:
+            return True
+        return False
+
+    def plan(self, calls: List[ToolCallRequest]) -> List[List[ToolCallRequest]]:
+        """Parte las llamadas en oleadas ordenadas; dentro de cada oleada no hay conflictos"""
+        # Nada de lo que venga tras finish_task llegaba a ejecutarse: se mantiene
+        for i, call in enumerate(calls):
+            if call.name == "finish_task":
+                calls = calls[:i + 1]
+                break
+
+        waves: List[List[ToolCallRequest]] = []
+        current: List[ToolCallRequest] = []
+        wave_reads: Set[str] = set()
+        wave_writes: Set[str] = set()
+
+        for call in calls:
+            resources = self._resources(call)
+
+            if resources is None:
+                if current:
+                    waves.append(current)
+                waves.append([call])
+                current, wave_reads, wave_writes = [], set(), set()
+                continue
+
+            reads, writes = resources
+            if current and self._conflicts(reads, writes, wave_reads, wave_writes):
+                waves.append(current)
+                current, wave_reads, wave_writes = [], set(), set()
+
+            current.append(call)
+            wave_reads |= reads
+            wave_writes |= writes
+
+        if current:
+            waves.append(current)
+        return waves
+
+    def run_wave(self, wave: List[ToolCallRequest], execute: Callable[[str, Dict[str, Any]], str]) -> List[str]:
+        """Ejecuta una oleada en el pool de hilos y devuelve los resultados en orden"""
+        if len(wave) == 1 or self.max_workers == 1:
+            return [self._run_call(call, execute) for call in wave]
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+
+        self.logger.info(f"⚡ Ejecutando {len(wave)} herramientas en paralelo")
+        # Cada hilo recibe una copia del contexto: sus spans caen en el carril de la tarea
+        futures = [self._pool.submit(contextvars.copy_context().run, self._run_call, call, execute) for call in wave]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _run_call(call: ToolCallRequest, execute: Callable[[str, Dict[str, Any]], str]) -> str:
+        with tracing.span(call.name, cat="tool", call_id=call.id):
+            return execute(call.name, call.args)
+
+    async def run_wave_async(self, wave: List[ToolCallRequest], execute: Callable[[str, Dict[str, Any]], Awaitable[str]]) -> List[str]:
+        """Ejecuta una oleada como corrutinas concurrentes acotadas por max_workers"""
+        if len(wave) == 1:
+            return [await self._run_call_async(wave[0], execute)]
+
+        self.logger.info(f"⚡ Ejecutando {len(wave)} herramientas en paralelo")
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def bounded(call: ToolCallRequest) -> str:
+            async with semaphore:
+                return await self._run_call_async(call, execute, track=f"tool {call.id}")
+
+        return list(await asyncio.gather(*[bounded(call) for call in wave]))
+
+    @staticmethod
+    async def _run_call_async(call: ToolCallRequest, execute: Callable[[str, Dict[str, Any]], Awaitable[str]],
+                              track: Optional[str] = None) -> str:
+        # Las llamadas de una oleada comparten hilo y se solapan: cada una en su propio track
+        with tracing.span(call.name, cat="tool", track=track, call_id=call.id):
+            return await execute(call.name, call.args)
+
+    def shutdown(self):
+        """Libera el pool de hilos"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
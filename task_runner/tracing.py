@@ -0,0 +1,221 @@
+"""
+Tracing - Spans anidados con tiempos y atributos, exportados como Chrome trace
+
+Cada run crea un Tracer; el código instrumentado abre spans con
+`tracing.span(nombre, categoria, **atributos)` sin recibir el tracer como
+parámetro (si no hay ninguno activo, span() no hace nada y cuesta una llamada).
+
+Jerarquía habitual: task → attempt → stage (implementation, unit_tests,
+e2e_tests, visual_validation) → llm / tool / e2e_step → cdp.
+
+Cada tarea tiene su propio carril ("lane"), heredado por los spans hijos vía
+contextvars (vale para hilos que copian el contexto y para tareas asyncio).
+Las corrutinas concurrentes de un mismo hilo abren además un "track" propio:
+en un track los eventos "X" deben anidarse, y dos corrutinas se solapan.
+El archivo es JSON de trace-events (eventos "X" completos), que abren
+chrome://tracing y https://ui.perfetto.dev.
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Carril (normalmente el id de tarea) del span actual
+_lane: contextvars.ContextVar = contextvars.ContextVar("trace_lane", default=None)
+# Sub-track dentro del carril (corrutinas concurrentes en el mismo hilo)
+_track: contextvars.ContextVar = contextvars.ContextVar("trace_track", default=None)
+
+_tracer: Optional["Tracer"] = None
+
+# Categorías resumidas en el reporte (task y attempt se ven en el propio trace)
+SUMMARY_CATEGORIES = ("stage", "llm", "tool", "e2e_step", "cdp")
+
+
+class Span:
+    """Span abierto; se registra como evento completo al salir del bloque with"""
+
+    __slots__ = ("tracer", "name", "cat", "lane", "track", "args", "_start_ns", "_token", "_track_token")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, lane: Optional[str], args: Dict[str, Any],
+                 track: Optional[str] = None):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.lane = lane
+        self.track = track
+        self.args = args
+        self._start_ns = 0
+        self._token = None
+        self._track_token = None
+
+    def set(self, **attrs):
+        """Añade atributos conocidos a mitad del span (p. ej. tokens de la respuesta)"""
+        self.args.update(attrs)
+
+    def __enter__(self) -> "Span":
+        if self.lane is not None:
+            self._token = _lane.set(self.lane)
+        if self.track is not None:
+            self._track_token = _track.set(self.track)
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"[:200]
+        lane, track = _lane.get(), _track.get()
+        if self._track_token is not None:
+            _track.reset(self._track_token)
+        if self._token is not None:
+            _lane.reset(self._token)
+        self.tracer._record(self, lane, track, self._start_ns, end_ns)
+        return False
+
+
+class _NullSpan:
+    """Span sin tracer activo: no mide ni guarda nada"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Acumula los spans de un run y los exporta en formato Chrome trace-event"""
+
+    def __init__(self, max_events: int = 100000):
+        self.max_events = max_events
+        self.pid = os.getpid()
+        self.dropped = 0
+        self._epoch_ns = time.perf_counter_ns()
+        self._started_at = time.time()
+        self._events: List[Dict[str, Any]] = []
+        self._tids: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, cat: str = "stage", lane: Optional[str] = None,
+             track: Optional[str] = None, **args) -> Span:
+        return Span(self, name, cat, lane, args, track)
+
+    def _record(self, span: Span, lane: Optional[str], track: Optional[str], start_ns: int, end_ns: int):
+        # Un track por (carril, hilo, sub-track): los spans de un mismo track deben anidarse en el tiempo
+        thread = threading.current_thread().name
+        key = (lane or thread, thread, track)
+        with self._lock:
+            tid = self._tids.get(key)
+            if tid is None:
+                tid = self._tids[key] = len(self._tids) + 1
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append({
+                "name": span.name,
+                "cat": span.cat,
+                "ph": "X",
+                "ts": (start_ns - self._epoch_ns) / 1000,
+                "dur": (end_ns - start_ns) / 1000,
+                "pid": self.pid,
+                "tid": tid,
+                "args": span.args
+            })
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._events)
+
+    def _metadata(self) -> List[Dict[str, Any]]:
+        """Nombres de proceso y tracks para el visor"""
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                     "args": {"name": "ai-task-orchestrator"}}]
+        for (lane, thread, track), tid in self._tids.items():
+            label = lane if lane == thread else f"{lane} · {thread}"
+            if track is not None:
+                label = f"{label} · {track}"
+            metadata.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": label}})
+        return metadata
+
+    def save(self, path: Path) -> Path:
+        """Escribe el trace (JSON de trace-events) y devuelve su ruta"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            trace = {
+                "traceEvents": self._metadata() + self._events,
+                "displayTimeUnit": "ms",
+                "otherData": {"started_at": self._started_at, "dropped_events": self.dropped}
+            }
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(trace, default=str), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+    def summary(self, categories=SUMMARY_CATEGORIES) -> List[Dict[str, Any]]:
+        """Duración agregada por (categoría, nombre), de mayor a menor tiempo total"""
+        totals: Dict[tuple, Dict[str, Any]] = {}
+        for event in self.events:
+            if event["cat"] not in categories:
+                continue
+            key = (event["cat"], event["name"])
+            entry = totals.setdefault(key, {"cat": key[0], "name": key[1], "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            duration = event["dur"] / 1000
+            entry["count"] += 1
+            entry["total_ms"] += duration
+            entry["max_ms"] = max(entry["max_ms"], duration)
+
+        rows = sorted(totals.values(), key=lambda entry: entry["total_ms"], reverse=True)
+        for entry in rows:
+            entry["mean_ms"] = entry["total_ms"] / entry["count"]
+        return rows
+
+
+def usage_args(response) -> Dict[str, Any]:
+    """Tokens de una respuesta de chat.completions como atributos del span"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    args = {}
+    for name in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = getattr(usage, name, None)
+        if isinstance(value, int):
+            args[name] = value
+    return args
+
+
+def start(max_events: int = 100000) -> Tracer:
+    """Activa un tracer nuevo para el proceso"""
+    global _tracer
+    _tracer = Tracer(max_events=max_events)
+    return _tracer
+
+
+def stop():
+    global _tracer
+    _tracer = None
+
+
+def active() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, cat: str = "stage", lane: Optional[str] = None, track: Optional[str] = None, **args):
+    """Span en el tracer activo (o uno nulo si no hay tracing)"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, cat, lane, args, track)
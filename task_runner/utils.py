@@ -2,11 +2,12 @@
 Utils - Utilidades comunes
 """
 
-import yaml
 import logging
 from pathlib import Path
 from typing import Dict, Optional
 
+from . import yaml_io
+
 
 def find_project_root(start_path: Optional[Path] = None) -> Optional[Path]:
     """
@@ -60,7 +61,10 @@ def load_config(config_path: Optional[str] = None) -> Dict:
             }
             defaults['files'] = {
                 "status": str(base / "task-status.json"),
-                "context": str(project_root / "project-context.md")
+                "context": str(project_root / "project-context.md"),
+                "visual_cache": str(base / "visual-cache.json"),
+                "parse_cache": str(base / "parse-cache.json"),
+                "state_db": str(base / "task-state.db")
             }
         return defaults
     
@@ -68,7 +72,7 @@ def load_config(config_path: Optional[str] = None) -> Dict:
     base_dir = config_file.parent
     
     with open(config_file, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+        config = yaml_io.safe_load(f)
     
     # Resolver rutas relativas basadas en la ubicación del archivo de configuración
     if 'directories' in config:
@@ -0,0 +1,220 @@
+"""
+Verdict Cache - Caché persistente de veredictos de validación visual
+
+Los reintentos de una tarea suelen producir capturas idénticas a las del
+intento anterior. La clave es (hash del contenido de la imagen, hash del
+contexto y criterios, modelo), así que una imagen ya juzgada con los mismos
+criterios no vuelve a pagar una llamada al modelo de visión.
+
+Opcionalmente (perceptual: true, requiere Pillow) se usa además un dHash de
+64 bits para aceptar capturas casi idénticas (p. ej. un cursor parpadeando)
+dentro de `max_distance` bits de distancia de Hamming.
+
+Las entradas se guardan en un JSON con expulsión LRU a partir de `max_entries`.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(path: str) -> str:
+    """sha256 del contenido del fichero, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def criteria_digest(context: str, criteria: List[str]) -> str:
+    """Hash estable del contexto y los criterios de validación"""
+    payload = json.dumps({"context": context, "criteria": list(criteria)}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def dhash(path: str, size: int = 8) -> Optional[int]:
+    """Hash perceptual por diferencias (64 bits); None si Pillow no está disponible"""
+    if Image is None:
+        return None
+    with Image.open(path) as image:
+        pixels = image.convert("L").resize((size + 1, size), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class VerdictCache:
+    """
+    Veredictos por (imagen, criterios, modelo) con LRU y persistencia en disco.
+
+    Config (sección validation.visual.cache):
+      enabled: activa la caché (por defecto true)
+      max_entries: entradas antes de expulsar las menos usadas
+      perceptual: busca también capturas casi idénticas por dHash
+      max_distance: bits distintos tolerados en el dHash
+    """
+
+    def __init__(self, path: Optional[str], config: Optional[Dict] = None):
+        config = config or {}
+        self.path = path
+        self.enabled = config.get("enabled", True)
+        self.max_entries = max(1, config.get("max_entries", 2000))
+        self.perceptual = config.get("perceptual", False)
+        self.max_distance = config.get("max_distance", 4)
+        self.logger = logging.getLogger("VerdictCache")
+
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+
+        if self.perceptual and Image is None:
+            self.logger.warning("⚠️  Pillow no está instalado: caché visual sin coincidencia perceptual")
+            self.perceptual = False
+
+        if self.enabled and self.path:
+            self._load()
+
+    @staticmethod
+    def _key(image_hash: str, criteria_hash: str, model: str) -> str:
+        return f"{model}:{criteria_hash}:{image_hash}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"⚠️  Caché visual ilegible, se descarta: {e}")
+            return
+        # El fichero se guarda de menos a más reciente
+        for entry in data.get("entries", [])[-self.max_entries:]:
+            self._entries[self._key(entry["image"], entry["criteria"], entry["model"])] = entry
+
+    def save(self):
+        """Escribe la caché de forma atómica si ha cambiado"""
+        if not (self.enabled and self.path):
+            return
+        # Los workers en paralelo comparten la caché: una sola escritura del .tmp a la vez
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {"version": 1, "entries": list(self._entries.values())}
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                with self._lock:
+                    self._dirty = True
+                self.logger.warning(f"⚠️  No se pudo guardar la caché visual: {e}")
+
+    def lookup(self, image_path: str, criteria_hash: str, model: str) -> Optional[Dict]:
+        """Veredicto cacheado para la imagen o None; cuenta aciertos y fallos"""
+        if not self.enabled:
+            return None
+
+        image_hash = file_digest(image_path)
+        key = self._key(image_hash, criteria_hash, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.perceptual:
+            entry = self._lookup_perceptual(image_path, criteria_hash, model)
+            if entry is not None:
+                return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _lookup_perceptual(self, image_path: str, criteria_hash: str, model: str) -> Optional[Dict]:
+        try:
+            phash = dhash(image_path)
+        except Exception:
+            return None
+        best_key, best_distance = None, self.max_distance + 1
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry["model"] != model or entry["criteria"] != criteria_hash or entry.get("phash") is None:
+                    continue
+                distance = bin(phash ^ int(entry["phash"], 16)).count("1")
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.perceptual_hits += 1
+            return self._entries[best_key]
+
+    def store(self, image_path: str, criteria_hash: str, model: str, valid: bool, feedback: str):
+        """Guarda un veredicto y expulsa las entradas menos usadas si se supera el límite"""
+        if not self.enabled:
+            return
+
+        entry = {
+            "image": file_digest(image_path),
+            "criteria": criteria_hash,
+            "model": model,
+            "valid": valid,
+            "feedback": feedback,
+            "created_at": time.time(),
+        }
+        if self.perceptual:
+            try:
+                entry["phash"] = format(dhash(image_path), "016x")
+            except Exception:
+                pass
+
+        key = self._key(entry["image"], criteria_hash, model)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "perceptual_hits": self.perceptual_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
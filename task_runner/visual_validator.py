@@ -3,63 +3,90 @@ Visual Validator - Valida screenshots usando IA con visión
 """
 
 import os
-import base64
+import json
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
+from . import tracing
 from .tool_calling_agent import ToolCallingAgent
+from .image_pipeline import ImagePreprocessor, PreparedImage, sniff_mime_type
+from .verdict_cache import VerdictCache, criteria_digest
+
+SYSTEM_PROMPT = (
+    "Eres un QA visual experto. Analiza cada imagen, evalúa los criterios y responde "
+    "OBLIGATORIAMENTE con la herramienta 'report_visual_verdicts', con un veredicto por imagen."
+)
+
+# Esquema estructurado: un veredicto por imagen, referenciada por su número
+VERDICT_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "report_visual_verdicts",
+        "description": "Reporta el resultado de la validación visual de cada imagen.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "verdicts": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "image": {"type": "integer", "description": "Número de la imagen (empezando en 1)"},
+                            "valid": {"type": "boolean", "description": "True si cumple todos los criterios"},
+                            "feedback": {"type": "string", "description": "Observaciones sobre la imagen"}
+                        },
+                        "required": ["image", "valid", "feedback"]
+                    }
+                }
+            },
+            "required": ["verdicts"]
+        }
+    }
+}
+
 
 class VisualValidator:
     """Valida screenshots visualmente usando el ToolCallingAgent API"""
-    
-    def __init__(self, config: Dict, opencode_config: Dict):
+
+    def __init__(self, config: Dict, opencode_config: Dict, cache_path: Optional[str] = None):
         self.config = config
         self.enabled = config.get("enabled", True)
-        
+        # Imágenes por petición y tope del payload (base64) de cada petición
+        self.batch_size = max(1, config.get("batch_size", 4))
+        self.max_batch_bytes = config.get("max_batch_bytes", 8 * 1024 * 1024)
+        # Reducción, recorte y re-codificación antes de subir las imágenes
+        self.preprocessor = ImagePreprocessor(config.get("preprocess", {}))
+        # Veredictos ya pagados: los reintentos con capturas idénticas no repiten la llamada
+        self.cache = VerdictCache(cache_path, config.get("cache", {}))
+
         self.logger = logging.getLogger("VisualValidator")
-        
-        # Inicializar el Agente nativo
+
+        # Inicializar el Agente nativo (cliente y modelo configurados)
         self.agent = ToolCallingAgent(
             model=config.get("model", opencode_config.get("model", "kimi-k2.5-free")),
             provider=opencode_config.get("provider", "zen"),
             max_iterations=3 # Solo necesitamos validacion directa, no herramientas
         )
-    
-    def _encode_image(self, image_path: str) -> str:
-        """Convierte una imagen a base64 para la API de OpenAI/OpenRouter"""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
 
-    def validate(
-        self,
-        screenshot_path: str,
-        context: str,
-        criteria: List[str]
-    ) -> Dict:
-        """
-        Valida un screenshot visualmente usando API
-        """
-        if not self.enabled:
-            return {
-                "valid": True,
-                "feedback": "Validación visual deshabilitada",
-                "raw_response": ""
-            }
-            
-        if not os.path.exists(screenshot_path):
-            return {
-                "valid": False,
-                "feedback": f"Screenshot no encontrado: {screenshot_path}",
-                "raw_response": ""
-            }
-        
-        self.logger.info(f"👁️  Validando visualmente: {screenshot_path}")
-        
-        # Construir prompt
+    def _chunk(self, images: List[PreparedImage]) -> List[List[PreparedImage]]:
+        """Agrupa imágenes en lotes de como mucho batch_size imágenes y max_batch_bytes de base64"""
+        chunks = []
+        current = []
+        current_bytes = 0
+        for image in images:
+            if current and (len(current) >= self.batch_size or current_bytes + image.encoded_size > self.max_batch_bytes):
+                chunks.append(current)
+                current = []
+                current_bytes = 0
+            current.append(image)
+            current_bytes += image.encoded_size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _build_messages(self, batch: List[PreparedImage], context: str, criteria: List[str]) -> List[Dict]:
         criteria_text = "\n".join([f"{i+1}. {c}" for i, c in enumerate(criteria)])
-        
-        system_prompt = "Eres un QA visual experto. Analiza la imagen, evalúa los criterios y finaliza OBLIGATORIAMENTE usando la herramienta 'finish_task' indicando en status 'completed' si pasa, o 'failed' si no pasa la validación visual, y pon tus observaciones en summary."
-        
-        task_prompt = f"""Analiza esta captura de pantalla de una aplicación web y evalúa su calidad visual.
+
+        task_prompt = f"""Analiza estas {len(batch)} capturas de pantalla de una aplicación web y evalúa su calidad visual.
 
 ## Contexto
 {context}
@@ -68,82 +95,169 @@ class VisualValidator:
 {criteria_text}
 
 ## Instrucciones de Análisis
-Verifica que los elementos presentes cumplan el layout, color y tamaño adecuados sin superponerse.
-"""     
-        # Configurar mensaje con multimodalidad nativa
+Verifica en cada imagen que los elementos presentes cumplan el layout, color y tamaño adecuados sin superponerse.
+Devuelve exactamente un veredicto por imagen usando su número.
+"""
+        content = [{"type": "text", "text": task_prompt}]
+        for number, image in enumerate(batch, start=1):
+            content.append({"type": "text", "text": f"Imagen {number}: {os.path.basename(image.source)}"})
+            # El base64 se genera aquí, por bloques y solo para el lote en curso
+            content.append({"type": "image_url", "image_url": {"url": image.data_url()}})
+
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": content}
+        ]
+
+    @staticmethod
+    def _parse_verdicts(message, count: int) -> Dict[int, Dict]:
+        """Extrae {número de imagen: veredicto} de la llamada a report_visual_verdicts"""
+        for tool_call in message.tool_calls or []:
+            if tool_call.function.name != "report_visual_verdicts":
+                continue
+            try:
+                args = json.loads(tool_call.function.arguments)
+            except json.JSONDecodeError:
+                continue
+            verdicts = {}
+            for verdict in args.get("verdicts", []):
+                number = verdict.get("image")
+                if isinstance(number, int) and 1 <= number <= count:
+                    verdicts[number] = verdict
+            return verdicts
+        return {}
+
+    def _validate_batch(self, batch: List[PreparedImage], context: str, criteria: List[str]) -> List[Dict]:
+        """Una única petición multimodal para todo el lote"""
+        self.logger.info(f"👁️  Validando lote de {len(batch)} screenshots")
         try:
-            base64_img = self._encode_image(screenshot_path)
-            
-            # Formato estándar de Chat Completion para imágenes
-            image_message = {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": task_prompt},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{base64_img}"
-                        }
-                    }
-                ]
-            }
-            
-            # Ejecutar loop del agente inyectando la imagen manualmente a los mensajes iniciales
-            self.agent.messages = [
-                {"role": "system", "content": system_prompt},
-                image_message
-            ]
-            
-            # Truco: Invocamos el loop interno pasando por alto el setting default del prompt
-            result = self.agent.run_task(system_prompt=system_prompt, task_prompt="Evalúa la imagen enviada.")
-            
-            # Parseamos resultado
-            passed = result.get("status") == "completed"
-            
-            self.logger.info(f"✅ Validación completada: {'PASS' if passed else 'FAIL'}")
-            
-            return {
-                "valid": passed,
-                "feedback": result.get("summary", ""),
-                "raw_response": result.get("summary", "")
-            }
-            
+            with tracing.span("visual_verdicts", cat="llm", model=self.agent.model, images=len(batch)) as llm_span:
+                response = self.agent.client.chat.completions.create(
+                    model=self.agent.model,
+                    messages=self._build_messages(batch, context, criteria),
+                    tools=[VERDICT_TOOL],
+                    tool_choice={"type": "function", "function": {"name": "report_visual_verdicts"}},
+                    timeout=self.config.get("timeout", 60)
+                )
+                llm_span.set(**tracing.usage_args(response))
+            message = response.choices[0].message
         except Exception as e:
             self.logger.error(f"❌ Error en validación visual: {e}")
-            return {
+            return [{
+                "screenshot": image.source,
                 "valid": False,
                 "feedback": f"Error durante validación API: {str(e)}",
                 "raw_response": "",
                 "error": str(e)
+            } for image in batch]
+
+        verdicts = self._parse_verdicts(message, len(batch))
+        results = []
+        for number, image in enumerate(batch, start=1):
+            path = image.source
+            verdict = verdicts.get(number)
+            if verdict is None:
+                results.append({
+                    "screenshot": path,
+                    "valid": False,
+                    "feedback": "El modelo no devolvió veredicto para esta imagen",
+                    "raw_response": message.content or "",
+                    "error": "missing_verdict"
+                })
+                continue
+            results.append({
+                "screenshot": path,
+                "valid": bool(verdict.get("valid")),
+                "feedback": verdict.get("feedback", ""),
+                "raw_response": verdict.get("feedback", "")
+            })
+            self.logger.info(f"✅ {os.path.basename(path)}: {'PASS' if verdict.get('valid') else 'FAIL'}")
+        return results
+
+    def validate(
+        self,
+        screenshot_path: str,
+        context: str,
+        criteria: List[str]
+    ) -> Dict:
+        """
+        Valida un screenshot visualmente usando API
+        """
+        if not self.enabled:
+            return {
+                "valid": True,
+                "feedback": "Validación visual deshabilitada",
+                "raw_response": ""
             }
-    
+
+        result = self.validate_multiple([screenshot_path], context, criteria)["validations"][0]
+        result.pop("screenshot", None)
+        return result
+
     def validate_multiple(
         self,
         screenshots: List[str],
         context: str,
-        criteria: List[str]
+        criteria: List[str],
+        regions: Optional[Dict[str, Dict]] = None
     ) -> Dict:
         """
-        Valida múltiples screenshots
-        
+        Valida múltiples screenshots en lotes (una petición por lote)
+
+        Args:
+            regions: región de interés {x, y, width, height} por screenshot, si el step la declara
+
         Returns:
             Dict con validaciones individuales y resultado global
         """
+        regions = regions or {}
+        criteria_hash = criteria_digest(context, criteria)
         self.logger.info(f"👁️  Validando {len(screenshots)} screenshots")
-        
-        results = []
-        for screenshot in screenshots:
-            result = self.validate(screenshot, context, criteria)
-            results.append({
-                "screenshot": screenshot,
-                **result
-            })
-        
-        all_valid = all(r["valid"] for r in results)
-        
+
+        results = {}
+        images = []
+        for path in screenshots:
+            if not self.enabled:
+                results[path] = {"screenshot": path, "valid": True, "feedback": "Validación visual deshabilitada", "raw_response": ""}
+            elif not os.path.exists(path):
+                results[path] = {"screenshot": path, "valid": False, "feedback": f"Screenshot no encontrado: {path}", "raw_response": ""}
+            else:
+                try:
+                    image = self.preprocessor.process(path, regions.get(path))
+                except Exception as e:
+                    self.logger.warning(f"⚠️  No se pudo preprocesar {path}, se envía original: {e}")
+                    image = PreparedImage(path, path, sniff_mime_type(path))
+
+                # La clave es la imagen que vería el modelo (ya recortada y reducida)
+                cached = self.cache.lookup(image.path, criteria_hash, self.agent.model)
+                if cached is not None:
+                    self.logger.info(f"♻️  {os.path.basename(path)}: veredicto en caché")
+                    results[path] = {"screenshot": path, "valid": cached["valid"], "feedback": cached["feedback"],
+                                     "raw_response": cached["feedback"], "cached": True}
+                    image.cleanup()
+                else:
+                    images.append(image)
+
+        chunks = self._chunk(images)
+        try:
+            for batch in chunks:
+                for image, result in zip(batch, self._validate_batch(batch, context, criteria)):
+                    results[result["screenshot"]] = result
+                    if "error" not in result:
+                        self.cache.store(image.path, criteria_hash, self.agent.model, result["valid"], result["feedback"])
+        finally:
+            for image in images:
+                image.cleanup()
+            self.cache.save()
+
+        ordered = [results[path] for path in screenshots]
+        all_valid = all(r["valid"] for r in ordered)
+
         return {
             "valid": all_valid,
-            "validations": results,
-            "passed": len([r for r in results if r["valid"]]),
-            "failed": len([r for r in results if not r["valid"]])
+            "validations": ordered,
+            "passed": len([r for r in ordered if r["valid"]]),
+            "failed": len([r for r in ordered if not r["valid"]]),
+            "requests": len(chunks),
+            "cache_hits": len([r for r in ordered if r.get("cached")])
         }
@@ -0,0 +1,47 @@
+"""
+YAML IO - Carga y volcado seguros de YAML con libyaml cuando está disponible
+
+PyYAML trae un parser en C (CSafeLoader/CSafeDumper) si se compiló contra
+libyaml; si no, se usan SafeLoader/SafeDumper en Python puro. Parser de
+tareas y carga de configuración pasan siempre por aquí.
+"""
+
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _FastLoader, CSafeDumper as _FastDumper
+    HAS_LIBYAML = True
+except ImportError:
+    _FastLoader, _FastDumper = yaml.SafeLoader, yaml.SafeDumper
+    HAS_LIBYAML = False
+
+# Errores de YAML (iguales con ambos backends)
+YAMLError = yaml.YAMLError
+
+_loader = _FastLoader
+_dumper = _FastDumper
+
+
+def use_libyaml(enabled: bool = True):
+    """Selecciona el backend (útil para benchmarks); sin libyaml siempre es Python puro"""
+    global _loader, _dumper
+    if enabled:
+        _loader, _dumper = _FastLoader, _FastDumper
+    else:
+        _loader, _dumper = yaml.SafeLoader, yaml.SafeDumper
+
+
+def backend() -> str:
+    return "libyaml" if _loader is not yaml.SafeLoader else "python"
+
+
+def safe_load(stream) -> Any:
+    """Equivalente a yaml.safe_load"""
+    return yaml.load(stream, Loader=_loader)
+
+
+def safe_dump(data: Any, stream=None, **kwargs) -> Any:
+    """Equivalente a yaml.safe_dump (solo tipos básicos de Python)"""
+    return yaml.dump(data, stream, Dumper=_dumper, **kwargs)
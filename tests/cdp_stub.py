@@ -0,0 +1,158 @@
+"""
+Local stub of a Chrome DevTools endpoint for CDP tests
+"""
+
+import json
+import base64
+import asyncio
+import threading
+from aiohttp import web
+
+PNG_1X1 = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+
+class StubCDPServer:
+    """Serves /json/* and a page WebSocket answering scripted CDP methods"""
+
+    def __init__(self):
+        self.commands = []
+        self.connections = 0
+        self.handlers = {
+            "Page.enable": lambda params: {},
+            "Network.enable": lambda params: {},
+            "Runtime.enable": lambda params: {},
+            "Log.enable": lambda params: {},
+            "Performance.enable": lambda params: {},
+            "PerformanceTimeline.enable": lambda params: {},
+            "Page.setLifecycleEventsEnabled": lambda params: {},
+            "Page.navigate": lambda params: {"frameId": "F1", "loaderId": "L1"},
+            "Page.captureScreenshot": lambda params: {"data": base64.b64encode(PNG_1X1).decode()},
+            "Emulation.setDeviceMetricsOverride": lambda params: {},
+            "Emulation.clearDeviceMetricsOverride": lambda params: {},
+            "Runtime.evaluate": self._evaluate,
+            "Network.clearBrowserCookies": lambda params: {},
+            "Target.createBrowserContext": self._create_context,
+            "Target.disposeBrowserContext": self._dispose_context,
+            "Target.createTarget": self._create_target,
+            "Target.closeTarget": self._close_target,
+        }
+        # Estado de Target.*: contextos vivos y target -> contexto
+        self.contexts = set()
+        self.targets = {}
+        self._target_seq = 0
+        self._context_seq = 0
+        # Valores devueltos por Runtime.evaluate según la expresión
+        self.eval_results = {}
+        # Eventos (method, params, delay) enviados tras responder a un comando
+        self.events_after = {
+            "Page.navigate": [("Page.domContentEventFired", {}, 0), ("Page.loadEventFired", {}, 0)],
+        }
+        self.port = None
+        self._sockets = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def _evaluate(self, params):
+        expression = params["expression"]
+        if expression == "throw":
+            return {"result": {"type": "object"},
+                    "exceptionDetails": {"text": "Uncaught", "exception": {"description": "Error: boom"}}}
+        return {"result": {"type": "object", "value": self.eval_results.get(expression)}}
+
+    def _create_context(self, params):
+        self._context_seq += 1
+        context_id = f"CTX{self._context_seq}"
+        self.contexts.add(context_id)
+        return {"browserContextId": context_id}
+
+    def _dispose_context(self, params):
+        self.contexts.discard(params["browserContextId"])
+        return {}
+
+    def _create_target(self, params):
+        self._target_seq += 1
+        target_id = f"TARGET{self._target_seq}"
+        self.targets[target_id] = params.get("browserContextId")
+        return {"targetId": target_id}
+
+    def _close_target(self, params):
+        self.targets.pop(params["targetId"], None)
+        return {"success": True}
+
+    async def _json_version(self, request):
+        return web.json_response({"Browser": "Stub/1.0",
+                                  "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/browser/B1"})
+
+    async def _json_list(self, request):
+        return web.json_response([
+            {"id": "WORKER", "type": "service_worker"},
+            {"id": "PAGE1", "type": "page", "url": "about:blank",
+             "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/page/PAGE1"},
+        ])
+
+    async def _page(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.connections += 1
+        self._sockets.add(ws)
+        target = request.match_info.get("page_id") or "browser"
+        try:
+            async for msg in ws:
+                command = json.loads(msg.data)
+                command["target"] = target
+                asyncio.ensure_future(self._answer(ws, command))
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+    async def _answer(self, ws, command):
+        self.commands.append(command)
+        handler = self.handlers.get(command["method"])
+        if handler is None:
+            reply = {"id": command["id"], "error": {"code": -32601, "message": f"'{command['method']}' wasn't found"}}
+        else:
+            result = handler(command.get("params", {}))
+            if asyncio.iscoroutine(result):
+                result = await result
+            reply = {"id": command["id"], "result": result}
+        await ws.send_str(json.dumps(reply))
+
+        for method, params, delay in self.events_after.get(command["method"], []):
+            await asyncio.sleep(delay)
+            await ws.send_str(json.dumps({"method": method, "params": params}))
+
+    def emit(self, method, params=None):
+        """Send an event to every connected page socket"""
+        async def send():
+            for ws in list(self._sockets):
+                await ws.send_str(json.dumps({"method": method, "params": params or {}}))
+        asyncio.run_coroutine_threadsafe(send(), self._loop).result(5)
+
+    def start(self):
+        self._thread.start()
+
+        async def setup():
+            app = web.Application()
+            app.router.add_get("/json/version", self._json_version)
+            app.router.add_get("/json/list", self._json_list)
+            app.router.add_get("/devtools/page/{page_id}", self._page)
+            app.router.add_get("/devtools/browser/{browser_id}", self._page)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            return site._server.sockets[0].getsockname()[1]
+
+        self.port = asyncio.run_coroutine_threadsafe(setup(), self._loop).result(5)
+        return self
+
+    def stop(self):
+        async def cleanup():
+            for ws in list(self._sockets):
+                await ws.close()
+            await self._runner.cleanup()
+        asyncio.run_coroutine_threadsafe(cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,28 @@
+"""
+Task markdown files for tests that work on a tasks directory
+"""
+
+import os
+import time
+
+TASK_FILE = """---
+id: {id}
+title: "Task {id}"
+status: {status}
+priority: high
+dependencies: [{deps}]
+---
+
+## Descripción
+Test task.
+"""
+
+
+def write_task(tasks_dir, task_id, status="pending", deps="", age=None):
+    """Write a task file; with `age`, its mtime is set that many seconds in the past"""
+    path = tasks_dir / f"{task_id}.md"
+    path.write_text(TASK_FILE.format(id=task_id, status=status, deps=deps), encoding="utf-8")
+    if age is not None:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return path
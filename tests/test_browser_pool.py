@@ -0,0 +1,108 @@
+"""
+Tests for browser_pool module
+"""
+
+import time
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from task_runner.browser_pool import BrowserPool
+from tests.cdp_stub import StubCDPServer
+
+
+@pytest.fixture
+def server():
+    stub = StubCDPServer().start()
+    yield stub
+    stub.stop()
+
+
+def make_pool(server, **options):
+    return BrowserPool({"host": "127.0.0.1", "port": server.port, "navigation_timeout": 2, **options})
+
+
+class TestBrowserPool:
+    """Test cases for BrowserPool"""
+
+    def test_lease_creates_isolated_page(self, server):
+        """Test each lease gets its own context and target, disposed on release"""
+        pool = make_pool(server)
+
+        with pool.lease() as cdp:
+            cdp.navigate("http://localhost:3000")
+            page_id = cdp.page_id
+            assert server.targets[page_id] in server.contexts
+
+        assert page_id not in server.targets
+        assert server.contexts == set()
+        navigate = [c for c in server.commands if c["method"] == "Page.navigate"]
+        assert navigate[0]["target"] == page_id
+        pool.close()
+
+    def test_concurrency_is_bounded(self, server):
+        """Test no more than max_pages leases are active at once"""
+        pool = make_pool(server, max_pages=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def run(i):
+            with pool.lease() as cdp:
+                with lock:
+                    active.append(cdp.page_id)
+                    peak.append(len(active))
+                cdp.navigate(f"http://localhost:3000/{i}")
+                time.sleep(0.1)
+                with lock:
+                    active.remove(cdp.page_id)
+            return cdp.page_id
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            page_ids = list(executor.map(run, range(5)))
+
+        assert max(peak) == 2
+        assert len(set(page_ids)) == 5
+        pool.close()
+
+    def test_reuse_pages_recycles_targets(self, server):
+        """Test reuse_pages resets and hands back the same target"""
+        pool = make_pool(server, reuse_pages=True)
+
+        with pool.lease() as first:
+            first_id = first.page_id
+        with pool.lease() as second:
+            assert second.page_id == first_id
+
+        assert pool.stats["idle"] == 1
+        assert "Network.clearBrowserCookies" in [c["method"] for c in server.commands]
+        pool.close()
+        assert server.targets == {}
+
+    def test_reused_page_starts_with_empty_capture(self, server):
+        """Test a reused tab does not carry console logs from the previous lease"""
+        pool = make_pool(server, reuse_pages=True)
+
+        with pool.lease() as first:
+            first.start_capture()
+            server.emit("Runtime.consoleAPICalled", {"type": "error", "args": [{"value": "task A failed"}]})
+            deadline = time.monotonic() + 2
+            while not first.get_console_logs() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert first.get_console_logs()[0]["text"] == "task A failed"
+
+        with pool.lease() as second:
+            assert second is first
+            second.start_capture()
+            assert second.get_console_logs() == []
+            assert second._collector.dropped == 0
+        pool.close()
+
+    def test_lease_timeout(self, server):
+        """Test waiting for a busy pool times out"""
+        pool = make_pool(server, max_pages=1)
+
+        with pool.lease():
+            with pytest.raises(TimeoutError):
+                with pool.lease(timeout=0.1):
+                    pass
+        pool.close()
@@ -0,0 +1,255 @@
+"""
+Tests for cdp_client and cdp_wrapper modules
+"""
+
+import time
+import asyncio
+import pytest
+from task_runner.cdp_client import CDPClient, CDPError
+from task_runner.cdp_wrapper import CDPWrapper
+from tests.cdp_stub import StubCDPServer, PNG_1X1
+
+
+@pytest.fixture
+def server():
+    stub = StubCDPServer().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def cdp(server):
+    wrapper = CDPWrapper({"host": "127.0.0.1", "port": server.port, "navigation_timeout": 2,
+                          "network_idle_time": 0.05})
+    yield wrapper
+    wrapper.close()
+
+
+class TestCDPClient:
+    """Test cases for the multiplexed WebSocket client"""
+
+    def test_concurrent_commands_resolve_by_id(self, server):
+        """Test out-of-order responses reach the right caller"""
+        async def slow(params):
+            await asyncio.sleep(params["delay"])
+            return {"delay": params["delay"]}
+        server.handlers["Test.slow"] = slow
+
+        async def run():
+            client = CDPClient(f"ws://127.0.0.1:{server.port}/devtools/page/PAGE1")
+            try:
+                return await asyncio.gather(*[
+                    client.send("Test.slow", {"delay": d}) for d in (0.2, 0.0, 0.1)
+                ])
+            finally:
+                await client.close()
+
+        results = asyncio.run(run())
+
+        assert [r["delay"] for r in results] == [0.2, 0.0, 0.1]
+        assert server.connections == 1
+
+    def test_error_response_raises(self, server):
+        """Test CDP error replies raise CDPError"""
+        async def run():
+            client = CDPClient(f"ws://127.0.0.1:{server.port}/devtools/page/PAGE1")
+            try:
+                await client.send("Unknown.method")
+            finally:
+                await client.close()
+
+        with pytest.raises(CDPError, match="Unknown.method"):
+            asyncio.run(run())
+
+    def test_events_reach_listeners(self, server):
+        """Test messages without id are dispatched to listeners"""
+        async def run():
+            client = CDPClient(f"ws://127.0.0.1:{server.port}/devtools/page/PAGE1")
+            received = asyncio.Event()
+            events = []
+            client.on("Page.loadEventFired", lambda params: (events.append(params), received.set()))
+            await client.connect()
+            await asyncio.to_thread(server.emit, "Page.loadEventFired", {"timestamp": 1.5})
+            await asyncio.wait_for(received.wait(), 5)
+            await client.close()
+            return events
+
+        assert asyncio.run(run()) == [{"timestamp": 1.5}]
+
+
+class TestCDPWrapper:
+    """Test cases for CDPWrapper over a persistent session"""
+
+    def test_commands_share_one_connection(self, server, cdp):
+        """Test every wrapper call reuses the same WebSocket"""
+        server.eval_results["1 + 1"] = 2
+
+        cdp.navigate("http://localhost:3000")
+        assert cdp.evaluate("1 + 1") == 2
+        cdp.click('button[data-id="ok"]')
+
+        assert server.connections == 1
+        assert cdp.page_id == "PAGE1"
+        methods = [c["method"] for c in server.commands]
+        assert methods == ["Page.enable", "Page.navigate", "Runtime.evaluate", "Runtime.evaluate"]
+        assert server.commands[-1]["params"]["expression"] == 'document.querySelector("button[data-id=\\"ok\\"]").click()'
+
+    def test_screenshot_with_viewport(self, server, cdp, tmp_path):
+        """Test screenshots are decoded to disk and the viewport is restored"""
+        path = tmp_path / "shots" / "home.png"
+
+        cdp.screenshot(str(path), width=375, height=667)
+
+        assert path.read_bytes() == PNG_1X1
+        methods = [c["method"] for c in server.commands]
+        assert methods == ["Emulation.setDeviceMetricsOverride", "Page.captureScreenshot",
+                           "Emulation.clearDeviceMetricsOverride"]
+
+    def test_evaluate_exception_raises(self, cdp):
+        """Test JavaScript exceptions surface as RuntimeError"""
+        with pytest.raises(RuntimeError, match="boom"):
+            cdp.evaluate("throw")
+
+    def test_performance_metrics(self, server, cdp):
+        """Test web vitals are read through Runtime.evaluate"""
+        from task_runner.cdp_wrapper import PERFORMANCE_METRICS_JS
+        server.eval_results[PERFORMANCE_METRICS_JS] = {"fcp": 120, "lcp": 340.5, "cls": 0.01, "ttfb": 20}
+
+        assert cdp.get_performance_metrics() == {"fcp": 120.0, "lcp": 340.5, "cls": 0.01, "ttfb": 20.0}
+
+    def test_is_available(self, server, cdp):
+        """Test availability is checked through /json/version"""
+        assert cdp.is_available()
+
+
+class TestNavigationWaits:
+    """Test cases for event-based navigation and wait conditions"""
+
+    def test_navigate_waits_for_load_event(self, server, cdp):
+        """Test navigate returns once Page.loadEventFired arrives"""
+        server.events_after["Page.navigate"] = [("Page.loadEventFired", {}, 0.3)]
+
+        start = time.monotonic()
+        cdp.navigate("http://localhost:3000")
+
+        assert 0.3 <= time.monotonic() - start < 2
+
+    def test_navigate_times_out_without_load(self, server, cdp):
+        """Test a page that never loads fails after the timeout"""
+        server.events_after["Page.navigate"] = []
+
+        with pytest.raises(TimeoutError):
+            cdp.navigate("http://localhost:3000", timeout=0.2)
+
+    def test_same_document_navigation_does_not_wait(self, server, cdp):
+        """Test navigations without a loaderId return immediately"""
+        server.handlers["Page.navigate"] = lambda params: {"frameId": "F1"}
+        server.events_after["Page.navigate"] = []
+
+        cdp.navigate("http://localhost:3000/#section", timeout=0.5)
+
+    def test_navigate_networkidle(self, server, cdp):
+        """Test networkidle waits for in-flight requests to finish"""
+        server.events_after["Page.navigate"] = [
+            ("Network.requestWillBeSent", {"requestId": "r1"}, 0),
+            ("Page.loadEventFired", {}, 0),
+            ("Network.loadingFinished", {"requestId": "r1"}, 0.3),
+        ]
+
+        start = time.monotonic()
+        cdp.navigate("http://localhost:3000", wait_until="networkidle")
+
+        assert time.monotonic() - start >= 0.3
+        assert "Network.enable" in [c["method"] for c in server.commands]
+
+    def test_navigate_with_selector(self, server, cdp):
+        """Test navigate can also wait for a DOM selector"""
+        server.handlers["Runtime.evaluate"] = lambda params: {
+            "result": {"value": "MutationObserver" in params["expression"] and '"#app"' in params["expression"]}
+        }
+
+        cdp.navigate("http://localhost:3000", selector="#app")
+
+        assert server.commands[-1]["params"]["awaitPromise"] is True
+
+    def test_wait_for_function_timeout(self, server, cdp):
+        """Test an unmet condition raises TimeoutError"""
+        server.handlers["Runtime.evaluate"] = lambda params: {"result": {"value": False}}
+
+        with pytest.raises(TimeoutError):
+            cdp.wait_for_function("window.ready === true", timeout=0.1)
+
+    def test_invalid_wait_until(self, cdp):
+        """Test unknown lifecycle conditions are rejected"""
+        with pytest.raises(ValueError):
+            cdp.navigate("http://localhost:3000", wait_until="idle")
+
+
+NAVIGATION_EVENTS = [
+    ("Network.requestWillBeSent", {"requestId": "L1", "loaderId": "L1", "type": "Document", "frameId": "PAGE1",
+                                   "timestamp": 100.0, "wallTime": 1700000000.0}, 0),
+    ("Network.requestWillBeSent", {"requestId": "R2", "loaderId": "L1", "type": "Script", "frameId": "PAGE1",
+                                   "timestamp": 100.1, "wallTime": 1700000000.1}, 0),
+    ("Network.responseReceived", {"requestId": "L1", "response": {"timing": {"requestTime": 100.01, "receiveHeadersEnd": 40}}}, 0),
+    ("Page.lifecycleEvent", {"frameId": "PAGE1", "name": "firstContentfulPaint", "timestamp": 100.3}, 0),
+    ("Page.lifecycleEvent", {"frameId": "IFRAME", "name": "firstContentfulPaint", "timestamp": 109.0}, 0),
+    ("PerformanceTimeline.timelineEventAdded", {"event": {"frameId": "PAGE1", "type": "largest-contentful-paint",
+                                                          "lcpDetails": {"renderTime": 1700000000.5, "loadTime": 0}}}, 0),
+    ("PerformanceTimeline.timelineEventAdded", {"event": {"frameId": "PAGE1", "type": "layout-shift",
+                                                          "layoutShiftDetails": {"value": 0.05, "hadRecentInput": False}}}, 0),
+    ("PerformanceTimeline.timelineEventAdded", {"event": {"frameId": "PAGE1", "type": "layout-shift",
+                                                          "layoutShiftDetails": {"value": 0.5, "hadRecentInput": True}}}, 0),
+    ("Runtime.consoleAPICalled", {"type": "warning", "args": [{"type": "string", "value": "React.StrictMode"}]}, 0),
+    ("Runtime.consoleAPICalled", {"type": "error", "args": [{"type": "string", "value": "Falló"},
+                                                            {"type": "number", "value": 42}]}, 0),
+    ("Log.entryAdded", {"entry": {"level": "error", "text": "404 favicon.ico", "source": "network"}}, 0),
+    ("Runtime.exceptionThrown", {"exceptionDetails": {"text": "Uncaught", "exception": {"description": "TypeError: x"}}}, 0),
+    ("Page.loadEventFired", {}, 0),
+]
+
+
+class TestEventCapture:
+    """Test cases for streaming console and performance capture"""
+
+    def test_collects_console_and_vitals(self, server, cdp):
+        """Test console entries and web vitals are derived from events"""
+        server.events_after["Page.navigate"] = NAVIGATION_EVENTS
+
+        cdp.start_capture()
+        cdp.navigate("http://localhost:3000")
+
+        logs = cdp.get_console_logs()
+        assert [(e["level"], e["text"]) for e in logs] == [
+            ("warning", "React.StrictMode"),
+            ("error", "Falló 42"),
+            ("error", "404 favicon.ico"),
+            ("error", "TypeError: x"),
+        ]
+        assert cdp.get_performance_metrics() == {"ttfb": 50.0, "fcp": 300.0, "lcp": 500.0, "cls": 0.05}
+        assert "Page.setLifecycleEventsEnabled" in [c["method"] for c in server.commands]
+
+    def test_console_ring_is_bounded(self, server):
+        """Test only the newest console_buffer entries are kept"""
+        cdp = CDPWrapper({"host": "127.0.0.1", "port": server.port, "console_buffer": 3})
+        server.events_after["Page.navigate"] = [
+            ("Runtime.consoleAPICalled", {"type": "log", "args": [{"type": "string", "value": f"m{i}"}]}, 0)
+            for i in range(5)
+        ] + [("Page.loadEventFired", {}, 0)]
+
+        cdp.start_capture()
+        cdp.navigate("http://localhost:3000")
+
+        assert [e["text"] for e in cdp.get_console_logs()] == ["m2", "m3", "m4"]
+        assert cdp._collector.dropped == 2
+        cdp.close()
+
+    def test_missing_vitals_fall_back_to_page_snapshot(self, server, cdp):
+        """Test metrics not seen as events are read from the Performance API"""
+        from task_runner.cdp_wrapper import PERFORMANCE_METRICS_JS
+        server.eval_results[PERFORMANCE_METRICS_JS] = {"fcp": 120, "lcp": 340.5, "cls": 0.01, "ttfb": 20}
+        server.events_after["Page.navigate"] = NAVIGATION_EVENTS[:3] + [("Page.loadEventFired", {}, 0)]
+
+        cdp.start_capture()
+        cdp.navigate("http://localhost:3000")
+
+        assert cdp.get_performance_metrics() == {"ttfb": 50.0, "fcp": 120.0, "lcp": 340.5, "cls": 0.01}
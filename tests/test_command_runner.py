@@ -0,0 +1,83 @@
+"""
+Tests for command_runner module
+"""
+
+import sys
+import time
+import pytest
+from task_runner.command_runner import CommandRunner, read_tail
+
+PY = f'"{sys.executable}"'
+
+
+class TestCommandRunner:
+    """Test cases for concurrent unit-test commands"""
+
+    def test_runs_concurrently_in_order(self, tmp_path):
+        """Test independent commands overlap and results keep their order"""
+        runner = CommandRunner({"max_parallel": 3})
+        commands = [f'{PY} -c "import time; time.sleep(0.5); print({i})"' for i in range(3)]
+
+        start = time.monotonic()
+        result = runner.run(commands, tmp_path)
+
+        assert time.monotonic() - start < 1.4
+        assert result["success"]
+        assert [t["output"] for t in result["tests"]] == ["0", "1", "2"]
+        assert (tmp_path / "02.log").read_text().strip() == "1"
+
+    def test_failure_and_stderr(self, tmp_path):
+        """Test non-zero exits fail and stderr lands in the same log"""
+        runner = CommandRunner()
+        result = runner.run([f'{PY} -c "import sys; sys.stderr.write(\'boom\'); sys.exit(3)"'], tmp_path)
+
+        test = result["tests"][0]
+        assert not result["success"]
+        assert test["returncode"] == 3 and test["output"] == "boom"
+
+    def test_command_timeout_kills_process(self, tmp_path):
+        """Test a hung command is killed after command_timeout"""
+        runner = CommandRunner({"command_timeout": 0.5})
+
+        start = time.monotonic()
+        result = runner.run([f'{PY} -c "import time; print(\'start\', flush=True); time.sleep(30)"'], tmp_path)
+
+        test = result["tests"][0]
+        assert time.monotonic() - start < 5
+        assert test["timed_out"] and not test["success"]
+        assert test["output"].startswith("start")
+
+    def test_total_timeout_skips_pending(self, tmp_path):
+        """Test commands that cannot start before total_timeout are not run"""
+        runner = CommandRunner({"max_parallel": 1, "total_timeout": 0.5})
+        result = runner.run([f'{PY} -c "import time; time.sleep(2)"', f"{PY} -c pass"], tmp_path)
+
+        assert [t["timed_out"] for t in result["tests"]] == [True, True]
+        assert result["tests"][1]["log_file"] is None
+
+    def test_output_is_truncated_to_tail(self, tmp_path):
+        """Test only the last lines of a large output are kept"""
+        runner = CommandRunner({"tail_lines": 3})
+        result = runner.run([f'{PY} -c "[print(i) for i in range(10000)]"'], tmp_path)
+
+        lines = result["tests"][0]["output"].splitlines()
+        assert lines[0].startswith("... (salida truncada")
+        assert lines[1:] == ["9997", "9998", "9999"]
+
+
+class TestReadTail:
+    """Test cases for reading the end of a log"""
+
+    def test_drops_partial_first_line(self, tmp_path):
+        """Test a line cut by the byte limit is not returned"""
+        path = tmp_path / "out.log"
+        path.write_text("aaaaaaaaaa\nbb\ncc\n")
+
+        assert read_tail(path, max_lines=10, max_bytes=8).splitlines()[1:] == ["bb", "cc"]
+
+    def test_short_output_untouched(self, tmp_path):
+        """Test small logs are returned whole"""
+        path = tmp_path / "out.log"
+        path.write_text("ok\n")
+
+        assert read_tail(path) == "ok"
@@ -0,0 +1,96 @@
+"""
+Tests for image_pipeline module
+"""
+
+import os
+import base64
+import pytest
+from task_runner.image_pipeline import ImagePreprocessor, PreparedImage, iter_base64, sniff_mime_type
+
+
+def make_png(path, size=(2000, 1000), color=(200, 30, 30, 255)):
+    from PIL import Image
+    Image.new("RGBA", size, color).save(path, format="PNG")
+    return str(path)
+
+
+class TestStreaming:
+    """Test cases for chunked base64 encoding"""
+
+    def test_chunks_match_full_encoding(self, tmp_path):
+        """Test chunked output equals a single b64encode of the file"""
+        path = tmp_path / "blob.bin"
+        data = bytes(range(256)) * 50
+        path.write_bytes(data)
+
+        chunks = list(iter_base64(str(path), chunk_size=3 * 100))
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == base64.b64encode(data).decode()
+
+    def test_prepared_image_sizes(self, tmp_path):
+        """Test the encoded size is known without encoding"""
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"x" * 292)
+
+        image = PreparedImage(str(path), str(path), sniff_mime_type(str(path)))
+
+        assert image.encoded_size == 400
+        assert image.data_url().startswith("data:image/png;base64,")
+        assert len(image.data_url()) == len("data:image/png;base64,") + 400
+
+    def test_sniff_by_signature(self, tmp_path):
+        """Test the MIME type comes from magic bytes, not the extension"""
+        path = tmp_path / "mislabeled.png"
+        path.write_bytes(b"\xff\xd8\xff\xe0" + b"\x00" * 20)
+
+        assert sniff_mime_type(str(path)) == "image/jpeg"
+
+
+class TestImagePreprocessor:
+    """Test cases for resize, crop and re-encoding"""
+
+    def test_noop_passthrough(self, tmp_path):
+        """Test the default config sends the original file"""
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"x" * 10)
+
+        prepared = ImagePreprocessor().process(str(path))
+
+        assert prepared.path == str(path)
+        assert not prepared.temporary
+
+    def test_unknown_format(self):
+        """Test unsupported output formats are rejected"""
+        with pytest.raises(ValueError):
+            ImagePreprocessor({"format": "bmp"})
+
+    def test_downscale_and_reencode(self, tmp_path):
+        """Test large screenshots are bounded and converted to JPEG"""
+        pytest.importorskip("PIL")
+        from PIL import Image
+        source = make_png(tmp_path / "big.png")
+
+        prepared = ImagePreprocessor({"max_dimension": 500, "format": "jpeg", "quality": 70}).process(source)
+
+        with Image.open(prepared.path) as image:
+            assert image.size == (500, 250)
+            assert image.format == "JPEG"
+        assert prepared.mime_type == "image/jpeg"
+        assert prepared.source == source
+
+        prepared.cleanup()
+        assert not os.path.exists(prepared.path)
+
+    def test_region_crop(self, tmp_path):
+        """Test a region of interest is cropped before resizing"""
+        pytest.importorskip("PIL")
+        from PIL import Image
+        source = make_png(tmp_path / "page.png")
+
+        prepared = ImagePreprocessor().process(source, {"x": 100, "y": 50, "width": 300, "height": 200})
+
+        with Image.open(prepared.path) as image:
+            assert image.size == (300, 200)
+            assert image.format == "PNG"
+        prepared.cleanup()
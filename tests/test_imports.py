@@ -0,0 +1,34 @@
+"""
+Tests for deferred imports of heavy dependencies
+"""
+
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = """
+import sys
+import cli
+from task_runner.task_engine import TaskEngine
+engine = TaskEngine({{"orchestrator": {{"log_level": "CRITICAL"}}, "directories": {{"logs": {logs!r}}}}})
+engine.load_tasks()
+print(",".join(sorted(m for m in ("openai", "dotenv", "aiohttp", "asyncio") if m in sys.modules)))
+"""
+
+
+class TestLazyImports:
+    """Test cases for keeping light commands free of heavy imports"""
+
+    def test_engine_without_agent_skips_heavy_modules(self, tmp_path):
+        """Test importing the CLI and loading tasks never imports openai or aiohttp"""
+        env = dict(os.environ)
+        env.pop("ZEN_API_KEY", None)
+        result = subprocess.run(
+            [sys.executable, "-c", CHECK.format(logs=str(tmp_path / "logs"))],
+            cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == ""
@@ -0,0 +1,127 @@
+"""
+Tests for memory_manager module
+"""
+
+import pytest
+from task_runner.memory_manager import MemoryManager
+from task_runner.tool_calling_agent import ToolCallingAgent
+
+
+class TestIncrementalMetrics:
+    """Test cases for running token totals"""
+
+    @pytest.fixture
+    def memory(self, tmp_path):
+        mm = MemoryManager(task_id="T-METRICS", logs_dir=str(tmp_path), max_tokens=10000)
+        yield mm
+        mm.close_tape()
+
+    def assert_consistent(self, mm):
+        metrics = mm.get_metrics()
+        assert metrics["total_tokens"] == sum(m["tokens"] for m in mm.messages)
+        by_role = {}
+        for m in mm.messages:
+            by_role[m["role"]] = by_role.get(m["role"], 0) + m["tokens"]
+        assert metrics["tokens_by_role"] == {role: t for role, t in by_role.items() if t}
+        assert metrics["message_count"] == len(mm.messages)
+
+    def test_totals_follow_add_prune_summarize(self, memory):
+        """Test running totals match a full recount after every mutation"""
+        ids = []
+        for i in range(10):
+            role = ["user", "assistant", "tool"][i % 3]
+            ids.append(memory.add_message({"role": role, "content": "x" * (10 * (i + 1))}))
+        self.assert_consistent(memory)
+
+        memory.prune_messages([ids[1], ids[4]])
+        self.assert_consistent(memory)
+
+        memory.summarize_range(ids[5], ids[8], "resumen corto")
+        self.assert_consistent(memory)
+        assert "system" in memory.get_metrics()["tokens_by_role"]
+
+    def test_role_removed_when_empty(self, memory):
+        """Test roles without active messages disappear from the breakdown"""
+        msg_id = memory.add_message({"role": "tool", "content": "salida"})
+        memory.add_message({"role": "user", "content": "hola"})
+
+        memory.prune_messages([msg_id])
+
+        assert "tool" not in memory.get_metrics()["tokens_by_role"]
+
+    def test_dashboard_includes_role_breakdown(self, memory):
+        """Test the SMMA dashboard message shows tokens per role"""
+        for i in range(5):
+            memory.add_message({"role": "user" if i % 2 else "assistant", "content": "contenido " * 5})
+        agent = ToolCallingAgent(model="test", api_key="dummy")
+
+        dashboard = agent._build_llm_messages(memory)[-1]
+
+        assert dashboard["role"] == "system"
+        assert "Tokens por rol:" in dashboard["content"]
+        assert "assistant=" in dashboard["content"]
+
+
+class TestActiveMessages:
+    """Test cases for the indexed active memory"""
+
+    @pytest.fixture
+    def memory(self, tmp_path):
+        mm = MemoryManager(task_id="T-ACTIVE", logs_dir=str(tmp_path), max_tokens=100000)
+        yield mm
+        mm.close_tape()
+
+    def fill(self, mm, count):
+        return [mm.add_message({"role": "user", "content": f"msg {i}"}) for i in range(count)]
+
+    def test_prune_keeps_order_and_ignores_unknown_ids(self, memory):
+        """Test pruning removes only active ids and preserves message order"""
+        ids = self.fill(memory, 10)
+
+        removed = memory.prune_messages([ids[7], ids[2], 999, ids[2]])
+
+        assert removed == 2
+        assert [m["visible_id"] for m in memory.messages] == [i for i in ids if i not in (ids[2], ids[7])]
+        assert memory.get_active_messages_for_llm()[2]["content"] == "msg 3"
+
+    def test_summary_takes_position_of_range(self, memory):
+        """Test a summary can itself be part of a later range"""
+        ids = self.fill(memory, 8)
+
+        first = memory.summarize_range(ids[2], ids[4], "primero")["new_summary_id"]
+        second = memory.summarize_range(ids[1], first, "segundo")
+
+        assert second["success"] and second["removed_count"] == 2
+        assert [m["visible_id"] for m in memory.messages] == [ids[0], second["new_summary_id"]] + ids[5:]
+        assert memory.messages[-1]["visible_id"] == ids[7]
+        assert len(memory.messages[1:3]) == 2
+
+    def test_reversed_or_removed_range_is_rejected(self, memory):
+        """Test ranges with start after end or pruned ids are invalid"""
+        ids = self.fill(memory, 5)
+        memory.prune_messages([ids[1]])
+
+        assert not memory.summarize_range(ids[3], ids[0], "x")["success"]
+        assert not memory.summarize_range(ids[1], ids[3], "x")["success"]
+        assert len(memory.messages) == 4
+
+    def test_large_prune_does_not_scan_messages(self, memory):
+        """Test prune cost depends on removed ids, not on session length"""
+        ids = self.fill(memory, 2000)
+        iterations = []
+        original_iter = type(memory.messages).__iter__
+
+        def counting_iter(self):
+            iterations.append(1)
+            return original_iter(self)
+
+        type(memory.messages).__iter__ = counting_iter
+        try:
+            memory.prune_messages(ids[::20])
+            result = memory.summarize_range(ids[1], ids[1499], "resumen")
+        finally:
+            type(memory.messages).__iter__ = original_iter
+
+        assert iterations == []
+        assert result["removed_count"] == 1499 - 74
+        assert len(memory.messages) == 2000 - 100 - result["removed_count"] + 1
@@ -0,0 +1,185 @@
+"""
+Tests for scheduler module
+"""
+
+import pytest
+from task_runner.scheduler import DependencyGraph
+from task_runner.task_parser import Task
+
+
+def make_tasks(spec):
+    """Build tasks from a list of (id, status, dependencies) tuples"""
+    return [Task(id=task_id, title=task_id, status=status, dependencies=deps) for task_id, status, deps in spec]
+
+
+class TestDependencyGraph:
+    """Test cases for DependencyGraph"""
+
+    def test_initial_ready_queue(self):
+        """Test only pending tasks with satisfied dependencies are ready"""
+        graph = DependencyGraph(make_tasks([
+            ("T-001", "completed", []),
+            ("T-002", "pending", ["T-001"]),
+            ("T-003", "pending", ["T-002"]),
+            ("T-004", "failed", []),
+        ]))
+
+        assert [t.id for t in graph.get_ready()] == ["T-002"]
+
+    def test_mark_finished_unlocks_dependents(self):
+        """Test completing a task releases its dependents"""
+        tasks = make_tasks([
+            ("T-001", "pending", []),
+            ("T-002", "pending", ["T-001"]),
+            ("T-003", "pending", ["T-001", "T-002"]),
+        ])
+        graph = DependencyGraph(tasks)
+
+        task = graph.pop_ready()
+        assert task.id == "T-001"
+        assert graph.pop_ready() is None
+
+        task.status = "completed"
+        unlocked = graph.mark_finished(task)
+        assert [t.id for t in unlocked] == ["T-002"]
+
+        task = graph.pop_ready()
+        task.status = "completed"
+        assert [t.id for t in graph.mark_finished(task)] == ["T-003"]
+
+    def test_failed_task_blocks_dependents(self):
+        """Test dependents of a failed task never become ready"""
+        tasks = make_tasks([
+            ("T-001", "pending", []),
+            ("T-002", "pending", ["T-001"]),
+        ])
+        graph = DependencyGraph(tasks)
+
+        task = graph.pop_ready()
+        task.status = "failed"
+
+        assert graph.mark_finished(task) == []
+        assert graph.pop_ready() is None
+
+    def test_mark_finished_is_idempotent(self):
+        """Test finishing the same task twice does not over-release dependents"""
+        tasks = make_tasks([
+            ("T-001", "pending", []),
+            ("T-002", "pending", []),
+            ("T-003", "pending", ["T-001", "T-002"]),
+        ])
+        graph = DependencyGraph(tasks)
+
+        tasks[0].status = "completed"
+        graph.mark_finished(tasks[0])
+        graph.mark_finished(tasks[0])
+
+        assert "T-003" not in [t.id for t in graph.get_ready()]
+
+    def test_requeue_after_retry(self):
+        """Test a task reset to pending can be queued again"""
+        graph = DependencyGraph(make_tasks([("T-001", "pending", [])]))
+
+        task = graph.pop_ready()
+        graph.requeue(task)
+
+        assert graph.pop_ready() is task
+
+    def test_missing_dependencies(self):
+        """Test detection of dependencies on unknown tasks"""
+        graph = DependencyGraph(make_tasks([
+            ("T-001", "pending", ["T-999"]),
+            ("T-002", "pending", []),
+        ]))
+
+        assert graph.missing_dependencies() == {"T-001": ["T-999"]}
+        assert [t.id for t in graph.get_ready()] == ["T-002"]
+
+    def test_find_cycles(self):
+        """Test detection of dependency cycles"""
+        graph = DependencyGraph(make_tasks([
+            ("T-001", "pending", ["T-003"]),
+            ("T-002", "pending", ["T-001"]),
+            ("T-003", "pending", ["T-002"]),
+            ("T-004", "pending", []),
+        ]))
+
+        cycles = graph.find_cycles()
+
+        assert len(cycles) == 1
+        assert set(cycles[0]) == {"T-001", "T-002", "T-003"}
+        assert cycles[0][0] == cycles[0][-1]
+
+        result = graph.validate()
+        assert result["valid"] is False
+        assert [t.id for t in graph.get_ready()] == ["T-004"]
+
+    def test_valid_graph(self):
+        """Test validation of an acyclic graph with known dependencies"""
+        graph = DependencyGraph(make_tasks([
+            ("T-001", "pending", []),
+            ("T-002", "pending", ["T-001"]),
+        ]))
+
+        assert graph.validate() == {"valid": True, "missing": {}, "cycles": []}
+
+    @pytest.mark.parametrize("size", [5000])
+    def test_large_chain(self, size):
+        """Test a long dependency chain drains in order"""
+        spec = [(f"T-{i:05d}", "pending", [f"T-{i - 1:05d}"] if i else []) for i in range(size)]
+        graph = DependencyGraph(make_tasks(spec))
+
+        order = []
+        while True:
+            task = graph.pop_ready()
+            if task is None:
+                break
+            task.status = "completed"
+            graph.mark_finished(task)
+            order.append(task.id)
+
+        assert order == [task_id for task_id, _, _ in spec]
+
+
+class TestLiveGraphUpdates:
+    """Test cases for adding and editing tasks in a running graph (watch mode)"""
+
+    def test_new_task_links_to_waiting_dependents(self):
+        """Test a late task is queued and releases dependents that were waiting for it"""
+        graph = DependencyGraph(make_tasks([("T-002", "pending", ["T-001"])]))
+        assert graph.pop_ready() is None
+
+        new = Task(id="T-001", title="T-001")
+        graph.upsert(new)
+        assert graph.pop_ready() is new
+
+        new.status = "completed"
+        assert [t.id for t in graph.mark_finished(new)] == ["T-002"]
+
+    def test_edit_dependencies_and_status(self):
+        """Test re-linking an edited task and un-completing a dependency"""
+        tasks = make_tasks([
+            ("T-001", "completed", []),
+            ("T-002", "pending", []),
+            ("T-003", "pending", ["T-001"]),
+        ])
+        graph = DependencyGraph(tasks)
+        assert [t.id for t in graph.get_ready()] == ["T-002", "T-003"]
+
+        tasks[1].dependencies = ["T-003"]
+        graph.upsert(tasks[1])
+        tasks[0].status = "pending"
+        graph.upsert(tasks[0])
+
+        assert [t.id for t in graph.get_ready()] == ["T-001"]
+        assert graph.in_degree == {"T-001": 0, "T-002": 1, "T-003": 1}
+
+    def test_remove_blocks_dependents(self):
+        """Test removing a task dequeues it and leaves its dependents waiting"""
+        tasks = make_tasks([("T-001", "pending", []), ("T-002", "pending", ["T-001"])])
+        graph = DependencyGraph(tasks)
+
+        graph.remove("T-001")
+
+        assert graph.pop_ready() is None
+        assert graph.missing_dependencies() == {"T-002": ["T-001"]}
@@ -0,0 +1,115 @@
+"""
+Tests for state_store module and the engine's status transitions
+"""
+
+import sqlite3
+import threading
+import pytest
+from datetime import datetime
+from task_runner.state_store import StateStore
+from task_runner.task_engine import TaskEngine
+from task_runner.task_parser import Task
+from tests.task_files import write_task
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+class TestStateStore:
+    """Test cases for the SQLite state store"""
+
+    def test_wal_mode(self, store):
+        """Test the database is created on first write, in WAL mode"""
+        assert store.all() == {} and not store.path.exists()
+        store.record(Task(id="T-001", title="A", status="in_progress"))
+
+        conn = sqlite3.connect(str(store.path))
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_record_and_apply(self, store):
+        """Test a recorded state overlays a freshly parsed task"""
+        task = Task(id="T-001", title="A", status="failed", retry_count=2, error_message="boom",
+                    started_at=datetime(2025, 1, 1, 10, 0))
+        store.record(task, file_status="pending")
+
+        parsed = Task(id="T-001", title="A", status="pending")
+        store.apply([parsed])
+
+        assert (parsed.status, parsed.retry_count, parsed.error_message) == ("failed", 2, "boom")
+        assert parsed.started_at == datetime(2025, 1, 1, 10, 0)
+
+    def test_manual_frontmatter_edit_wins(self, store):
+        """Test a status edited in the file since the last sync is kept"""
+        store.record(Task(id="T-001", title="A", status="failed"), file_status="pending")
+
+        parsed = Task(id="T-001", title="A", status="completed")
+        store.apply([parsed])
+
+        assert parsed.status == "completed"
+        assert store.get("T-001") is None
+
+    def test_unsynced_rows(self, store):
+        """Test only rows whose status differs from the frontmatter need syncing"""
+        store.record(Task(id="T-001", title="A", status="completed"), file_status="pending")
+        store.record(Task(id="T-002", title="B", status="pending"), file_status="pending")
+
+        assert [r["id"] for r in store.unsynced()] == ["T-001"]
+        store.mark_synced("T-001", "completed")
+        assert store.unsynced() == []
+
+    def test_concurrent_writers(self, store):
+        """Test parallel workers can record transitions safely"""
+        def worker(n):
+            for attempt in range(20):
+                store.record(Task(id=f"T-{n:03d}", title="x", status="in_progress", retry_count=attempt))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        rows = store.all()
+        assert len(rows) == 8 and all(r["retry_count"] == 19 for r in rows.values())
+
+
+class TestEngineState:
+    """Test cases for status transitions through the engine"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        tasks_dir = tmp_path / "tasks"
+        tasks_dir.mkdir()
+        for task_id, status in (("T-001", "pending"), ("T-002", "pending")):
+            write_task(tasks_dir, task_id, status=status)
+        return TaskEngine({
+            "orchestrator": {"log_level": "CRITICAL"},
+            "directories": {"tasks": str(tasks_dir), "logs": str(tmp_path / "logs")},
+            "files": {"status": str(tmp_path / "task-status.json")},
+            "validation": {"visual": {"enabled": False}}
+        })
+
+    def test_transitions_do_not_touch_markdown(self, engine, tmp_path):
+        """Test status changes go to the store and reach files only on sync"""
+        engine.load_tasks()
+        task_file = engine.tasks[0].file_path
+        before = task_file.read_text(encoding="utf-8")
+
+        engine.set_task_status(engine.tasks[0], "in_progress")
+        engine.set_task_status(engine.tasks[0], "failed", "boom")
+
+        assert task_file.read_text(encoding="utf-8") == before
+        assert (tmp_path / "task-state.db").exists()
+
+        reloaded = TaskEngine(engine.config)
+        reloaded.load_tasks()
+        assert [(t.status, t.error_message) for t in reloaded.tasks] == [("failed", "boom"), ("pending", None)]
+
+        assert reloaded.sync_frontmatter() == 1
+        assert "status: failed" in task_file.read_text(encoding="utf-8")
+        assert reloaded.sync_frontmatter() == 0
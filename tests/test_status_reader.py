@@ -0,0 +1,103 @@
+"""
+Tests for status_reader module and the engine's lazy components
+"""
+
+import pytest
+from unittest.mock import patch
+from task_runner.state_store import StateStore
+from task_runner.status_reader import StatusReader
+from task_runner.task_engine import TaskEngine
+from task_runner.task_parser import Task, TaskParser
+from tests.task_files import write_task
+
+
+@pytest.fixture
+def tasks_dir(tmp_path):
+    tasks_dir = tmp_path / "tasks"
+    tasks_dir.mkdir()
+    # Backdated outside the racy mtime window so the index keeps them
+    write_task(tasks_dir, "T-001", status="completed", age=60)
+    write_task(tasks_dir, "T-002", deps="T-001", age=60)
+    write_task(tasks_dir, "T-003", status="failed", age=60)
+    return tasks_dir
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    store._connect()  # a project that has already run: the index can be persisted
+    yield store
+    store.close()
+
+
+class TestStatusReader:
+    """Test cases for the frontmatter-index status reader"""
+
+    def test_matches_full_parse(self, tasks_dir, store):
+        """Test the summary and task fields match a full TaskParser pass"""
+        status = StatusReader(tasks_dir, store).get_status()
+        parsed = TaskParser(tasks_dir).parse_all_tasks()
+
+        assert [(t.id, t.title, t.status, t.priority, t.dependencies) for t in status["tasks"]] == \
+            [(t.id, t.title, t.status, t.priority, t.dependencies) for t in parsed]
+        assert status["summary"] == {"total": 3, "completed": 1, "failed": 1, "pending": 1,
+                                     "in_progress": 0, "blocked": 1}
+
+    def test_warm_read_uses_index(self, tasks_dir, store):
+        """Test unchanged files are not re-read and edited ones are"""
+        StatusReader(tasks_dir, store).read()
+
+        reader = StatusReader(tasks_dir, store)
+        with patch.object(TaskParser, "read_frontmatter", side_effect=AssertionError("re-read")):
+            assert len(reader.read()) == 3
+
+        write_task(tasks_dir, "T-002", status="in_progress", age=30)
+        (tasks_dir / "T-003.md").unlink()
+        tasks = reader.read()
+
+        assert [(t.id, t.status) for t in tasks] == [("T-001", "completed"), ("T-002", "in_progress")]
+        assert len(store.index_entries()) == 2
+
+    def test_recent_files_not_indexed(self, tasks_dir, store):
+        """Test files inside the racy mtime window are read but not cached"""
+        write_task(tasks_dir, "T-004", age=0)
+
+        tasks = StatusReader(tasks_dir, store).read()
+
+        assert tasks[-1].id == "T-004"
+        assert str(tasks_dir / "T-004.md") not in store.index_entries()
+
+    def test_fresh_project_creates_no_database(self, tasks_dir, tmp_path):
+        """Test status on a project that never ran reads tasks without creating the database"""
+        store = StateStore(str(tmp_path / "fresh.db"))
+
+        assert len(StatusReader(tasks_dir, store).read()) == 3
+        assert not (tmp_path / "fresh.db").exists()
+        store.close()
+
+    def test_state_overlay_is_read_only(self, tasks_dir, store):
+        """Test stored state overlays the index, and manual edits win without deleting rows"""
+        store.record(Task(id="T-002", title="B", status="failed", error_message="boom"), file_status="pending")
+        store.record(Task(id="T-003", title="C", status="completed"), file_status="pending")
+
+        tasks = {t.id: t for t in StatusReader(tasks_dir, store).read()}
+
+        assert (tasks["T-002"].status, tasks["T-002"].error_message) == ("failed", "boom")
+        assert tasks["T-003"].status == "failed"
+        assert set(store.all()) == {"T-002", "T-003"}
+
+    def test_status_does_not_build_engine_components(self, tasks_dir, tmp_path):
+        """Test the engine builds the agent and browser pool only on first use"""
+        engine = TaskEngine({
+            "orchestrator": {"log_level": "CRITICAL"},
+            "directories": {"tasks": str(tasks_dir), "logs": str(tmp_path / "logs")},
+            "files": {"status": str(tmp_path / "task-status.json")}
+        })
+        with patch("task_runner.tool_calling_agent.ToolCallingAgent") as agent, \
+                patch("task_runner.browser_pool.BrowserPool") as pool:
+            assert engine.get_status()["summary"]["total"] == 3
+            agent.assert_not_called()
+            pool.assert_not_called()
+
+            assert engine.opencode is engine.opencode
+            agent.assert_called_once()
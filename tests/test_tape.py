@@ -0,0 +1,217 @@
+"""
+Tests for tape module
+"""
+
+import os
+import json
+import pytest
+from unittest.mock import patch
+from task_runner.tape import TapeWriter, TapeIndex, _flush_open_writers
+from task_runner.memory_manager import MemoryManager
+
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestTapeWriter:
+    """Test cases for TapeWriter"""
+
+    def test_buffers_until_record_threshold(self, tmp_path):
+        """Test records stay in memory until the group commit threshold"""
+        path = tmp_path / "tape.jsonl"
+        writer = TapeWriter(str(path), durability="none", max_records=3, flush_interval=60)
+
+        writer.append({"n": 1})
+        writer.append({"n": 2})
+        assert not path.exists()
+        assert writer.pending_records == 2
+
+        writer.append({"n": 3})
+        assert [r["n"] for r in read_records(path)] == [1, 2, 3]
+        assert writer.flush_count == 1
+        writer.close()
+
+    def test_byte_threshold(self, tmp_path):
+        """Test a large record triggers a flush by size"""
+        path = tmp_path / "tape.jsonl"
+        writer = TapeWriter(str(path), durability="none", max_records=100, max_bytes=100, flush_interval=60)
+
+        writer.append({"content": "x" * 200})
+
+        assert writer.pending_records == 0
+        writer.close()
+
+    def test_time_threshold(self, tmp_path):
+        """Test records older than flush_interval are committed on next append"""
+        path = tmp_path / "tape.jsonl"
+        writer = TapeWriter(str(path), durability="none", max_records=100, flush_interval=0)
+
+        writer.append({"n": 1})
+
+        assert len(read_records(path)) == 1
+        writer.close()
+
+    @pytest.mark.parametrize("durability,appends,expected_fsyncs", [
+        ("none", 4, 0),
+        ("batch", 4, 2),
+        ("every-record", 4, 4),
+    ])
+    def test_fsync_policy(self, tmp_path, durability, appends, expected_fsyncs):
+        """Test fsync is called according to the durability mode"""
+        writer = TapeWriter(str(tmp_path / "tape.jsonl"), durability=durability, max_records=2, flush_interval=60)
+
+        with patch("task_runner.tape.os.fsync") as fsync:
+            for n in range(appends):
+                writer.append({"n": n})
+
+        assert fsync.call_count == expected_fsyncs
+        writer.close()
+
+    def test_invalid_durability(self, tmp_path):
+        """Test unknown durability modes are rejected"""
+        with pytest.raises(ValueError):
+            TapeWriter(str(tmp_path / "tape.jsonl"), durability="sometimes")
+
+    def test_exit_hook_flushes_pending_records(self, tmp_path):
+        """Test the atexit hook writes buffered records"""
+        path = tmp_path / "tape.jsonl"
+        writer = TapeWriter(str(path), durability="batch", max_records=100, flush_interval=60)
+        writer.append({"n": 1})
+
+        _flush_open_writers()
+
+        assert read_records(path) == [{"n": 1}]
+
+    def test_reopens_after_close(self, tmp_path):
+        """Test writing after close appends to the same file"""
+        path = tmp_path / "tape.jsonl"
+        writer = TapeWriter(str(path), durability="none", max_records=1)
+        writer.append({"n": 1})
+        writer.close()
+        writer.append({"n": 2})
+        writer.close()
+
+        assert [r["n"] for r in read_records(path)] == [1, 2]
+
+
+class TestMemoryManagerTape:
+    """Test cases for MemoryManager with a buffered tape"""
+
+    def test_summarize_is_group_committed(self, tmp_path):
+        """Test a large summarize does not flush once per removed message"""
+        mm = MemoryManager(task_id="T-TAPE", logs_dir=str(tmp_path), tape_durability="batch",
+                           tape_buffer_records=500, tape_flush_interval=60)
+        ids = [mm.add_message({"role": "user", "content": f"msg {i}"}) for i in range(200)]
+        flushes_before = mm._tape.flush_count
+
+        mm.summarize_range(ids[0], ids[-1], "resumen")
+        mm.close_tape()
+
+        assert mm._tape.flush_count - flushes_before == 1
+        actions = [r["action"] for r in read_records(mm.tape_path)]
+        assert actions.count("SUMMARIZED_OUT") == 200
+        assert actions.count("ADD_MESSAGE") == 201
+
+    def test_recall_sees_buffered_records(self, tmp_path):
+        """Test recall_original finds messages still in the buffer"""
+        mm = MemoryManager(task_id="T-RECALL", logs_dir=str(tmp_path), tape_durability="none",
+                           tape_buffer_records=100, tape_flush_interval=60)
+        msg_id = mm.add_message({"role": "user", "content": "original"})
+
+        result = mm.recall_original(msg_id)
+
+        assert result["success"]
+        assert result["message"]["content"] == "original"
+        mm.close_tape()
+
+
+class TestTapeIndex:
+    """Test cases for the recall offset index"""
+
+    def make_memory(self, tmp_path, task_id="T-IDX"):
+        return MemoryManager(task_id=task_id, logs_dir=str(tmp_path), tape_durability="none",
+                             tape_buffer_records=8, tape_flush_interval=60)
+
+    def test_index_maintained_on_append(self, tmp_path):
+        """Test every flushed ADD_MESSAGE is indexed by visible and internal id"""
+        mm = self.make_memory(tmp_path)
+        ids = [mm.add_message({"role": "user", "content": f"msg {i}"}) for i in range(20)]
+        mm.flush_tape()
+
+        index = TapeIndex(mm.tape_path)
+        index.ensure_loaded()
+
+        assert set(index.by_visible_id) == set(ids)
+        internal_id = mm.messages[3]["internal_id"]
+        assert index.lookup(internal_id=internal_id)["message"]["content"] == "msg 3"
+        mm.close_tape()
+
+    def test_recall_does_not_scan_tape(self, tmp_path):
+        """Test recall decodes a single record"""
+        mm = self.make_memory(tmp_path)
+        ids = [mm.add_message({"role": "user", "content": f"msg {i}"}) for i in range(50)]
+        mm.flush_tape()
+
+        with patch("task_runner.tape.json.loads", wraps=json.loads) as loads:
+            result = mm.recall_original(ids[25])
+
+        assert result["message"]["content"] == "msg 25"
+        assert loads.call_count == 1
+        mm.close_tape()
+
+    def test_rebuild_when_sidecar_missing(self, tmp_path):
+        """Test the index is rebuilt from the tape if the sidecar is deleted"""
+        mm = self.make_memory(tmp_path)
+        msg_id = mm.add_message({"role": "user", "content": "hola"})
+        mm.close_tape()
+        os.remove(mm._tape_index.index_path)
+
+        index = TapeIndex(mm.tape_path)
+
+        assert index.lookup(visible_id=msg_id)["message"]["content"] == "hola"
+        assert os.path.exists(index.index_path)
+
+    def test_catch_up_when_tape_grew(self, tmp_path):
+        """Test records appended without the index are picked up on load"""
+        mm = self.make_memory(tmp_path)
+        mm.add_message({"role": "user", "content": "primero"})
+        mm.close_tape()
+
+        with open(mm.tape_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"internal_id": "ext", "visible_id": 99, "action": "ADD_MESSAGE",
+                                "message": {"role": "user", "content": "externo"}}) + "\n")
+
+        index = TapeIndex(mm.tape_path)
+
+        assert index.lookup(visible_id=99)["message"]["content"] == "externo"
+
+    def test_rebuild_when_tape_replaced(self, tmp_path):
+        """Test a stale index pointing at wrong offsets is rebuilt"""
+        mm = self.make_memory(tmp_path)
+        for i in range(5):
+            mm.add_message({"role": "user", "content": f"msg {i}"})
+        mm.close_tape()
+
+        # Reescribir la cinta con otro contenido y mayor tamaño
+        with open(mm.tape_path, "w", encoding="utf-8") as f:
+            for i in range(10):
+                f.write(json.dumps({"internal_id": f"n{i}", "visible_id": i, "action": "ADD_MESSAGE",
+                                    "message": {"role": "user", "content": f"nuevo {i} " + "x" * 50}}) + "\n")
+
+        index = TapeIndex(mm.tape_path)
+
+        assert index.lookup(visible_id=2)["message"]["content"].startswith("nuevo 2")
+
+    def test_latest_session_wins(self, tmp_path):
+        """Test a re-run of the same task recalls its own messages"""
+        first = self.make_memory(tmp_path, "T-RERUN")
+        first.add_message({"role": "user", "content": "intento 1"})
+        first.close_tape()
+
+        second = self.make_memory(tmp_path, "T-RERUN")
+        msg_id = second.add_message({"role": "user", "content": "intento 2"})
+
+        assert second.recall_original(msg_id)["message"]["content"] == "intento 2"
+        second.close_tape()
@@ -4,6 +4,7 @@ Tests for task_engine module
 
 import pytest
 import tempfile
+import asyncio
 import logging
 from pathlib import Path
 from unittest.mock import Mock, patch
@@ -216,6 +217,37 @@ Task {task_id}.
         assert status["summary"]["completed"] == 1
         assert status["summary"]["failed"] == 1
 
+    def test_sequential_run_follows_dependencies(self, config, temp_project):
+        """Test sequential runner executes tasks as their dependencies complete"""
+        for task_id, deps in [("T-001", "[T-002]"), ("T-002", "[]"), ("T-003", "[T-001]")]:
+            content = f"""---
+id: {task_id}
+title: "Task {task_id}"
+status: pending
+priority: medium
+dependencies: {deps}
+---
+
+## Description
+Task {task_id}.
+"""
+            (temp_project["tasks"] / f"{task_id}.md").write_text(content, encoding="utf-8")
+        
+        engine = TaskEngine(config)
+        engine.load_tasks()
+        
+        executed = []
+        
+        def fake_execute(task):
+            executed.append(task.id)
+            task.status = "completed"
+            return True
+        
+        with patch.object(engine, "_execute_task", side_effect=fake_execute):
+            engine._run_sequential()
+        
+        assert executed == ["T-002", "T-001", "T-003"]
+
 
 class TestTaskEngineRetry:
     """Test cases for retry logic"""
@@ -280,3 +312,199 @@ A test task.
         task.retry_count += 1
         
         assert task.retry_count == 1
+
+    def test_parallel_run_retries_failed_tasks(self, config, temp_project):
+        """Test parallel runner applies the same retry semantics as sequential"""
+        for task_id, deps in [("T-001", "[]"), ("T-002", "[]"), ("T-003", "[T-001, T-002]")]:
+            content = f"""---
+id: {task_id}
+title: "Task {task_id}"
+status: pending
+priority: medium
+dependencies: {deps}
+---
+
+## Description
+Task {task_id}.
+"""
+            (temp_project["tasks"] / f"{task_id}.md").write_text(content, encoding="utf-8")
+        
+        engine = TaskEngine(config)
+        engine.load_tasks()
+        
+        attempts = {}
+        
+        def fake_execute(task):
+            attempts[task.id] = attempts.get(task.id, 0) + 1
+            # T-001 falla el primer intento
+            if task.id == "T-001" and attempts[task.id] == 1:
+                task.status = "failed"
+                return False
+            assert all(engine.graph.get_task(dep).status == "completed" for dep in task.dependencies)
+            task.status = "completed"
+            return True
+        
+        with patch.object(engine, "_execute_task", side_effect=fake_execute):
+            engine._run_parallel(2)
+        
+        assert attempts == {"T-001": 2, "T-002": 1, "T-003": 1}
+        assert all(t.status == "completed" for t in engine.tasks)
+
+    def test_async_run_follows_dependencies(self, config, temp_project):
+        """Test asyncio runner retries failures and respects dependencies"""
+        for task_id, deps in [("T-001", "[]"), ("T-002", "[T-001]")]:
+            content = f"""---
+id: {task_id}
+title: "Task {task_id}"
+status: pending
+priority: medium
+dependencies: {deps}
+---
+
+## Description
+Task {task_id}.
+"""
+            (temp_project["tasks"] / f"{task_id}.md").write_text(content, encoding="utf-8")
+        
+        engine = TaskEngine(config)
+        engine.load_tasks()
+        
+        executed = []
+        
+        async def fake_execute(task):
+            executed.append(task.id)
+            if executed.count(task.id) == 1 and task.id == "T-001":
+                task.status = "failed"
+                return False
+            task.status = "completed"
+            return True
+        
+        engine._execute_task_async = fake_execute
+        asyncio.run(engine._run_async(4))
+        
+        assert executed == ["T-001", "T-001", "T-002"]
+
+
+class TestE2EWaitSteps:
+    """Test cases for condition-based wait steps"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = TaskEngine({
+            "orchestrator": {"log_level": "CRITICAL"},
+            "directories": {"tasks": str(tmp_path / "tasks"), "logs": str(tmp_path / "logs")},
+            "validation": {"visual": {"enabled": False}}
+        })
+        return engine
+
+    @pytest.mark.parametrize("params,method,args", [
+        ({"selector": "#app", "timeout": 500}, "wait_for_selector", ("#app",)),
+        ({"value": ".done"}, "wait_for_selector", (".done",)),
+        ({"condition": "window.ready"}, "wait_for_function", ("window.ready",)),
+        ({"until": "load"}, "wait_for_load", ()),
+        ({"until": "networkidle", "timeout": 2000}, "wait_for_network_idle", ()),
+    ])
+    def test_wait_variants(self, engine, params, method, args):
+        """Test each wait variant calls the matching CDP wait"""
+        cdp = Mock()
+        engine._run_wait_step(cdp, params)
+
+        call = getattr(cdp, method)
+        call.assert_called_once()
+        assert call.call_args.args == args
+        assert call.call_args.kwargs["timeout"] == (params["timeout"] / 1000 if "timeout" in params else None)
+
+    def test_fixed_sleep_still_supported(self, engine):
+        """Test milliseconds and numeric shorthand keep sleeping"""
+        with patch("time.sleep") as sleep:
+            engine._run_wait_step(Mock(), {"milliseconds": 250})
+            engine._run_wait_step(Mock(), {"value": 100})
+
+        assert [c.args[0] for c in sleep.call_args_list] == [0.25, 0.1]
+
+
+class TestE2EChecks:
+    """Test cases for console and performance checks"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        return TaskEngine({
+            "orchestrator": {"log_level": "CRITICAL"},
+            "directories": {"tasks": str(tmp_path / "tasks"), "logs": str(tmp_path / "logs")},
+            "validation": {"visual": {"enabled": False}, "console": {"allowed_warnings": ["DevTools"]}}
+        })
+
+    def test_console_errors_and_warnings(self, engine):
+        """Test unexpected errors and warnings fail while allowed ones pass"""
+        from task_runner.task_parser import ConsoleChecks
+        logs = [
+            {"level": "warning", "text": "React.StrictMode double render"},
+            {"level": "warning", "text": "DevTools failed to load source map"},
+            {"level": "error", "text": "DevTools noise"},
+            {"level": "warning", "text": "deprecated API"},
+            {"level": "error", "text": "Uncaught TypeError"},
+        ]
+
+        problems = engine._check_console(ConsoleChecks(allowed_warnings=["React.StrictMode"]), logs)
+
+        assert len(problems) == 2
+        assert "Uncaught TypeError" in problems[0] and "DevTools noise" not in problems[0]
+        assert "deprecated API" in problems[1]
+        assert engine._check_console(ConsoleChecks(fail_on_error=False), logs) == []
+
+    def test_lease_errors_and_step_errors_are_reported_apart(self, engine):
+        """Test only a failed lease is reported as a missing Chrome tab"""
+        from contextlib import contextmanager
+        from task_runner.task_parser import CDPTest, CDPStep
+        task = Task(id="T-001", title="Test", status="pending", priority="high",
+                    e2e_tests=CDPTest(steps=[CDPStep(action="navigate", params={"url": "http://localhost"})]))
+
+        @contextmanager
+        def busy_lease():
+            raise TimeoutError("No hay pestañas libres")
+            yield
+
+        @contextmanager
+        def lease():
+            yield Mock()
+
+        engine._components["browser_pool"] = Mock(is_available=Mock(return_value=True), lease=busy_lease)
+        assert engine._run_e2e_tests(task)["error"] == "No se pudo obtener una pestaña de Chrome: No hay pestañas libres"
+
+        engine._components["browser_pool"] = Mock(is_available=Mock(return_value=True), lease=lease)
+        with patch.object(engine, "_run_e2e_steps", side_effect=RuntimeError("step crashed")):
+            with pytest.raises(RuntimeError, match="step crashed"):
+                engine._run_e2e_tests(task)
+
+    def test_all_performance_thresholds_enforced(self, engine):
+        """Test lcp, cls, fcp and ttfb are all compared"""
+        from task_runner.task_parser import PerformanceThresholds
+        thresholds = PerformanceThresholds(lcp=2500, cls=0.1, fcp=1800, ttfb=800)
+
+        problems = engine._check_performance(thresholds, {"lcp": 1000, "cls": 0.25, "fcp": 2000})
+
+        assert [p.split()[0] for p in problems] == ["CLS", "FCP"]
+
+
+class TestUnitTestStage:
+    """Test cases for the unit-test stage of a validation attempt"""
+
+    def test_failure_tail_reaches_retry_prompt(self, tmp_path):
+        """Test a failing command's output tail is fed to the next attempt"""
+        import sys
+        engine = TaskEngine({
+            "orchestrator": {"log_level": "CRITICAL", "max_retries": 2},
+            "directories": {"tasks": str(tmp_path / "tasks"), "logs": str(tmp_path / "logs")},
+            "validation": {"visual": {"enabled": False}, "unit_tests": {"tail_lines": 2}}
+        })
+        engine.parser.update_task_status = Mock()
+        task = Task(id="T-001", title="Test", status="pending", priority="high",
+                    unit_tests=[f'"{sys.executable}" -c "print(1); print(2); print(\'AssertionError\'); exit(1)"'])
+        record = {"steps": []}
+
+        assert engine._run_validation_stages(task, 0, {"success": True}, record) is None
+
+        assert record["steps"][0]["details"]["tests"][0]["returncode"] == 1
+        assert "AssertionError" in task.error_message and "\n1\n" not in task.error_message
+        assert "AssertionError" in engine._build_implementation_prompt(task, 1)
+        assert (tmp_path / "logs" / "unit-tests" / "T-001" / "attempt-1" / "01.log").exists()
@@ -6,6 +6,7 @@ import pytest
 import tempfile
 import os
 from pathlib import Path
+from unittest.mock import Mock
 from task_runner.task_parser import TaskParser, Task
 
 
@@ -169,3 +170,129 @@ class TestTaskModel:
         assert task.status == "completed"
         assert task.priority == "high"
         assert task.dependencies == ["T-002"]
+
+
+E2E_TASK = """---
+id: T-{n:03d}
+title: "Task {n}"
+priority: high
+dependencies: [T-000]
+---
+
+## Descripción
+Task number {n}.
+
+## Tests E2E (CDP)
+```yaml
+steps:
+  - action: navigate
+    url: http://localhost:3000
+  - screenshot: home.png
+console_checks:
+  - no_errors: false
+performance_thresholds:
+  lcp: 2500
+```
+"""
+
+
+class TestParseCache:
+    """Test cases for the on-disk parse cache"""
+
+    OLD = 1_600_000_000
+
+    @pytest.fixture
+    def tasks_dir(self, tmp_path):
+        tasks_dir = tmp_path / "tasks"
+        tasks_dir.mkdir()
+        for n in range(3):
+            path = tasks_dir / f"T-{n:03d}.md"
+            path.write_text(E2E_TASK.format(n=n), encoding="utf-8")
+            os.utime(path, (self.OLD, self.OLD))
+        return tasks_dir
+
+    def test_unchanged_files_are_not_reparsed(self, tasks_dir, tmp_path, monkeypatch):
+        """Test a second parser reuses cached tasks without reading files"""
+        from task_runner.task_parser import task_to_dict
+        cache_path = str(tmp_path / "parse-cache.json")
+        fresh = TaskParser(tasks_dir, cache_path=cache_path).parse_all_tasks()
+
+        parser = TaskParser(tasks_dir, cache_path=cache_path)
+        monkeypatch.setattr(parser, "parse_task_file", Mock(side_effect=AssertionError("reparsed")))
+        cached = parser.parse_all_tasks()
+
+        assert parser.cache.hits == 3
+        assert [task_to_dict(t) for t in cached] == [task_to_dict(t) for t in fresh]
+        assert cached[0].e2e_tests.steps[1].action == "screenshot"
+        assert cached[0].e2e_tests.console_checks.fail_on_error is False
+        assert cached[0].file_path == tasks_dir / "T-000.md"
+
+    def test_only_changed_files_are_reparsed(self, tasks_dir, tmp_path):
+        """Test an edit with a new mtime or size invalidates that file only"""
+        cache_path = str(tmp_path / "parse-cache.json")
+        TaskParser(tasks_dir, cache_path=cache_path).parse_all_tasks()
+        path = tasks_dir / "T-001.md"
+        path.write_text(E2E_TASK.format(n=1).replace("Task 1", "Renamed"), encoding="utf-8")
+        os.utime(path, (self.OLD + 10, self.OLD + 10))
+        (tasks_dir / "T-002.md").unlink()
+
+        parser = TaskParser(tasks_dir, cache_path=cache_path)
+        tasks = parser.parse_all_tasks()
+
+        assert [t.title for t in tasks] == ["Task 0", "Renamed"]
+        assert (parser.cache.hits, parser.cache.misses) == (1, 1)
+        assert len(parser.cache) == 2
+
+    def test_recently_modified_files_are_not_cached(self, tasks_dir, tmp_path):
+        """Test files edited within the racy window are always reparsed"""
+        (tasks_dir / "T-000.md").write_text(E2E_TASK.format(n=0), encoding="utf-8")
+        parser = TaskParser(tasks_dir, cache_path=str(tmp_path / "parse-cache.json"))
+
+        parser.parse_all_tasks()
+
+        assert len(parser.cache) == 2
+
+    def test_corrupt_cache_is_ignored(self, tasks_dir, tmp_path):
+        """Test an unreadable cache falls back to parsing"""
+        cache_path = tmp_path / "parse-cache.json"
+        cache_path.write_text("{oops")
+
+        tasks = TaskParser(tasks_dir, cache_path=str(cache_path)).parse_all_tasks()
+
+        assert len(tasks) == 3
+
+
+class TestBulkParse:
+    """Test cases for process-pool parsing of large backlogs"""
+
+    @pytest.fixture
+    def tasks_dir(self, tmp_path):
+        tasks_dir = tmp_path / "tasks"
+        tasks_dir.mkdir()
+        for n in range(12):
+            (tasks_dir / f"T-{n:03d}.md").write_text(E2E_TASK.format(n=n), encoding="utf-8")
+        (tasks_dir / "T-005b.md").write_text("---\nid: [unclosed\n---\n", encoding="utf-8")
+        return tasks_dir
+
+    def test_pool_matches_serial_order_and_errors(self, tasks_dir, capsys):
+        """Test pooled parsing keeps sorted order and reports errors like serial"""
+        from task_runner.task_parser import task_to_dict
+        serial = TaskParser(tasks_dir, parallel_threshold=10_000).parse_all_tasks()
+        serial_out = capsys.readouterr().out
+
+        pooled = TaskParser(tasks_dir, parallel_threshold=1, max_workers=2).parse_all_tasks()
+        pooled_out = capsys.readouterr().out
+
+        assert [task_to_dict(t) for t in pooled] == [task_to_dict(t) for t in serial]
+        assert [t.id for t in pooled] == [f"T-{n:03d}" for n in range(12)]
+        assert pooled_out == serial_out
+        assert "❌ Error parseando" in pooled_out and "T-005b.md" in pooled_out
+
+    def test_below_threshold_stays_in_process(self, tasks_dir, monkeypatch):
+        """Test small projects never start a process pool"""
+        import concurrent.futures
+        monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", Mock(side_effect=AssertionError("pool")))
+
+        tasks = TaskParser(tasks_dir, parallel_threshold=100, max_workers=4).parse_all_tasks()
+
+        assert len(tasks) == 12
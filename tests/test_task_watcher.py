@@ -0,0 +1,115 @@
+"""
+Tests for task_watcher module and the engine's watch mode
+"""
+
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from task_runner.task_watcher import TaskWatcher, _load_libc
+from task_runner.task_engine import TaskEngine
+from tests.task_files import write_task
+
+BACKENDS = [
+    "polling",
+    pytest.param("inotify", marks=pytest.mark.skipif(_load_libc() is None, reason="inotify not available")),
+]
+
+
+class TestTaskWatcher:
+    """Test cases for the inotify and polling watcher backends"""
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    def test_reports_created_edited_and_deleted_files(self, tmp_path, backend):
+        """Test each backend reports .md changes and ignores other files"""
+        existing = write_task(tmp_path, "T-001")
+        watcher = TaskWatcher(tmp_path, {"backend": backend, "poll_interval": 0.05, "debounce": 0.1})
+        try:
+            assert watcher.backend.name == backend
+            assert watcher.changes(0.1) == set()
+
+            created = write_task(tmp_path, "T-002")
+            (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+            assert watcher.changes(2) == {created}
+
+            existing.unlink()
+            write_task(tmp_path, "T-002", status="completed")
+            assert watcher.changes(2) == {existing, created}
+        finally:
+            watcher.close()
+
+    def test_polling_waits_for_stable_files(self, tmp_path):
+        """Test polling reports a file only once two scans agree on its size and mtime"""
+        watcher = TaskWatcher(tmp_path, {"backend": "polling", "poll_interval": 0.01, "debounce": 0})
+        path = write_task(tmp_path, "T-001")
+
+        assert watcher.changes(0) == set()
+        assert watcher.changes(0) == {path}
+
+
+    def test_overflow_rescans_without_blocking(self, tmp_path):
+        """Test an inotify overflow returns at once with every task, including deleted ones"""
+        kept = write_task(tmp_path, "T-001")
+        deleted = write_task(tmp_path, "T-002")
+        watcher = TaskWatcher(tmp_path, {"backend": "polling", "debounce": 0})
+        deleted.unlink()
+        watcher.backend = Mock(overflowed=True, read=Mock(return_value=set()))
+
+        result = []
+        thread = threading.Thread(target=lambda: result.append(watcher.changes(None)), daemon=True)
+        thread.start()
+        thread.join(timeout=2)
+
+        assert result == [{kept, deleted}]
+        assert watcher.backend.overflowed is False
+
+
+class TestWatchMode:
+    """Test cases for scheduling new and edited tasks into a running engine"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        tasks_dir = tmp_path / "tasks"
+        tasks_dir.mkdir()
+        write_task(tasks_dir, "T-001")
+        write_task(tasks_dir, "T-009", deps="T-AUTO-1")
+        return TaskEngine({
+            "orchestrator": {"log_level": "CRITICAL", "parallel_workers": 2},
+            "directories": {"tasks": str(tasks_dir), "logs": str(tmp_path / "logs"),
+                            "reports": str(tmp_path / "reports")},
+            "files": {"status": str(tmp_path / "task-status.json")},
+            "watch": {"backend": "polling", "poll_interval": 0.02, "debounce": 0, "idle_timeout": 0.5}
+        })
+
+    @pytest.mark.parametrize("parallel", [False, True])
+    def test_subtask_written_during_run_is_executed(self, engine, parallel):
+        """Test a subtask file created by a running task is parsed and run, unblocking its dependents"""
+        executed = []
+
+        def fake_execute(task):
+            executed.append(task.id)
+            if task.id == "T-001":
+                write_task(engine.tasks_dir, "T-AUTO-1")
+            task.status = "completed"
+            return True
+
+        with patch.object(engine, "_execute_task", side_effect=fake_execute):
+            engine.run(parallel=parallel, watch=True)
+
+        assert executed == ["T-001", "T-AUTO-1", "T-009"]
+        assert engine._watcher is None
+
+    def test_manual_status_edit_wins(self, engine):
+        """Test a status edited by hand in the file overrides the state from the run"""
+        engine.load_tasks()
+        engine._watcher = TaskWatcher(engine.tasks_dir, engine.config["watch"])
+        task = engine.graph.pop_ready()
+        engine.set_task_status(task, "failed", "boom")
+        engine.graph.mark_finished(task)
+
+        write_task(engine.tasks_dir, "T-001", status="completed")
+        engine._ingest_changes(0)  # polling: first scan only sees the file settling
+        assert engine._ingest_changes(0) == 1
+
+        assert task.status == "completed" and task.error_message is None
+        assert engine.state.get("T-001") is None
+        engine._watcher.close()
@@ -0,0 +1,109 @@
+"""
+Tests for tokenizer module
+"""
+
+import base64
+import pytest
+from task_runner.tokenizer import (
+    HeuristicTokenizer, BPETokenizer, CachedTokenizer, create_tokenizer
+)
+from task_runner.memory_manager import MemoryManager
+
+
+@pytest.fixture
+def vocab_file(tmp_path):
+    """Write a tiny .tiktoken vocabulary: all single bytes plus a few merges"""
+    tokens = [bytes([b]) for b in range(256)] + [b"he", b"ll", b"hell", b"hello"]
+    path = tmp_path / "tiny.tiktoken"
+    path.write_bytes(b"".join(
+        base64.b64encode(token) + b" " + str(rank).encode() + b"\n"
+        for rank, token in enumerate(tokens)
+    ))
+    return str(path)
+
+
+class TestBPETokenizer:
+    """Test cases for the BPE backend"""
+
+    def test_merges_by_rank(self, vocab_file):
+        """Test pieces are merged using the vocabulary ranks"""
+        tokenizer = BPETokenizer(vocab_file)
+
+        assert tokenizer.count("") == 0
+        assert tokenizer.count("hello") == 1
+        # " hello" -> " ", "hello"
+        assert tokenizer.count("hello hello") == 3
+        assert tokenizer.count("xyz") == 3
+
+    def test_non_ascii_falls_back_to_bytes(self, vocab_file):
+        """Test unknown multi-byte characters count one token per byte"""
+        tokenizer = BPETokenizer(vocab_file)
+
+        assert tokenizer.count("ñ") == 2
+
+
+class TestCachedTokenizer:
+    """Test cases for the content-hash cache"""
+
+    def test_repeated_content_hits_cache(self):
+        """Test identical texts are counted once by the backend"""
+        tokenizer = CachedTokenizer(HeuristicTokenizer(), max_entries=2)
+
+        assert tokenizer.count("salida de herramienta") == tokenizer.count("salida de herramienta")
+        assert (tokenizer.hits, tokenizer.misses) == (1, 1)
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted"""
+        tokenizer = CachedTokenizer(HeuristicTokenizer(), max_entries=2)
+        for text in ["uno", "dos", "uno", "tres", "uno"]:
+            tokenizer.count(text)
+
+        assert tokenizer.hits == 2
+        assert len(tokenizer._cache) == 2
+
+
+class TestCreateTokenizer:
+    """Test cases for the tokenizer factory"""
+
+    def test_default_is_heuristic(self):
+        """Test the heuristic backend is used without configuration"""
+        assert isinstance(create_tokenizer({}), HeuristicTokenizer)
+
+    def test_bpe_from_config(self, vocab_file):
+        """Test the bpe backend is cached and loaded from vocab_file"""
+        tokenizer = create_tokenizer({"tokenizer": "bpe", "vocab_file": vocab_file})
+
+        assert isinstance(tokenizer, CachedTokenizer)
+        assert tokenizer.count("hello") == 1
+
+    def test_missing_vocab_falls_back(self, tmp_path):
+        """Test a missing vocabulary degrades to the heuristic"""
+        tokenizer = create_tokenizer({"tokenizer": "bpe", "vocab_file": str(tmp_path / "nope.tiktoken")})
+
+        assert isinstance(tokenizer, HeuristicTokenizer)
+
+
+class TestMemoryManagerTokenizer:
+    """Test cases for MemoryManager token accounting"""
+
+    def test_uses_configured_tokenizer(self, tmp_path, vocab_file):
+        """Test message tokens come from the injected backend"""
+        mm = MemoryManager(task_id="T-TOK", logs_dir=str(tmp_path), tokenizer=BPETokenizer(vocab_file))
+        mm.add_message({"role": "user", "content": "hello"})
+
+        assert mm.get_metrics()["total_tokens"] == 1
+        mm.close_tape()
+
+    def test_tool_calls_count_name_and_arguments(self, tmp_path):
+        """Test tool calls are counted by function name and arguments only"""
+        mm = MemoryManager(task_id="T-TOK", logs_dir=str(tmp_path))
+        msg = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{"id": "c1", "type": "function",
+                            "function": {"name": "read_file", "arguments": '{"path": "a.py"}'}}]
+        }
+
+        expected = mm._estimate_tokens('read_file{"path": "a.py"}')
+        assert mm._calculate_message_tokens(msg) == expected
+        mm.close_tape()
@@ -0,0 +1,185 @@
+"""
+Tests for tool_calling_agent module
+"""
+
+import json
+import asyncio
+import tempfile
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from task_runner.tool_calling_agent import ToolCallingAgent, AsyncToolCallingAgent
+
+
+def tool_call(call_id, name, args):
+    """Build a fake tool call as returned by the OpenAI SDK"""
+    return SimpleNamespace(
+        id=call_id,
+        type="function",
+        function=SimpleNamespace(name=name, arguments=json.dumps(args))
+    )
+
+
+def response(tool_calls=None, content=None):
+    """Build a fake chat completion response"""
+    message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeAsyncCompletions:
+    """Replays a scripted list of responses and records the requests"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        await asyncio.sleep(0)
+        return self.responses.pop(0)
+
+
+class TestAsyncToolCallingAgent:
+    """Test cases for AsyncToolCallingAgent"""
+
+    @pytest.fixture
+    def logs_dir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    def make_agent(self, responses):
+        agent = AsyncToolCallingAgent(model="test", api_key="dummy")
+        completions = FakeAsyncCompletions(responses)
+        agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return agent, completions
+
+    def test_uses_async_client(self):
+        """Test the async agent is backed by AsyncOpenAI"""
+        from openai import AsyncOpenAI
+
+        agent = AsyncToolCallingAgent(model="test", api_key="dummy")
+
+        assert isinstance(agent.client, AsyncOpenAI)
+
+    def test_run_task_executes_tools_and_finishes(self, logs_dir):
+        """Test the async loop runs a terminal command and then finish_task"""
+        agent, completions = self.make_agent([
+            response([tool_call("c1", "execute_terminal_command", {"command": "echo hola"})]),
+            response([tool_call("c2", "finish_task", {"status": "completed", "summary": "Hecho"})]),
+        ])
+
+        result = asyncio.run(agent.run_task("T-ASYNC", "system", "task", logs_dir=logs_dir))
+
+        assert result == {"status": "completed", "summary": "Hecho", "iterations": 2}
+        tool_msgs = [m for m in completions.requests[1]["messages"] if isinstance(m, dict) and m.get("role") == "tool"]
+        assert tool_msgs[0]["tool_call_id"] == "c1"
+        assert "EXIT CODE: 0" in tool_msgs[0]["content"]
+        assert "hola" in tool_msgs[0]["content"]
+
+    def test_concurrent_tasks_keep_separate_memory(self, logs_dir):
+        """Test one agent instance can drive several tasks concurrently"""
+        def script(task_id):
+            return [
+                response(content=f"pensando {task_id}"),
+                response([tool_call("f", "finish_task", {"status": "completed", "summary": task_id})]),
+            ]
+
+        async def run_all():
+            agents = [self.make_agent(script(f"T-{i}")) for i in range(5)]
+            return await asyncio.gather(*[
+                agent.run_task(f"T-{i}", "system", "task", logs_dir=logs_dir)
+                for i, (agent, _) in enumerate(agents)
+            ])
+
+        results = asyncio.run(run_all())
+
+        assert [r["summary"] for r in results] == [f"T-{i}" for i in range(5)]
+        assert not hasattr(AsyncToolCallingAgent(model="test", api_key="dummy"), "memory")
+
+    def test_terminal_command_output_matches_sync_agent(self, logs_dir):
+        """Test async and sync terminal tools format output identically"""
+        sync_agent = ToolCallingAgent(model="test", api_key="dummy")
+        async_agent = AsyncToolCallingAgent(model="test", api_key="dummy")
+        args = {"command": "echo hola"}
+
+        sync_output = sync_agent._execute_tool("execute_terminal_command", args)
+        async_output = asyncio.run(async_agent._execute_tool_async("execute_terminal_command", args, None))
+
+        assert async_output == sync_output
+
+
+class FakeCompletions:
+    """Synchronous counterpart of FakeAsyncCompletions"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+
+class TestToolCallingAgent:
+    """Test cases for ToolCallingAgent"""
+
+    def test_tool_results_keep_call_order(self, tmp_path):
+        """Test batched tool results are appended in tool_call_id order"""
+        for name in ["a.txt", "b.txt", "c.txt"]:
+            (tmp_path / name).write_text(name, encoding="utf-8")
+
+        agent = ToolCallingAgent(model="test", api_key="dummy", max_parallel_tools=3)
+        completions = FakeCompletions([
+            response([
+                tool_call("c1", "read_file", {"path": str(tmp_path / "a.txt")}),
+                tool_call("c2", "read_file", {"path": str(tmp_path / "b.txt")}),
+                tool_call("c3", "write_file", {"path": str(tmp_path / "a.txt"), "content": "nuevo"}),
+                tool_call("c4", "read_file", {"path": str(tmp_path / "c.txt")}),
+            ]),
+            response([tool_call("c5", "finish_task", {"status": "completed", "summary": "ok"})]),
+        ])
+        agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+        result = agent.run_task("T-ORDER", "system", "task", logs_dir=str(tmp_path / "logs"))
+
+        assert result["status"] == "completed"
+        tool_msgs = [m for m in completions.requests[1]["messages"] if isinstance(m, dict) and m.get("role") == "tool"]
+        assert [m["tool_call_id"] for m in tool_msgs] == ["c1", "c2", "c3", "c4"]
+        assert tool_msgs[0]["content"] == "a.txt"
+        assert (tmp_path / "a.txt").read_text(encoding="utf-8") == "nuevo"
+
+    def test_concurrent_tasks_keep_separate_memory(self, tmp_path):
+        """Test parallel workers sharing one agent prune and record only their own task's memory"""
+        agent = ToolCallingAgent(model="test", api_key="dummy")
+        started = threading.Barrier(2)
+        scripts = {
+            task_id: [
+                response([tool_call("p", "prune_messages", {"message_ids": [2]})]),
+                response([tool_call("f", "finish_task", {"status": "completed", "summary": task_id})]),
+            ]
+            for task_id in ("T-A", "T-B")
+        }
+        requests = {"T-A": [], "T-B": []}
+
+        def create(**kwargs):
+            task_id = next(m["content"] for m in kwargs["messages"] if isinstance(m, dict) and m.get("role") == "user")
+            requests[task_id].append(kwargs)
+            if len(requests[task_id]) == 1:
+                started.wait(timeout=5)  # both tasks have created their memory before any tool runs
+            return scripts[task_id].pop(0)
+
+        agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        logs_dir = str(tmp_path / "logs")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda task_id: agent.run_task(task_id, "system", task_id, logs_dir=logs_dir),
+                                        ["T-A", "T-B"]))
+
+        assert [r["summary"] for r in results] == ["T-A", "T-B"]
+        for task_id in ("T-A", "T-B"):
+            tool_msgs = [m for m in requests[task_id][1]["messages"] if isinstance(m, dict) and m.get("role") == "tool"]
+            assert tool_msgs[0]["content"] == "ÉXITO: Se borraron 1 mensajes del contexto activo."
+            tape = (tmp_path / "logs" / f"tape_{task_id}.jsonl").read_text(encoding="utf-8")
+            assert '"PRUNE"' in tape
+            assert ("T-B" if task_id == "T-A" else "T-A") not in tape
@@ -0,0 +1,160 @@
+"""
+Tests for tool_executor module
+"""
+
+import time
+import asyncio
+import threading
+import pytest
+from task_runner.tool_executor import ToolExecutor, ToolCallRequest, is_read_only_command
+
+
+def call(call_id, name, **args):
+    return ToolCallRequest(id=call_id, name=name, args=args)
+
+
+class TestReadOnlyCommands:
+    """Test cases for is_read_only_command"""
+
+    @pytest.mark.parametrize("command", [
+        "ls -la",
+        "cat README.md",
+        "git status",
+        "git diff HEAD~1",
+        "grep -rn foo src | head -20",
+        "Get-Content app.js",
+        "find . -name '*.py' -print",
+    ])
+    def test_read_only(self, command):
+        assert is_read_only_command(command)
+
+    @pytest.mark.parametrize("command", [
+        "npm install",
+        "echo hola > out.txt",
+        "cat a.txt >> b.txt",
+        "ls && rm -rf build",
+        "git commit -m x",
+        "cat $(which python)",
+        "grep foo file | tee out.txt",
+        "find . -delete",
+        "find . -name '*.log' -fprint out",
+        "find . -fls out",
+        "find . -type f -exec rm {} +",
+        "find . -okdir rm {} +",
+        "sort -o out in",
+        "uniq in out",
+        "tree -o out",
+        "git diff --output=patch",
+        "ls\nrm -rf x",
+        "cat a.txt\r\nrm -rf x",
+        "rg --pre=./run.sh foo",
+        "rg --pre-glob '*.gz' --pre zcat foo",
+        "",
+        None,
+    ])
+    def test_not_read_only(self, command):
+        assert not is_read_only_command(command)
+
+
+class TestToolExecutorPlan:
+    """Test cases for ToolExecutor.plan"""
+
+    def ids(self, waves):
+        return [[c.id for c in wave] for wave in waves]
+
+    def test_independent_reads_share_a_wave(self):
+        executor = ToolExecutor()
+        waves = executor.plan([
+            call("1", "read_file", path="a.py"),
+            call("2", "read_file", path="b.py"),
+            call("3", "execute_terminal_command", command="git status"),
+        ])
+
+        assert self.ids(waves) == [["1", "2", "3"]]
+
+    def test_writes_to_same_path_are_serialized(self):
+        executor = ToolExecutor()
+        waves = executor.plan([
+            call("1", "write_file", path="a.py", content="x"),
+            call("2", "write_file", path="b.py", content="y"),
+            call("3", "write_file", path="a.py", content="z"),
+        ])
+
+        assert self.ids(waves) == [["1", "2"], ["3"]]
+
+    def test_read_after_write_waits(self):
+        executor = ToolExecutor()
+        waves = executor.plan([
+            call("1", "write_file", path="a.py", content="x"),
+            call("2", "read_file", path="a.py"),
+        ])
+
+        assert self.ids(waves) == [["1"], ["2"]]
+
+    def test_read_only_command_waits_for_writes(self):
+        executor = ToolExecutor()
+        waves = executor.plan([
+            call("1", "write_file", path="a.py", content="x"),
+            call("2", "execute_terminal_command", command="cat a.py"),
+        ])
+
+        assert self.ids(waves) == [["1"], ["2"]]
+
+    def test_mutating_command_is_a_barrier(self):
+        executor = ToolExecutor()
+        waves = executor.plan([
+            call("1", "read_file", path="a.py"),
+            call("2", "execute_terminal_command", command="npm test"),
+            call("3", "read_file", path="b.py"),
+        ])
+
+        assert self.ids(waves) == [["1"], ["2"], ["3"]]
+
+    def test_calls_after_finish_task_are_dropped(self):
+        executor = ToolExecutor()
+        waves = executor.plan([
+            call("1", "read_file", path="a.py"),
+            call("2", "finish_task", status="completed", summary="ok"),
+            call("3", "read_file", path="b.py"),
+        ])
+
+        assert self.ids(waves) == [["1"], ["2"]]
+
+
+class TestToolExecutorRun:
+    """Test cases for wave execution"""
+
+    def test_run_wave_is_concurrent_and_ordered(self):
+        executor = ToolExecutor(max_workers=4)
+        barrier = threading.Barrier(3, timeout=5)
+
+        def execute(name, args):
+            # Solo pasa la barrera si las tres llamadas corren a la vez
+            barrier.wait()
+            time.sleep(0.01 * (3 - int(args["n"])))
+            return f"result-{args['n']}"
+
+        wave = [call(str(n), "read_file", n=n) for n in range(3)]
+        try:
+            results = executor.run_wave(wave, execute)
+        finally:
+            executor.shutdown()
+
+        assert results == ["result-0", "result-1", "result-2"]
+
+    def test_run_wave_async_respects_bound(self):
+        executor = ToolExecutor(max_workers=2)
+        active = {"now": 0, "max": 0}
+
+        async def execute(name, args):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return args["n"]
+
+        wave = [call(str(n), "read_file", n=n) for n in range(6)]
+        results = asyncio.run(executor.run_wave_async(wave, execute))
+
+        assert results == list(range(6))
+        assert active["max"] == 2
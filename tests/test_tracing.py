@@ -0,0 +1,178 @@
+"""
+Tests for tracing module and the engine's per-run trace
+"""
+
+import json
+import threading
+import pytest
+from unittest.mock import Mock
+from task_runner import tracing
+from task_runner.tool_executor import ToolExecutor, ToolCallRequest
+from task_runner.report_generator import ReportGenerator
+from task_runner.task_engine import TaskEngine
+from tests.task_files import write_task
+
+
+@pytest.fixture
+def tracer():
+    tracer = tracing.start()
+    yield tracer
+    tracing.stop()
+
+
+class TestTracer:
+    """Test cases for span recording and Chrome trace export"""
+
+    def test_nested_spans_share_the_task_lane(self, tracer):
+        """Test child spans inherit the lane and nest inside their parent in time"""
+        with tracing.span("T-001", cat="task", lane="T-001"):
+            with tracing.span("implementation") as stage:
+                stage.set(success=True)
+        with tracing.span("T-002", cat="task", lane="T-002"):
+            pass
+
+        stage_event, task_event, other_event = tracer.events
+        assert stage_event["args"] == {"success": True}
+        assert stage_event["tid"] == task_event["tid"] != other_event["tid"]
+        assert task_event["ts"] <= stage_event["ts"]
+        assert stage_event["ts"] + stage_event["dur"] <= task_event["ts"] + task_event["dur"]
+
+    def test_tool_threads_inherit_lane(self, tracer):
+        """Test tool calls run in the executor's threads are traced on the task's lane"""
+        executor = ToolExecutor(max_workers=2)
+        barrier = threading.Barrier(2)
+
+        def execute(name, args):
+            barrier.wait(timeout=5)
+            return name
+
+        wave = [ToolCallRequest(id="1", name="read_file", args={"path": "a"}),
+                ToolCallRequest(id="2", name="read_file", args={"path": "b"})]
+        with tracing.span("T-001", cat="task", lane="T-001"):
+            assert executor.run_wave(wave, execute) == ["read_file", "read_file"]
+        executor.shutdown()
+
+        tools = [event for event in tracer.events if event["cat"] == "tool"]
+        labels = {entry["args"]["name"] for entry in tracer._metadata() if entry["name"] == "thread_name"}
+        assert [tool["args"]["call_id"] for tool in sorted(tools, key=lambda e: e["args"]["call_id"])] == ["1", "2"]
+        assert all(label.startswith("T-001") for label in labels)
+
+    def test_concurrent_async_tools_get_separate_tracks(self, tracer):
+        """Test overlapping tool calls on one event loop thread are not put on the same track"""
+        import asyncio
+        executor = ToolExecutor(max_workers=3)
+
+        async def execute(name, args):
+            await asyncio.sleep(0.05)
+            return name
+
+        async def run():
+            with tracing.span("T-001", cat="task", lane="T-001"):
+                wave = [ToolCallRequest(id=str(i), name="read_file", args={"path": str(i)}) for i in range(3)]
+                return await executor.run_wave_async(wave, execute)
+
+        assert asyncio.run(run()) == ["read_file"] * 3
+
+        events = tracer.events
+        tools = [event for event in events if event["cat"] == "tool"]
+        task_event = next(event for event in events if event["cat"] == "task")
+        assert len({tool["tid"] for tool in tools}) == 3
+        assert task_event["tid"] not in {tool["tid"] for tool in tools}
+        for tid in {event["tid"] for event in events}:
+            track = sorted((event for event in events if event["tid"] == tid), key=lambda e: e["ts"])
+            for before, after in zip(track, track[1:]):
+                nested = after["ts"] + after["dur"] <= before["ts"] + before["dur"]
+                assert nested or after["ts"] >= before["ts"] + before["dur"]
+
+    def test_error_is_recorded_and_reraised(self, tracer):
+        """Test an exception inside a span is stored as an attribute and propagates"""
+        with pytest.raises(ValueError):
+            with tracing.span("unit_tests"):
+                raise ValueError("boom")
+
+        assert tracer.events[0]["args"]["error"] == "ValueError: boom"
+
+    def test_save_writes_chrome_trace_and_caps_events(self, tmp_path):
+        """Test the file is trace-event JSON and events past max_events are counted as dropped"""
+        tracer = tracing.Tracer(max_events=2)
+        for name in ("a", "b", "c"):
+            with tracer.span(name, cat="cdp"):
+                pass
+
+        trace = json.loads(tracer.save(tmp_path / "traces" / "run.json").read_text(encoding="utf-8"))
+
+        complete = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+        assert [event["name"] for event in complete] == ["a", "b"]
+        assert {"ts", "dur", "pid", "tid"} <= complete[0].keys()
+        assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in trace["traceEvents"])
+        assert trace["otherData"]["dropped_events"] == 1
+
+    def test_summary_aggregates_by_category_and_name(self):
+        """Test summary totals stage spans and leaves task and attempt spans out"""
+        tracer = tracing.Tracer()
+        tracer._events = [
+            {"name": "T-001", "cat": "task", "dur": 9000.0},
+            {"name": "unit_tests", "cat": "stage", "dur": 1000.0},
+            {"name": "unit_tests", "cat": "stage", "dur": 3000.0},
+            {"name": "chat.completions", "cat": "llm", "dur": 5000.0},
+        ]
+
+        summary = tracer.summary()
+
+        assert [(row["cat"], row["name"]) for row in summary] == [("llm", "chat.completions"), ("stage", "unit_tests")]
+        assert summary[1] == {"cat": "stage", "name": "unit_tests", "count": 2,
+                              "total_ms": 4.0, "mean_ms": 2.0, "max_ms": 3.0}
+
+    def test_span_without_tracer_is_a_noop(self):
+        """Test span() works when tracing is disabled"""
+        tracing.stop()
+        with tracing.span("implementation") as stage:
+            stage.set(success=True)
+        assert tracing.active() is None
+
+    def test_usage_args_reads_token_counts(self):
+        """Test token usage is taken from the response when present"""
+        response = Mock(usage=Mock(prompt_tokens=10, completion_tokens=5, total_tokens=15))
+        assert tracing.usage_args(response) == {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        assert tracing.usage_args(Mock(usage=None)) == {}
+
+
+class TestRunTrace:
+    """Test cases for the trace written by TaskEngine.run and its report section"""
+
+    def test_run_writes_trace_and_stage_timings(self, tmp_path):
+        """Test a run saves a trace with task, attempt and stage spans and reports stage timings"""
+        tasks_dir = tmp_path / "tasks"
+        tasks_dir.mkdir()
+        write_task(tasks_dir, "T-001")
+        engine = TaskEngine({
+            "orchestrator": {"log_level": "CRITICAL"},
+            "directories": {"tasks": str(tasks_dir), "logs": str(tmp_path / "logs"),
+                            "reports": str(tmp_path / "reports")},
+            "files": {"status": str(tmp_path / "task-status.json")},
+            "validation": {"visual": {"enabled": False}}
+        })
+        engine._components["opencode"] = Mock(run_task=Mock(return_value={"status": "completed", "summary": "ok", "iterations": 1}))
+
+        engine.run()
+
+        assert tracing.active() is None
+        trace_file, = (tmp_path / "logs" / "traces").glob("run-*.json")
+        events = json.loads(trace_file.read_text(encoding="utf-8"))["traceEvents"]
+        names = {(event.get("cat"), event["name"]) for event in events if event["ph"] == "X"}
+        assert {("run", "run"), ("task", "T-001"), ("attempt", "attempt 1"),
+                ("stage", "implementation"), ("stage", "unit_tests"), ("stage", "e2e_tests")} <= names
+
+        report, = (tmp_path / "reports").glob("report_*.md")
+        content = report.read_text(encoding="utf-8")
+        assert "## Stage Timings" in content and "| stage | implementation | 1 |" in content
+        assert str(trace_file) in content
+
+    def test_report_without_trace_has_no_stage_section(self, tmp_path):
+        """Test reports stay unchanged when tracing is disabled"""
+        generator = ReportGenerator(str(tmp_path))
+
+        generated = generator.generate([], [], metrics={})
+
+        assert "Stage Timings" not in open(generated["markdown"], encoding="utf-8").read()
+        assert "Stage Timings" not in open(generated["html"], encoding="utf-8").read()
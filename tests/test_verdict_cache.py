@@ -0,0 +1,127 @@
+"""
+Tests for verdict_cache module
+"""
+
+import json
+import pytest
+from task_runner.verdict_cache import VerdictCache, criteria_digest
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"shot{i}.png"
+        path.write_bytes(bytes([i]) * 128)
+        paths.append(str(path))
+    return paths
+
+
+CRITERIA = criteria_digest("Home", ["Logo visible"])
+
+
+class TestVerdictCache:
+    """Test cases for the content-addressed verdict cache"""
+
+    def test_hit_after_store(self, images):
+        """Test a stored verdict is found by content, not by path"""
+        cache = VerdictCache(None)
+        cache.store(images[0], CRITERIA, "m", False, "Logo cortado")
+
+        with open(images[1], "wb") as f:
+            f.write(bytes([0]) * 128)
+
+        assert cache.lookup(images[1], CRITERIA, "m")["feedback"] == "Logo cortado"
+        assert cache.lookup(images[2], CRITERIA, "m") is None
+        assert cache.lookup(images[0], CRITERIA, "otro-modelo") is None
+        assert cache.stats == {"hits": 1, "perceptual_hits": 0, "misses": 2, "hit_rate": 0.3333, "entries": 1}
+
+    def test_lru_eviction(self, images):
+        """Test the least recently used entry is evicted first"""
+        cache = VerdictCache(None, {"max_entries": 2})
+        cache.store(images[0], CRITERIA, "m", True, "a")
+        cache.store(images[1], CRITERIA, "m", True, "b")
+        cache.lookup(images[0], CRITERIA, "m")
+        cache.store(images[2], CRITERIA, "m", True, "c")
+
+        assert len(cache) == 2
+        assert cache.lookup(images[1], CRITERIA, "m") is None
+        assert cache.lookup(images[0], CRITERIA, "m") is not None
+
+    def test_persistence(self, images, tmp_path):
+        """Test entries survive a reload and keep their LRU order"""
+        path = str(tmp_path / "cache" / "visual.json")
+        cache = VerdictCache(path, {"max_entries": 3})
+        for i, image in enumerate(images):
+            cache.store(image, CRITERIA, "m", True, str(i))
+        cache.save()
+
+        reloaded = VerdictCache(path)
+
+        assert len(reloaded) == 3
+        assert reloaded.lookup(images[3], CRITERIA, "m")["feedback"] == "3"
+        assert json.loads(open(path).read())["version"] == 1
+
+    def test_concurrent_saves(self, images, tmp_path):
+        """Test workers saving the shared cache at once never clash on the temp file"""
+        from concurrent.futures import ThreadPoolExecutor
+        path = str(tmp_path / "visual.json")
+        cache = VerdictCache(path)
+
+        def store_and_save(i):
+            for _ in range(20):
+                cache.store(images[i % len(images)], CRITERIA, "m", True, str(i))
+                cache.save()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(store_and_save, range(4)))
+
+        assert len(VerdictCache(path)) == 4
+
+    def test_save_error_is_logged(self, images, tmp_path):
+        """Test a failed write is logged instead of raised and retried on the next save"""
+        blocker = tmp_path / "blocker"
+        blocker.write_text("")
+        cache = VerdictCache(str(blocker / "visual.json"))
+        cache.store(images[0], CRITERIA, "m", True, "ok")
+
+        cache.save()
+
+        assert cache._dirty
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        """Test an unreadable cache file starts empty"""
+        path = tmp_path / "visual.json"
+        path.write_text("{not json")
+
+        assert len(VerdictCache(str(path))) == 0
+
+    def test_disabled(self, images):
+        """Test a disabled cache never stores nor hits"""
+        cache = VerdictCache(None, {"enabled": False})
+        cache.store(images[0], CRITERIA, "m", True, "ok")
+
+        assert cache.lookup(images[0], CRITERIA, "m") is None
+        assert len(cache) == 0
+
+    def test_perceptual_near_duplicate(self, tmp_path):
+        """Test a near-identical screenshot reuses the verdict"""
+        pytest.importorskip("PIL")
+        from PIL import Image, ImageDraw
+
+        def render(path, cursor):
+            image = Image.new("RGB", (320, 200), "white")
+            draw = ImageDraw.Draw(image)
+            draw.rectangle((0, 0, 160, 200), fill="navy")
+            if cursor:
+                draw.line((200, 100, 200, 110), fill="black")
+            image.save(path)
+            return str(path)
+
+        cache = VerdictCache(None, {"perceptual": True, "max_distance": 4})
+        cache.store(render(tmp_path / "a.png", False), CRITERIA, "m", True, "ok")
+
+        entry = cache.lookup(render(tmp_path / "b.png", True), CRITERIA, "m")
+
+        assert entry is not None and entry["feedback"] == "ok"
+        assert cache.stats["perceptual_hits"] == 1
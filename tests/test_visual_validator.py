@@ -0,0 +1,126 @@
+"""
+Tests for visual_validator module
+"""
+
+import json
+import pytest
+from types import SimpleNamespace
+from task_runner.visual_validator import VisualValidator
+from task_runner.verdict_cache import VerdictCache
+
+
+class FakeCompletions:
+    """Answers each request with a verdict per attached image"""
+
+    def __init__(self, verdict=lambda number, name: True, drop=()):
+        self.verdict = verdict
+        self.drop = drop
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        content = kwargs["messages"][1]["content"]
+        names = [part["text"].split(": ", 1)[1] for part in content if part["type"] == "text" and part["text"].startswith("Imagen ")]
+        verdicts = [
+            {"image": i, "valid": self.verdict(i, name), "feedback": f"ok {name}"}
+            for i, name in enumerate(names, start=1) if name not in self.drop
+        ]
+        call = SimpleNamespace(function=SimpleNamespace(name="report_visual_verdicts",
+                                                        arguments=json.dumps({"verdicts": verdicts})))
+        message = SimpleNamespace(content=None, tool_calls=[call])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def screenshots(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"shot{i}.png"
+        path.write_bytes(b"x" * 300)
+        paths.append(str(path))
+    return paths
+
+
+def make_validator(completions, **config):
+    validator = VisualValidator({"enabled": True, **config}, {"model": "test"})
+    validator.agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return validator
+
+
+class TestVisualValidator:
+    """Test cases for batched visual validation"""
+
+    def test_batches_by_size(self, screenshots):
+        """Test six screenshots with batch_size 4 take two requests"""
+        completions = FakeCompletions()
+        validator = make_validator(completions, batch_size=4)
+
+        result = validator.validate_multiple(screenshots, "Home", ["Logo visible"])
+
+        assert result["valid"] and result["passed"] == 6
+        assert result["requests"] == 2
+        images = [[p for p in r["messages"][1]["content"] if p["type"] == "image_url"] for r in completions.requests]
+        assert [len(i) for i in images] == [4, 2]
+        assert completions.requests[0]["tool_choice"]["function"]["name"] == "report_visual_verdicts"
+
+    def test_batches_by_payload_bytes(self, screenshots):
+        """Test chunks never exceed max_batch_bytes of encoded images"""
+        completions = FakeCompletions()
+        validator = make_validator(completions, batch_size=10, max_batch_bytes=900)
+
+        result = validator.validate_multiple(screenshots, "Home", [])
+
+        # 300 bytes -> 400 base64 chars: two images per request
+        assert result["requests"] == 3
+
+    def test_per_image_verdicts_keep_order(self, screenshots):
+        """Test verdicts map back to their screenshot and missing ones fail"""
+        completions = FakeCompletions(verdict=lambda number, name: name != "shot1.png", drop=("shot4.png",))
+        validator = make_validator(completions, batch_size=3)
+
+        result = validator.validate_multiple(screenshots + ["/no/existe.png"], "Home", [])
+
+        assert [v["valid"] for v in result["validations"]] == [True, False, True, True, False, True, False]
+        assert result["validations"][0]["feedback"] == "ok shot0.png"
+        assert "no devolvió veredicto" in result["validations"][4]["feedback"]
+        assert "no encontrado" in result["validations"][6]["feedback"]
+
+    def test_single_validate_uses_batch_path(self, screenshots):
+        """Test validate() is a batch of one"""
+        completions = FakeCompletions()
+        validator = make_validator(completions)
+
+        result = validator.validate(screenshots[0], "Home", [])
+
+        assert result["valid"] and len(completions.requests) == 1
+        assert "screenshot" not in result
+
+    def test_retry_reuses_cached_verdicts(self, screenshots, tmp_path):
+        """Test identical screenshots on a retry skip the model entirely"""
+        completions = FakeCompletions(verdict=lambda number, name: name != "shot1.png")
+        cache_path = str(tmp_path / "cache.json")
+        validator = make_validator(completions, batch_size=2)
+        validator.cache = VerdictCache(cache_path)
+        for i, path in enumerate(screenshots[:2]):
+            with open(path, "wb") as f:
+                f.write(bytes([i]) * 300)
+
+        first = validator.validate_multiple(screenshots[:2], "Home", ["Logo visible"])
+        second = make_validator(completions, batch_size=2)
+        second.cache = VerdictCache(cache_path)
+        retry = second.validate_multiple(screenshots[:2], "Home", ["Logo visible"])
+
+        assert len(completions.requests) == 1
+        assert [v["valid"] for v in retry["validations"]] == [v["valid"] for v in first["validations"]] == [True, False]
+        assert retry["cache_hits"] == 2 and retry["requests"] == 0
+        assert second.cache.stats["hit_rate"] == 1.0
+
+    def test_changed_criteria_miss_cache(self, screenshots):
+        """Test verdicts are only reused for the same criteria"""
+        completions = FakeCompletions()
+        validator = make_validator(completions)
+
+        validator.validate(screenshots[0], "Home", ["Logo visible"])
+        validator.validate(screenshots[0], "Home", ["Menú visible"])
+
+        assert len(completions.requests) == 2
@@ -0,0 +1,48 @@
+"""
+Tests for yaml_io module
+"""
+
+import pytest
+from task_runner import yaml_io
+
+
+@pytest.fixture
+def pure_python():
+    yaml_io.use_libyaml(False)
+    yield
+    yaml_io.use_libyaml(True)
+
+
+DOC = "id: T-001\ntitle: Configuración\ndependencies: [T-000]\nsteps:\n  - {action: navigate, url: 'http://x'}\n"
+
+
+class TestYamlIO:
+    """Test cases for the YAML facade"""
+
+    def test_backends_agree(self, pure_python):
+        """Test the pure-Python and libyaml loaders produce the same data"""
+        python_data = yaml_io.safe_load(DOC)
+        yaml_io.use_libyaml(True)
+
+        assert yaml_io.safe_load(DOC) == python_data
+        assert python_data["steps"][0]["action"] == "navigate"
+
+    def test_backend_selection(self, pure_python):
+        """Test the backend reflects libyaml availability"""
+        assert yaml_io.backend() == "python"
+        yaml_io.use_libyaml(True)
+        assert yaml_io.backend() == ("libyaml" if yaml_io.HAS_LIBYAML else "python")
+
+    def test_dump_round_trip(self):
+        """Test dumped frontmatter keeps unicode and reloads identically"""
+        data = {"id": "T-001", "title": "Configuración", "status": "completed"}
+
+        text = yaml_io.safe_dump(data, default_flow_style=False, allow_unicode=True)
+
+        assert "Configuración" in text
+        assert yaml_io.safe_load(text) == data
+
+    def test_unsafe_tags_rejected(self):
+        """Test arbitrary Python objects cannot be constructed"""
+        with pytest.raises(yaml_io.YAMLError):
+            yaml_io.safe_load("!!python/object/apply:os.system ['echo hi']")